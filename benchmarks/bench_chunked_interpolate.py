@@ -0,0 +1,49 @@
+"""Benchmark of the out-of-core DG interpolation.
+
+Interpolates a synthetic 5D p=1 modal serendipity frame in memory and
+in tiles written into a memory-mapped temporary file (see the
+'chunk_mem' parameter of GInterpModal.interpolate), and reports the
+peak of the memory allocated by NumPy during the interpolation; each
+cell is refined into 2^5 = 32 cells.
+
+Usage:
+  python bench_chunked_interpolate.py [cells_per_dim] [chunk_mem]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import postgkyl as pg
+from postgkyl.commands.util import parse_memory
+
+
+def bench(interp, chunk_mem):
+  tracemalloc.start()
+  tic = time.perf_counter()
+  _, values = interp.interpolate(chunk_mem=chunk_mem)
+  elapsed = time.perf_counter() - tic
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return elapsed, peak, values
+#end
+
+if __name__ == '__main__':
+  num_cells = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+  chunk_mem = parse_memory(sys.argv[2] if len(sys.argv) > 2 else '64M')
+  cells = (num_cells,)*5
+  data = pg.GData()
+  data.push([np.linspace(0, 1, c+1) for c in cells],
+            np.random.default_rng(0).standard_normal(cells + (32,)))
+  interp = pg.GInterpModal(data, 1, 'ms')
+  interp.interpolate() # matrices are cached after the first call
+
+  print('Coefficients: {:.1f} MB'.format(data.get_values().nbytes/2**20))
+  t_mem, peak_mem, ref = bench(interp, None)
+  print('  in memory:  {:7.3f} s, peak {:8.1f} MB'.format(t_mem, peak_mem/2**20))
+  t_chunk, peak_chunk, values = bench(interp, chunk_mem)
+  print('  in tiles:   {:7.3f} s, peak {:8.1f} MB (budget {:.1f} MB)'.format(
+    t_chunk, peak_chunk/2**20, chunk_mem/2**20))
+  assert np.array_equal(values, ref)
+#end
@@ -0,0 +1,96 @@
+"""Benchmark of the gkyl header parsing.
+
+Writes a directory of small synthetic type 1 gkyl frames (including
+msgpack meta data) and measures how many files per second can be
+scanned with Read_gkyl.preload(). For a reference, the same files are
+scanned with the per-field np.fromfile() parser used previously.
+
+Usage:
+  python bench_header_scan.py [num_files]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import msgpack as mp
+import numpy as np
+
+from postgkyl.data import Read_gkyl
+
+
+def write_frame(file_name, frame, cells=(16, 16), num_comps=8):
+  dti = np.dtype('i8')
+  meta = mp.packb({'time': 0.1*frame, 'frame': frame,
+                   'polyOrder': 2, 'basisType': 'serendipity'})
+  with open(file_name, 'wb') as fh:
+    np.array([103, 107, 121, 108, 48], dtype=np.dtype('b')).tofile(fh)
+    np.array([1, 1, len(meta)], dtype=dti).tofile(fh)
+    fh.write(meta)
+    np.array([2, len(cells)], dtype=dti).tofile(fh)
+    np.array(cells, dtype=dti).tofile(fh)
+    np.zeros(len(cells)).tofile(fh)
+    np.ones(len(cells)).tofile(fh)
+    np.array([8*num_comps, np.prod(cells)], dtype=dti).tofile(fh)
+    np.zeros(int(np.prod(cells))*num_comps).tofile(fh)
+  #end
+#end
+
+def legacy_scan(file_name):
+  # One np.fromfile() call (i.e., one open and seek) per header field
+  dti = np.dtype('i8')
+  offset = 0
+  np.fromfile(file_name, dtype=np.dtype('b'), count=5, offset=offset)
+  np.fromfile(file_name, dtype=dti, count=1, offset=5)
+  offset += 5
+  for _ in range(2):
+    np.fromfile(file_name, dtype=dti, count=1, offset=offset)
+    offset += 8
+  #end
+  meta_size = np.fromfile(file_name, dtype=dti, count=1, offset=offset)[0]
+  offset += 8
+  with open(file_name, 'rb') as fh:
+    fh.seek(offset)
+    mp.unpackb(fh.read(meta_size))
+  #end
+  offset += meta_size
+  np.fromfile(file_name, dtype=dti, count=1, offset=offset)
+  offset += 8
+  num_dims = np.fromfile(file_name, dtype=dti, count=1, offset=offset)[0]
+  offset += 8
+  for count in (num_dims, num_dims, num_dims, 1, 1):
+    np.fromfile(file_name, dtype=dti, count=count, offset=offset)
+    offset += 8*count
+  #end
+#end
+
+def scan(file_name):
+  reader = Read_gkyl(file_name, ctx={'time': None})
+  reader._is_compatible()
+  reader.preload()
+#end
+
+def bench(fn, files):
+  tic = time.perf_counter()
+  for f in files:
+    fn(f)
+  #end
+  return len(files) / (time.perf_counter() - tic)
+#end
+
+if __name__ == '__main__':
+  num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+  with tempfile.TemporaryDirectory() as tmp:
+    files = [os.path.join(tmp, 'bench-f_{:d}.gkyl'.format(i))
+             for i in range(num_files)]
+    for i, f in enumerate(files):
+      write_frame(f, i)
+    #end
+    legacy = bench(legacy_scan, files)
+    buffered = bench(scan, files)
+  #end
+  print('Scanned {:d} headers'.format(num_files))
+  print('  per-field np.fromfile: {:10.1f} files/s'.format(legacy))
+  print('  buffered parser:       {:10.1f} files/s'.format(buffered))
+  print('  speedup:               {:10.2f}x'.format(buffered/legacy))
+#end
@@ -0,0 +1,67 @@
+"""Benchmark of the modal DG interpolation in high dimensions.
+
+Interpolates synthetic modal serendipity and tensor fields with the
+full interpolation matrix and with the sum factorization (see
+postgkyl.data.modal_basis.apply_factors). The sum factorization needs
+far fewer operations but passes over the data once per direction, so
+it pays off only when the saving is large; GInterpModal selects it
+automatically for dim >= 3 when the estimated saving is at least
+SUM_FACTORIZATION_GAIN.
+
+Usage:
+  python bench_interpolate.py [num_cells_per_frame]
+"""
+import sys
+import time
+
+import numpy as np
+
+import postgkyl as pg
+from postgkyl.data import dg
+from postgkyl.data import modal_basis
+
+
+# GInterpModal takes the short basis names
+BASES = {'serendipity' : 'ms', 'tensor' : 'mt'}
+CASES = [(3, 2, 'serendipity'), (3, 2, 'tensor'), (4, 2, 'serendipity'),
+         (5, 1, 'serendipity'), (5, 2, 'serendipity'), (5, 2, 'tensor'),
+         (6, 1, 'serendipity'), (6, 2, 'serendipity'), (6, 2, 'tensor')]
+
+def make_data(dim, poly_order, basis_type, num_cells):
+  num_basis = len(modal_basis.basis_exponents(dim, poly_order, basis_type))
+  cells = [max(1, int(round(num_cells ** (1.0/dim))))]*dim
+  rng = np.random.default_rng(0)
+  data = pg.GData()
+  data.push([np.linspace(0, 1, c+1) for c in cells],
+            rng.standard_normal(tuple(cells) + (num_basis,)))
+  return data
+#end
+
+def bench(data, poly_order, basis_type, gain):
+  dg.SUM_FACTORIZATION_GAIN = gain
+  interp = pg.GInterpModal(data, poly_order, BASES[basis_type])
+  interp.interpolate() # matrices are cached after the first call
+  tic = time.perf_counter()
+  _, values = interp.interpolate()
+  return time.perf_counter() - tic, values
+#end
+
+if __name__ == '__main__':
+  num_cells = int(sys.argv[1]) if len(sys.argv) > 1 else 2**15
+  print('Interpolating frames with about {:d} cells'.format(num_cells))
+  default = dg.SUM_FACTORIZATION_GAIN
+  for dim, poly_order, basis_type in CASES:
+    data = make_data(dim, poly_order, basis_type, num_cells)
+    exps, ops = modal_basis.interp_factors(dim, poly_order, basis_type,
+                                           poly_order+1)
+    dense_ops, factored_ops = modal_basis.factored_cost(exps, ops)
+    t_dense, ref = bench(data, poly_order, basis_type, np.inf)
+    t_fact, values = bench(data, poly_order, basis_type, 0)
+    assert np.allclose(values, ref)
+    auto = dense_ops >= default*factored_ops
+    print('  {:d}D p{:d} {:12s} ops ratio {:5.1f}: dense {:7.3f} s, factorized {:7.3f} s ({:4.2f}x){:s}'.format(
+      dim, poly_order, basis_type, dense_ops/factored_ops,
+      t_dense, t_fact, t_dense/t_fact, ' [auto]' if auto else ''))
+  #end
+  dg.SUM_FACTORIZATION_GAIN = default
+#end
@@ -0,0 +1,53 @@
+"""Benchmark of the concurrent multi-file loading.
+
+Writes a directory of synthetic type 1 gkyl frames and loads all of
+them with postgkyl.data.load_files() using an increasing number of
+jobs. The gain depends mostly on the latency of the file system; on
+a local disk with a warm page cache the reading is memory-bound and
+the speedup is modest, while on network file systems (e.g. Lustre)
+the concurrent requests hide most of the latency.
+
+Usage:
+  python bench_parallel_load.py [num_files] [cells]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from postgkyl.data import load_files
+
+from bench_header_scan import write_frame
+
+
+def bench(files, jobs, use_processes=False):
+  tic = time.perf_counter()
+  data = load_files(files, jobs=jobs, use_processes=use_processes)
+  toc = time.perf_counter() - tic
+  # The order must not depend on the number of jobs
+  assert [d.ctx['frame'] for d in data] == list(range(len(files)))
+  return toc
+#end
+
+if __name__ == '__main__':
+  num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+  cells = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+  with tempfile.TemporaryDirectory() as tmp:
+    files = [os.path.join(tmp, 'bench-f_{:d}.gkyl'.format(i))
+             for i in range(num_files)]
+    for i, f in enumerate(files):
+      write_frame(f, i, cells=(cells, cells))
+    #end
+    print('Loading {:d} frames of {:d}x{:d} cells'.format(
+      num_files, cells, cells))
+    serial = bench(files, 1)
+    print('  jobs =  1:            {:8.3f} s'.format(serial))
+    for jobs in (2, 4, 8, 16):
+      t = bench(files, jobs)
+      print('  jobs = {:2d} (threads):  {:8.3f} s ({:5.2f}x)'.format(
+        jobs, t, serial/t))
+    #end
+    t = bench(files, 4, use_processes=True)
+    print('  jobs =  4 (processes):{:8.3f} s ({:5.2f}x)'.format(t, serial/t))
+  #end
+#end
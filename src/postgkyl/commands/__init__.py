@@ -17,6 +17,7 @@ from .ev import ev
 from .extractinput import extractinput
 from .fft import fft
 from .growth import growth
+from .index import index
 from .info import info
 from .integrate import integrate
 from .interpolate import interpolate
@@ -1,9 +1,19 @@
 import click
 import numpy as np
+import weakref
+from collections import OrderedDict
 
 class DataSpace(object):
-  def __init__(self):
+  def __init__(self, max_memory=None):
     self._datasetDict = {}
+
+    # Memory budget in bytes; when exceeded, the least recently used
+    # datasets which can be reread from their files are unloaded
+    self._max_memory = max_memory
+    # The datasets are referenced weakly so the ones dropped elsewhere
+    # are freed and stop counting against the budget
+    self._resident = OrderedDict() # id -> [weakref to dataset, nbytes]
+    self._used_memory = 0
   #end
 
   #---------------------------------------------------------------------
@@ -186,6 +196,72 @@ class DataSpace(object):
     else:
       self._datasetDict[tag_nm] = [data]
     #end
+    if self._max_memory is not None:
+      data._on_access = self._touch
+      if data.is_loaded():
+        self._touch(data)
+      #end
+    #end
+  #end
+
+  def remove(self, data):
+    tag_nm = data.get_tag()
+    self._datasetDict[tag_nm] = [dat for dat in self._datasetDict[tag_nm]
+                                 if dat is not data]
+    if not self._datasetDict[tag_nm]:
+      del self._datasetDict[tag_nm]
+    #end
+    data._on_access = None
+    self._forget(id(data))
+  #end
+
+  #-----------------------------------------------------------------
+  #-- Memory budget ------------------------------------------------
+  def _forget(self, key):
+    if key in self._resident:
+      self._used_memory -= self._resident.pop(key)[1]
+    #end
+  #end
+
+  def _touch(self, data):
+    # Called by the datasets on each access of their values
+    key = id(data)
+    if key in self._resident:
+      self._used_memory -= self._resident[key][1]
+      self._resident.move_to_end(key)
+      ref = self._resident[key][0]
+    else:
+      ref = weakref.ref(data, lambda _, key=key: self._forget(key))
+    #end
+    nbytes = data.get_nbytes()
+    self._resident[key] = [ref, nbytes]
+    self._used_memory += nbytes
+    if self._used_memory > self._max_memory:
+      self._evict(key)
+    #end
+  #end
+
+  def _evict(self, keep):
+    for key in list(self._resident):
+      if self._used_memory <= self._max_memory:
+        break
+      #end
+      ref, nbytes = self._resident[key]
+      dat = ref()
+      if key == keep or dat is None:
+        continue
+      #end
+      # Only the unmodified datasets read from files can be unloaded
+      if dat.is_loaded() and dat.unload() == 0:
+        continue
+      #end
+      self._used_memory -= nbytes
+      del self._resident[key]
+    #end
+  #end
+
+  def getUsedMemory(self):
+    return self._used_memory
   #end
 
   #-----------------------------------------------------------------
@@ -1,6 +1,8 @@
 import click
 import numpy as np
 
+from postgkyl.tools.calculus import weighted_sum
+from postgkyl.utils import real_type
 
 def _get_grid(grid0, grid1):
   if grid0 is not None and grid1 is not None:
@@ -167,7 +169,7 @@ def grad(inGrid, inValues):
   out_shape = list(inValues[0].shape)
   nc = inValues[0].shape[-1]
   out_shape[-1] = nc*nd
-  out_values = np.zeros(out_shape)
+  out_values = np.zeros(out_shape, real_type(inValues[0]))
 
   for d in range(nd):
     zc = 0.5*(inGrid[0][d][1:] + inGrid[0][d][:-1]) # get cell centered values
@@ -197,7 +199,7 @@ def grad2(inGrid, inValues):
   outShape = list(inValues[1].shape)
   numComps = inValues[1].shape[-1]
   outShape[-1] = outShape[-1]*numDims
-  outValues = np.zeros(outShape)
+  outValues = np.zeros(outShape, real_type(inValues[1]))
 
   for cnt, d in enumerate(rng):
     zc = 0.5*(inGrid[1][d][1:] + inGrid[1][d][:-1]) # get cell centered values
@@ -246,7 +248,7 @@ def integrate(inGrid, inValues, avg=False):
   # Should work for nonuniform meshes
   for ax in sorted(axis, reverse=True):
     values = np.moveaxis(values, ax, -1)
-    values = np.dot(values, dz[ax])
+    values = weighted_sum(values, dz[ax])
   #end
   for ax in sorted(axis):
     grid[ax] = np.array([0])
@@ -274,7 +276,7 @@ def divergence(inGrid, inValues):
     #end
   outShape = list(inValues[0].shape)
   outShape[-1] = 1
-  outValues = np.zeros(outShape)
+  outValues = np.zeros(outShape, real_type(inValues[0]))
   for d in range(numDims):
     zc = 0.5*(inGrid[0][d][1:] + inGrid[0][d][:-1]) # get cell centered values
     outValues[..., 0] = outValues[..., 0] + np.gradient(inValues[0][..., d], zc, edge_order=2, axis=d)
@@ -294,7 +296,7 @@ def curl(inGrid, inValues):
       raise ValueError("ERROR in 'ev curl': Curl in 1D requires 3-component input and {:d}-component field was provided.".format(numComps))
     #end
     zc0 = 0.5*(inGrid[0][0][1:] + inGrid[0][0][:-1])
-    outValues = np.zeros(outShape)
+    outValues = np.zeros(outShape, real_type(inValues[0]))
     outValues[..., 1] = - np.gradient(inValues[0][..., 2], zc0, edge_order=2, axis=0)
     outValues[..., 2] = np.gradient(inValues[0][..., 1], zc0, edge_order=2, axis=0)
   elif numDims == 2:
@@ -305,14 +307,14 @@ def curl(inGrid, inValues):
     elif numComps == 2:
       click.echo(click.style("WARNING in 'ev curl': Length of the provided vector ({:d}) is longer than number of dimensions ({:d}). Only the third component of curl will be calculated.".format(numComps, numDims), fg='yellow'))
       outShape[-1] = 1
-      outValues = np.zeros(outShape)
+      outValues = np.zeros(outShape, real_type(inValues[0]))
       outValues[..., 0] = np.gradient(inValues[0][..., 1], zc0, edge_order=2, axis=0) - np.gradient(inValues[0][..., 0], zc1, edge_order=2, axis=1)
     else:
       if numComps > 3:
         print("here")
         click.echo(click.style("WARNING in 'ev curl': Length of the provided vector ({:d}) is longer than number of dimensions ({:d}). The last {:d} components of the vector will be disregarded.".format(numComps, numDims, numComps-numDims), fg='yellow'))
       #end
-      outValues = np.zeros(outShape)
+      outValues = np.zeros(outShape, real_type(inValues[0]))
       outValues[..., 0] = np.gradient(inValues[0][..., 2], zc1, edge_order=2, axis=1)
       outValues[..., 1] = - np.gradient(inValues[0][..., 2], zc0, edge_order=2, axis=0)
       outValues[..., 2] = np.gradient(inValues[0][..., 1], zc0, edge_order=2, axis=0) - np.gradient(inValues[0][..., 0], zc1, edge_order=2, axis=1)
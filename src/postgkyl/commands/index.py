@@ -0,0 +1,24 @@
+import click
+
+from postgkyl.commands.util import verb_print
+from postgkyl.data import build_catalog
+
+@click.command()
+@click.option('--directory', default='.', show_default=True,
+              help='Directory to index')
+@click.option('--pattern', '-p', default='*.gkyl', show_default=True,
+              help='Glob pattern of the indexed files')
+@click.option('--rebuild', is_flag=True,
+              help='Rescan all the files instead of just the new and modified ones')
+@click.pass_context
+def index(ctx, **kwargs):
+  """Index the headers of Gkeyll files for fast loading. The index is
+  stored in a sidecar file and used by 'load' and 'listoutputs'.
+  """
+  verb_print(ctx, 'Starting index')
+  catalog = build_catalog(kwargs['directory'], kwargs['pattern'],
+                          kwargs['rebuild'])
+  click.echo('Indexed {:d} files in \'{:s}\''.format(
+    len(catalog.records), catalog.file_name))
+  verb_print(ctx, 'Finishing index')
+#end
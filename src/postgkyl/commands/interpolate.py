@@ -2,7 +2,7 @@ import click
 import numpy as np
 
 from postgkyl.data import GInterpModal, GInterpNodal
-from postgkyl.commands.util import verb_print
+from postgkyl.commands.util import parse_memory, verb_print
 from postgkyl.data import GData
 
 @click.command(help='Interpolate DG data onto a uniform mesh.')
@@ -21,10 +21,17 @@ from postgkyl.data import GData
               help="Custom label for the result")
 @click.option('--read', '-r', type=click.BOOL,
               help='Read from general interpolation file.')
+@click.option('--chunk-mem', 'chunk_mem',
+              help="Memory budget for interpolating modal data in tiles along the configuration space directions, e.g., '512M'; the result is memory-mapped from a temporary file in TMPDIR.")
 @click.pass_context
 def interpolate(ctx, **kwargs):
   verb_print(ctx, 'Starting interpolate')
   data = ctx.obj['data']
+  try:
+    chunk_mem = parse_memory(kwargs['chunk_mem'])
+  except ValueError:
+    ctx.fail("Invalid value for '--chunk-mem': {:s}".format(kwargs['chunk_mem']))
+  #end
 
   basis_type = None
   is_modal = None
@@ -68,16 +75,18 @@ def interpolate(ctx, **kwargs):
     numNodes = dg.numNodes
     numComps = int(dat.get_num_comps() / numNodes)
 
+    # Only the modal interpolation can be done in tiles
+    chunk = {'chunk_mem' : chunk_mem} if isinstance(dg, GInterpModal) and chunk_mem else {}
     if kwargs['tag']:
       out = GData(tag=kwargs['tag'],
                   label=kwargs['label'],
                   comp_grid=ctx.obj['compgrid'],
                   ctx=dat.ctx)
-      grid, values = dg.interpolate(tuple(range(numComps)))
+      grid, values = dg.interpolate(tuple(range(numComps)), **chunk)
       out.push(grid, values)
       data.add(out)
     else:
-      dg.interpolate(tuple(range(numComps)), overwrite=True)
+      dg.interpolate(tuple(range(numComps)), overwrite=True, **chunk)
     #end
   #end
   verb_print(ctx, 'Finishing interpolate')
@@ -3,6 +3,7 @@ import re
 from glob import glob
 
 from postgkyl.commands.util import verb_print
+from postgkyl.data import Catalog
 
 @click.command()
 @click.option('--extensions', '-e', type=click.STRING,
@@ -10,14 +11,22 @@ from postgkyl.commands.util import verb_print
               help='Output file extension(s)')
 @click.pass_context
 def listoutputs(ctx, **kwargs):
-  """List Gkeyll filename stems in the current directory
+  """List Gkeyll filename stems in the current directory. When the
+  directory is indexed (see 'index'), the number of frames and the
+  time span of each stem are listed as well.
   """
   verb_print(ctx, 'Starting listoutputs')
 
+  catalog = Catalog('.')
   extensions = kwargs['extensions'].split(',')
   for ext in extensions:
     files = glob('*.{:s}'.format(ext))
+    records = {}
+    if catalog.exists():
+      records = catalog.update(files)
+    #end
     unique = []
+    frames = {}
     for fn in files:
       # remove extension
       s = fn[:-(len(ext)+1)]
@@ -29,14 +38,27 @@ def listoutputs(ctx, **kwargs):
       s = re.sub(r'_\d+$', '', s)
       if s not in unique:
         unique.append(s)
+        frames[s] = []
+      #end
+      if fn in records and 'meta' in records[fn] and 'restart' not in fn:
+        frames[s].append(records[fn]['meta'].get('time'))
       #end
     #end
     if len(unique) > 0:
       click.echo('{:s}:'.format(ext))
     #end
     for s in sorted(unique):
-      click.echo('- {:s}'.format(s))
+      times = [t for t in frames[s] if t is not None]
+      if times:
+        click.echo('- {:s} ({:d} frames, t = {:g} - {:g})'.format(
+          s, len(frames[s]), min(times), max(times)))
+      else:
+        click.echo('- {:s}'.format(s))
+      #end
     #end
   #end
+  if catalog.exists():
+    catalog.save()
+  #end
   verb_print(ctx, 'Finishing listoutputs')
 #end
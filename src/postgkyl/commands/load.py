@@ -1,10 +1,13 @@
 import click
 import glob
-import numpy as np
+import os.path
 
-from postgkyl.commands.util import verb_print
-from postgkyl.data import GData
+from postgkyl.commands.util import parse_memory, verb_print
+from postgkyl.data import Catalog
 from postgkyl.data import GInterpModal
+from postgkyl.data import load_amr_blocks
+from postgkyl.data import load_files
+from postgkyl.data import load_frame_cube
 
 def _pickCut(ctx, kwargs, zn):
   nm = 'z{:d}'.format(zn)
@@ -60,7 +63,21 @@ def _crush(s): # Temp function used as a sorting key
 @click.option('--reader', '-r', type=click.STRING,
               help='Allows to specify the Adios variable name (default is \'CartGridField\')')
 @click.option('--load/--no-load', default=True,
-              help="Specify if data should be loaded.")
+              help="Specify if data should be loaded; with '--no-load', only the headers are read and the values are never loaded.")
+@click.option('--tmin', type=click.FLOAT,
+              help="Load only the time series data after this time.")
+@click.option('--tmax', type=click.FLOAT,
+              help="Load only the time series data before this time.")
+@click.option('--jobs', '-j', type=click.INT, default=1, show_default=True,
+              help="Number of files loaded concurrently. With the global '--max-memory', the values are read lazily, so only the headers are read concurrently.")
+@click.option('--processes', is_flag=True,
+              help="Use processes instead of threads for '--jobs'.")
+@click.option('--amr', is_flag=True,
+              help="Load the leaf blocks of FLASH AMR data at their native resolution, one dataset per block; multiple variables are stored as components.")
+@click.option('--cube-frames', 'cube_frames', is_flag=True,
+              help="Load frame cube files (see 'write --mode cube') as a sequence of frames instead of one collected dataset.")
+@click.option('--chunk-cache', 'chunk_cache', type=click.STRING,
+              help="Size of the HDF5 chunk cache for the 'h5' files, e.g., '64M'.")
 @click.pass_context
 def load(ctx, **kwargs):
   data = ctx.obj['data']
@@ -83,6 +100,11 @@ def load(ctx, **kwargs):
     files = [inDataString]
   #end
 
+  # In the follow mode, only the new complete files are loaded
+  if ctx.obj['follow']:
+    files = ctx.meta['pgkyl.watcher'].take(inDataString, files)
+  #end
+
   # Resolve the local/global variable names and partial loading
   # The local settings take a precedents but a warning is going to appear
   z0 = _pickCut(ctx, kwargs, 0)
@@ -133,32 +155,72 @@ def load(ctx, **kwargs):
     varNames = varNames[0].split(',')
   #end
 
+  # Use the headers from the catalog (see the 'index' command) when
+  # available; only the new and modified files are scanned
+  records = {}
+  catalog = Catalog(os.path.dirname(inDataString))
+  if catalog.exists():
+    records = catalog.update(files)
+    catalog.save()
+  #end
+
+  # With a memory budget, the values are read only when they are
+  # needed and can be unloaded again (see DataSpace); '--no-load'
+  # keeps only the headers
+  load = kwargs['load'] and ctx.obj['max_memory'] is None
+  lazy = kwargs['load']
 
-  for var in varNames:
-    for fn in files:
-      try:
-        dat = GData(file_name = fn, tag = kwargs['tag'],
-                    comp_grid = ctx.obj['compgrid'],
-                    z0 = z0, z1 = z1, z2 = z2,
-                    z3 = z3, z4 = z4, z5 = z5,
-                    comp = comp, var_name = var,
-                    label = kwargs['label'],
-                    mapc2p_name = mapc2p_name,
-                    mapc2p_vel_name = mapc2p_vel_name,
-                    reader_name = kwargs['reader'],
-                    load = kwargs['load'],
-                    click_mode = True)
-        if kwargs['fv']:
-          dg = GInterpModal(dat, 0, 'ms')
-          dg.interpolateGrid(overwrite=True)
-        #end
-        data.add(dat)
-      except NameError as e:
-        ctx.fail(click.style(
-          r'{:s}'.format(repr(e)),
-          fg='red'))
-      #end
+  try:
+    if kwargs['amr']:
+      datasets = [dat for fn in files
+                  for dat in load_amr_blocks(fn, var_name = varNames,
+                                             tag = kwargs['tag'],
+                                             label = kwargs['label'],
+                                             comp_grid = ctx.obj['compgrid'],
+                                             dtype = ctx.obj['dtype'])]
+    elif kwargs['cube_frames']:
+      datasets = [dat for fn in files
+                  for dat in load_frame_cube(fn, tag = kwargs['tag'],
+                                             label = kwargs['label'],
+                                             comp_grid = ctx.obj['compgrid'],
+                                             z0 = z0, z1 = z1, z2 = z2,
+                                             z3 = z3, z4 = z4, z5 = z5,
+                                             comp = comp,
+                                             dtype = ctx.obj['dtype'])]
+    else:
+      datasets = load_files(files, jobs = kwargs['jobs'],
+                            use_processes = kwargs['processes'],
+                            var_names = varNames,
+                            tag = kwargs['tag'],
+                            comp_grid = ctx.obj['compgrid'],
+                            z0 = z0, z1 = z1, z2 = z2,
+                            z3 = z3, z4 = z4, z5 = z5,
+                            comp = comp,
+                            label = kwargs['label'],
+                            mapc2p_name = mapc2p_name,
+                            mapc2p_vel_name = mapc2p_vel_name,
+                            reader_name = kwargs['reader'],
+                            load = load,
+                            lazy = lazy,
+                            mmap = ctx.obj['mmap'],
+                            records = records,
+                            tmin = kwargs['tmin'],
+                            tmax = kwargs['tmax'],
+                            chunk_cache_size = parse_memory(kwargs['chunk_cache']),
+                            dtype = ctx.obj['dtype'],
+                            click_mode = True)
+    #end
+  except NameError as e:
+    ctx.fail(click.style(
+      r'{:s}'.format(repr(e)),
+      fg='red'))
+  #end
+  for dat in datasets:
+    if kwargs['fv']:
+      dg = GInterpModal(dat, 0, 'ms')
+      dg.interpolateGrid(overwrite=True)
     #end
+    data.add(dat)
   #end
 
   data.setUniqueLabels()
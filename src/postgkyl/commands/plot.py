@@ -288,7 +288,8 @@ def plot(ctx, **kwargs):
     #end
 
     if kwargs['saveframes']:
-      file_name = '{:s}_{:d}.png'.format(kwargs['saveframes'], i)
+      offset = ctx.obj['frame_offset'].get(dat.get_tag(), 0)
+      file_name = '{:s}_{:d}.png'.format(kwargs['saveframes'], i + offset)
       plt.savefig(file_name, dpi=kwargs['dpi'])
       kwargs['show'] = False
     #end
@@ -30,6 +30,8 @@ from postgkyl.commands.util import verb_print, set_frame
               help="Necessary parameter for multiblock lineouts for z0 or z1 lineouts")
 @click.option('--multiframe', '-mf', is_flag=True,
               help="Specify if performing select on multiple multiblockframes")
+@click.option('--amr', is_flag=True,
+              help="Select from AMR blocks (see 'load --amr') by coordinate values; the blocks outside of the selection are deactivated")
 @click.pass_context
 def select(ctx, **kwargs):
   r"""Subselect data from the active dataset(s). This command allows, for
@@ -136,6 +138,34 @@ def select(ctx, **kwargs):
       data.add(out)
     
     
+  elif kwargs['amr']:
+    for dat in list(data.iterator(kwargs['use'])):
+      grid, values = postgkyl.data.select_amr_block(dat,
+                                                    z0=kwargs['z0'],
+                                                    z1=kwargs['z1'],
+                                                    z2=kwargs['z2'],
+                                                    z3=kwargs['z3'],
+                                                    z4=kwargs['z4'],
+                                                    z5=kwargs['z5'],
+                                                    comp=kwargs['comp'])
+      if kwargs['tag']:
+        dat.deactivate()
+        if values is not None:
+          out = GData(tag=kwargs['tag'],
+                      label=kwargs['label'],
+                      comp_grid=ctx.obj['compgrid'],
+                      ctx=dat.ctx)
+          out._file_name = dat._file_name
+          out.push(grid, values)
+          data.add(out)
+        #end
+      elif values is None:
+        dat.deactivate()
+      else:
+        dat.push(grid, values)
+      #end
+    #end
+
   else:
     for dat in data.iterator(kwargs['use']):
       if kwargs['tag']:
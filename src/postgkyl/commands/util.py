@@ -13,6 +13,19 @@ def verb_print(ctx, message):
   #end
 #end
 
+def parse_memory(size):
+  """Converts a memory size like '512M' or '8G' into bytes"""
+  if size is None:
+    return None
+  #end
+  units = {'K' : 1024, 'M' : 1024**2, 'G' : 1024**3, 'T' : 1024**4}
+  size = str(size).strip().upper().rstrip('B')
+  if size and size[-1] in units:
+    return int(float(size[:-1]) * units[size[-1]])
+  #end
+  return int(float(size))
+#end
+
 def load_style(ctx, fn):
   fh = open(fn, 'r')
   for line in fh.readlines():
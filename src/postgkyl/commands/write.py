@@ -8,11 +8,13 @@ from postgkyl.commands.util import verb_print
               help='Specify a \'tag\' to apply to (default all tags).')
 @click.option('-f', '--filename', type=click.STRING, prompt=True,
               help="Output file name")
-@click.option('-m', '--mode', type=click.Choice(['gkyl', 'bp', 'txt', 'npy']),
+@click.option('-m', '--mode', type=click.Choice(['gkyl', 'bp', 'txt', 'npy', 'cube']),
               default='gkyl',
-              help="Output file mode. One of `gkyl` (binary, default), `bp` (ADIOS BP file), `txt` (ASCII text file), or `npy` (NumPy binary file)")
+              help="Output file mode. One of `gkyl` (binary, default), `bp` (ADIOS BP file), `txt` (ASCII text file), `npy` (NumPy binary file), or `cube` (compressed HDF5 file with all the datasets as frames)")
 @click.option('-s', '--single', is_flag=True,
               help='Write all dataset into one file')
+@click.option('-r', '--ranges', type=click.INT, default=1, show_default=True,
+              help="Write 'gkyl' files in the multi-range layout split into this many ranges")
 @click.option('-b', '--buffersize', default=1000,
               help='Set the buffer size for ADIOS write (default: 1000 MB)')
 @click.pass_context
@@ -40,7 +42,10 @@ def write(ctx, **kwargs):
   for i, dat in data.iterator(tag=kwargs['use'],
                               enum=True):
     out_name = '{:s}.{:s}'.format(fn, mode)
-    if kwargs['single']:
+    if mode == 'cube':
+      # All the datasets are frames of the same cube
+      append = i > 0
+    elif kwargs['single']:
       var_name = '{:s}_{:d}'.format(dat.get_tag(), i)
       cleaning = False
     else:
@@ -54,15 +59,16 @@ def write(ctx, **kwargs):
               bufferSize=kwargs['buffersize'],
               append=append,
               var_name=var_name,
-              cleaning=cleaning)
+              cleaning=cleaning,
+              num_ranges=kwargs['ranges'])
 
-    if kwargs['single']:
+    if kwargs['single'] and mode != 'cube':
       append = True
     #end
   #end
 
   # Cleaning
-  if not cleaning:
+  if not cleaning and mode != 'cube':
     if len(fn.split('/')) > 1:
       nm = fn.split('/')[-1]
     else:
@@ -7,6 +7,8 @@ from .dg import GInterpModal
 # import interpolation matrices computation
 from . import computeInterpolationMatrices
 from . import computeDerivativeMatrices
+from . import modal_basis
+from . import matrix_cache
 # import select
 from .select import select
 
@@ -15,4 +17,12 @@ from . import recovData
 from .read_gkyl import Read_gkyl
 from .read_gkyl_adios import Read_gkyl_adios
 from .read_gkyl_h5 import Read_gkyl_h5
-from .read_flash_h5 import Read_flash_h5
\ No newline at end of file
+from .read_flash_h5 import Read_flash_h5
+from .read_frame_cube import Read_frame_cube
+from .catalog import Catalog
+from .catalog import build_catalog
+from .load_files import load_files
+from .load_files import load_frame_cube
+from .write_frame_cube import write_frame_cube
+from .amr import load_amr_blocks
+from .amr import select_amr_block
@@ -0,0 +1,102 @@
+from postgkyl.data.gdata import GData
+from postgkyl.data.read_flash_h5 import Read_flash_h5
+from postgkyl.data.select import select
+
+# Block-structured AMR data are represented by one GData per leaf
+# block. Each block keeps its native resolution, its bounding box
+# ('lower' and 'upper'), and its refinement level ('amr_level') so
+# the finest uniform grid is never created. This is the layout that
+# 'plot --amr' and 'animate --amr' expect.
+
+def load_amr_blocks(file_name: str,
+                    var_name: str = 'dens',
+                    tag: str = 'default',
+                    label: str = '',
+                    comp_grid: bool = False,
+                    dtype: str = None) -> list:
+  """Loads the leaf blocks of a FLASH checkpoint or plot file.
+
+  Args:
+    file_name: str
+      The FLASH output file.
+    var_name: str or list of str
+      The variable(s) to load; multiple variables are stored as
+      components.
+    tag, label: str
+      Tag and label of all the blocks.
+    dtype: str
+      Real type of the values, e.g., 'float32'; by default, the type
+      stored in the file is kept.
+
+  Returns:
+    List of GData, one for each leaf block
+  """
+  reader = Read_flash_h5(file_name, var_name, ctx={})
+  if not reader._is_compatible():
+    raise NameError('"file_name" was specified ({:s}) but cannot be read as FLASH AMR data'.format(file_name))
+  #end
+  blocks = []
+  for b, (grid, values, level) in enumerate(reader.load_blocks()):
+    dat = GData(tag=tag, label=label, comp_grid=comp_grid,
+                ctx={'amr_level' : level, 'amr_block' : b})
+    # The file name is used to determine the frames in the command
+    # line mode (see commands.util.set_frame)
+    dat._file_name = file_name
+    dat.push(grid, values if dtype is None else values.astype(dtype))
+    blocks.append(dat)
+  #end
+  return blocks
+#end
+
+def _clip_cut(z: str, lower: float, upper: float) -> str:
+  # Restricts a coordinate cut to a block; returns None when the block
+  # is not intersected. A single coordinate belongs to the block with
+  # lower <= z < upper so it is not selected from two neighbors.
+  try:
+    if ':' in z:
+      lo, up = [float(v) if v else None for v in z.split(':')]
+      lo = lower if lo is None else lo
+      up = upper if up is None else up
+      if lo >= upper or up <= lower:
+        return None
+      #end
+      # Open ends keep the whole block in the direction
+      lo = repr(float(lo)) if lo > lower else ''
+      up = repr(float(up)) if up < upper else ''
+      return '{:s}:{:s}'.format(lo, up)
+    #end
+    value = float(z)
+  except ValueError:
+    raise ValueError('AMR blocks can be selected only by coordinate values, not \'{:s}\''.format(z))
+  #end
+  if not '.' in z and not 'e' in z.lower():
+    raise ValueError('AMR blocks can be selected only by coordinate values, not indices (\'{:s}\')'.format(z))
+  #end
+  if value < lower or value >= upper:
+    return None
+  #end
+  return repr(value)
+#end
+
+def select_amr_block(data: GData, comp=None,
+                     z0=None, z1=None, z2=None,
+                     z3=None, z4=None, z5=None) -> tuple:
+  """Selects a part of an AMR block using coordinate values.
+
+  Returns:
+    grid, values of the selection or (None, None) when the block does
+    not intersect the selection
+  """
+  zs = [z0, z1, z2, z3, z4, z5]
+  lower, upper = data.get_bounds()
+  for d, z in enumerate(zs):
+    if z is not None and d < data.get_num_dims():
+      zs[d] = _clip_cut(str(z), lower[d], upper[d])
+      if zs[d] is None:
+        return None, None
+      #end
+    #end
+  #end
+  return select(data, comp=comp, z0=zs[0], z1=zs[1], z2=zs[2],
+                z3=zs[3], z4=zs[4], z5=zs[5])
+#end
@@ -0,0 +1,184 @@
+import msgpack as mp
+import os
+import os.path
+from glob import glob
+
+from postgkyl.data.read_gkyl import Read_gkyl
+
+# Name of the sidecar file stored next to the indexed files
+CATALOG_NAME = '.pgkyl_index'
+_CATALOG_VERSION = 1
+
+def scan_file(file_name: str, stat: os.stat_result = None) -> dict:
+  """Reads the header of a file and returns its catalog record.
+
+  Only the header and the msgpack meta data are read. Files which are
+  not 'gkyl' files get a record with 'file_type' set to 0.
+  """
+  if stat is None:
+    stat = os.stat(file_name)
+  #end
+  record = {
+    'path' : os.path.basename(file_name),
+    'size' : stat.st_size,
+    'mtime' : stat.st_mtime_ns,
+    'file_type' : 0,
+  }
+  reader = Read_gkyl(file_name)
+  if not reader._is_compatible():
+    return record
+  #end
+  reader.preload()
+  record['file_type'] = int(reader.file_type)
+  record['version'] = int(reader.version)
+  record['real_type'] = 1 if reader.doffset == 4 else 2
+  record['meta'] = reader.meta
+  if reader.num_dims is not None:
+    record['cells'] = [int(c) for c in reader.cells]
+    record['lower'] = [float(v) for v in reader.lower]
+    record['upper'] = [float(v) for v in reader.upper]
+    record['num_comps'] = int(reader.num_comps)
+    record['offset'] = int(reader.offset)
+  #end
+  return record
+#end
+
+class Catalog(object):
+  """Persistent index of the headers of files in a directory.
+
+  The records are stored in a compact msgpack sidecar file. Each
+  record contains the file size and modification time, which are used
+  to detect stale entries, and the header information needed to
+  create a GData without reading the file.
+
+  Examples:
+    catalog = postgkyl.data.Catalog('run')
+    records = catalog.update(glob('run/name_*.gkyl'))
+    catalog.save()
+  """
+
+  def __init__(self, directory: str = '.') -> None:
+    self.directory = directory if directory else '.'
+    self.file_name = os.path.join(self.directory, CATALOG_NAME)
+    self.records = {}
+    self._modified = False
+    if self.exists():
+      self.read()
+    #end
+  #end
+
+  def exists(self) -> bool:
+    return os.path.isfile(self.file_name)
+  #end
+
+  def read(self) -> None:
+    try:
+      with open(self.file_name, 'rb') as fh:
+        content = mp.unpackb(fh.read())
+      #end
+      if content['version'] == _CATALOG_VERSION:
+        self.records = content['records']
+      #end
+    except Exception:
+      # Corrupted sidecar files are simply rebuilt
+      self.records = {}
+    #end
+  #end
+
+  def save(self) -> None:
+    """Writes the catalog if it changed; failures to write (e.g. a
+    read-only directory) are ignored.
+    """
+    if not self._modified and self.exists():
+      return
+    #end
+    tmp_name = '{:s}.{:d}'.format(self.file_name, os.getpid())
+    try:
+      with open(tmp_name, 'wb') as fh:
+        fh.write(mp.packb({'version' : _CATALOG_VERSION,
+                           'records' : self.records}))
+      #end
+      os.replace(tmp_name, self.file_name)
+      self._modified = False
+    except OSError:
+      pass
+    #end
+  #end
+
+  def get(self, file_name: str) -> dict:
+    """Returns the record of the file or None if it is missing or
+    stale."""
+    record = self.records.get(os.path.basename(file_name))
+    if record is None:
+      return None
+    #end
+    try:
+      stat = os.stat(file_name)
+    except OSError:
+      return None
+    #end
+    if record['size'] != stat.st_size or record['mtime'] != stat.st_mtime_ns:
+      return None
+    #end
+    return record
+  #end
+
+  def update(self, files: list, rebuild: bool = False) -> dict:
+    """Rescans the new and stale files.
+
+    Args:
+      files: list of str
+        The files to be indexed; all of them must be in the catalog
+        directory.
+      rebuild: bool
+        Rescan all the files.
+
+    Returns:
+      Dictionary of the records keyed by the file names
+    """
+    records = {}
+    for fn in files:
+      stat = os.stat(fn)
+      record = self.records.get(os.path.basename(fn))
+      if (rebuild or record is None or record['size'] != stat.st_size
+          or record['mtime'] != stat.st_mtime_ns):
+        record = scan_file(fn, stat)
+        self.records[record['path']] = record
+        self._modified = True
+      #end
+      records[fn] = record
+    #end
+    return records
+  #end
+
+  def prune(self) -> None:
+    """Removes the records of the files which no longer exist."""
+    for name in list(self.records):
+      if not os.path.isfile(os.path.join(self.directory, name)):
+        del self.records[name]
+        self._modified = True
+      #end
+    #end
+  #end
+#end
+
+def build_catalog(directory: str = '.', pattern: str = '*.gkyl',
+                  rebuild: bool = False) -> Catalog:
+  """Creates or updates the catalog of a directory.
+
+  Args:
+    directory: str
+      The directory to index.
+    pattern: str
+      Glob pattern of the indexed files.
+    rebuild: bool
+      Rescan all the files instead of just the new and stale ones.
+  """
+  catalog = Catalog(directory)
+  files = [f for f in glob(os.path.join(catalog.directory, pattern))
+           if os.path.basename(f) != CATALOG_NAME]
+  catalog.update(files, rebuild)
+  catalog.prune()
+  catalog.save()
+  return catalog
+#end
@@ -1,4 +1,6 @@
+import itertools
 import os.path
+import tempfile
 from glob import glob
 
 import tables
@@ -7,11 +9,19 @@ import numpy as np
 from postgkyl.data import GData
 from postgkyl.data.computeInterpolationMatrices import createInterpMatrix
 from postgkyl.data.computeDerivativeMatrices import createDerivativeMatrix
+from postgkyl.data.geometry_cache import derived_geometry
+from postgkyl.data.matrix_cache import cached_matrix
+from postgkyl.data import modal_basis
+from postgkyl.utils import real_type
 
 from postgkyl.data.recovData import recovC0Fn, recovC1Fn, recovEdFn
 
 path = os.path.dirname(os.path.realpath(__file__))
 
+# Minimum estimated reduction of the operations for which the sum
+# factorization replaces the full interpolation matrix (dim >= 3)
+SUM_FACTORIZATION_GAIN = 4
+
 numNodesSerendipity = np.array([[1,  2,   3,   4,   5],
                                 [1,  4,   8,  12,  17],
                                 [1,  8,  20,  32,  50],
@@ -28,22 +38,23 @@ numNodesTensor = np.array([[ 2,   3,    4,     5],
                            [ 4,   9,   16,    25],
                            [ 8,  27,   64,   125],
                            [16,  81,  256,   625],
-                           [32, 343, 1024,  3125],
+                           [32, 243, 1024,  3125],
                            [64, 729, 4096, 15625]])
 numNodesGkHybrid = np.array([1, 6, 12, 24, 48])
 numNodeshybrid = np.array([1, 6, 12, 24, 48])
 
 def _get_basis_p(num_dim, num_comp):
   basis, poly_order = None, None
-  idx = np.argwhere(numNodesSerendipity[num_dim-1, :] == num_comp).squeeze()
-  if idx:
+  idx = np.flatnonzero(numNodesSerendipity[num_dim-1, :] == num_comp)
+  if idx.size:
     basis = 'serendipity'
-    poly_order = idx
+    poly_order = int(idx[0])
   #end
-  idx = np.argwhere(numNodesTensor[num_dim-1, :] == num_comp).squeeze()
-  if idx:
+  # The p=1 tensor basis is the same as the serendipity one
+  idx = np.flatnonzero(numNodesTensor[num_dim-1, :] == num_comp)
+  if idx.size and basis is None:
     basis = 'tensor'
-    poly_order = idx+1
+    poly_order = int(idx[0])+1
   #end
   return basis, poly_order
 #end
@@ -72,56 +83,71 @@ def _getNumNodes(dim, poly_order, basis_type):
 #end
 
 
+def _readInterpMatrix(dim, poly_order, basis_type, modal):
+  # Load interpolation matrix from the pre-computed HDF5 file.
+  varid = 'xformMatrix%i%i' % (dim, poly_order)
+  if modal == False and basis_type.lower() == 'serendipity':
+    fileName = path + '/xformMatricesNodalSerendipity.h5'
+  elif modal and basis_type.lower() == 'serendipity':
+    fileName = path + '/xformMatricesModalSerendipity.h5'
+
+  elif modal and basis_type.lower() == 'maximal-order':
+    fileName = path + '/xformMatricesModalMaximal.h5'
+  else:
+    raise NameError(
+      "GInterp: Basis {:s} is not supported!\n"
+      "Supported basis are currently 'ns' (Nodal Serendipity), "
+      "'ms' (Modal Serendipity), and 'mo' (Modal Maximal Order)".
+      format(basis_type))
+  #end
+  fh = tables.open_file(fileName)
+  mat = fh.root.matrices._v_children[varid].read()
+  fh.close()
+  return mat.transpose()
+#end
+
 def _loadInterpMatrix(dim, poly_order, basis_type, interp, read, modal, c2p=False):
+  # The matrices are computed only once (see matrix_cache)
   if (interp is not None and read is None) or c2p:
     if interp is None:
       interp = poly_order+1
     #end
-    mat = createInterpMatrix(dim, poly_order, basis_type, interp, modal, c2p)
-    return mat
-  elif basis_type=='tensor':
-    mat = createInterpMatrix(dim, poly_order, 'tensor', poly_order+1, True, c2p)
-    return mat
-  elif basis_type=='gkhybrid':
-    mat = createInterpMatrix(dim, poly_order, 'gkhybrid', poly_order+1, True, c2p)
-    return mat
-  elif basis_type=='hybrid':
-    mat = createInterpMatrix(dim, poly_order, 'hybrid', poly_order+1, True, c2p)
-    return mat
+  elif basis_type in ('tensor', 'gkhybrid', 'hybrid'):
+    interp, modal = poly_order+1, True
   else:
-    # Load interpolation matrix from the pre-computed HDF5 file.
-    varid = 'xformMatrix%i%i' % (dim, poly_order)
-    if modal == False and basis_type.lower() == 'serendipity':
-      fileName = path + '/xformMatricesNodalSerendipity.h5'
-    elif modal and basis_type.lower() == 'serendipity':
-      fileName = path + '/xformMatricesModalSerendipity.h5'
-
-    elif modal and basis_type.lower() == 'maximal-order':
-      fileName = path + '/xformMatricesModalMaximal.h5'
-    else:
-      raise NameError(
-        "GInterp: Basis {:s} is not supported!\n"
-        "Supported basis are currently 'ns' (Nodal Serendipity), "
-        "'ms' (Modal Serendipity), and 'mo' (Modal Maximal Order)".
-        format(basis_type))
-    #end
-    fh = tables.open_file(fileName)
-    mat = fh.root.matrices._v_children[varid].read()
-    fh.close()
-    return mat.transpose()
+    return cached_matrix('xform', (int(dim), int(poly_order),
+                                   basis_type.lower(), bool(modal)),
+                         lambda: _readInterpMatrix(dim, poly_order,
+                                                   basis_type, modal),
+                         persistent=False)
+  #end
+  params = (int(dim), int(poly_order), basis_type, int(interp),
+            bool(modal), bool(c2p))
+  if modal:
+    # The modal bases are evaluated numerically (see modal_basis)
+    compute = lambda: modal_basis.interp_matrix(dim, poly_order, basis_type,
+                                                interp, c2p)
+  else:
+    compute = lambda: createInterpMatrix(dim, poly_order, basis_type,
+                                         interp, modal, c2p)
   #end
+  return cached_matrix('interp', params, compute)
 #end
 
 
 def _loadDerivativeMatrix(dim, poly_order, basis_type, interp, read, modal=True):
-  if interp is not None and read is None:
-    mat = createDerivativeMatrix(dim, poly_order, basis_type, interp, modal)
-    return mat
-  else:
+  if interp is None or read is not None:
     interp = poly_order+1
-    mat = createDerivativeMatrix(dim, poly_order, basis_type, interp, modal)
-    return mat
   #end
+  params = (int(dim), int(poly_order), basis_type, int(interp), bool(modal))
+  if modal:
+    compute = lambda: modal_basis.derivative_matrix(dim, poly_order,
+                                                    basis_type, interp)
+  else:
+    compute = lambda: createDerivativeMatrix(dim, poly_order, basis_type,
+                                             interp, modal)
+  #end
+  return cached_matrix('deriv', params, compute)
 #end
 
 
@@ -166,12 +192,28 @@ def _make1Dgrids(nInterp, Xc, numDims, gridType=None):
   return gridOut
 #end
 
-def _interpOnMesh(cMat, qIn, nInterpIn, basis_type, c2p=False):
-  shift = 0
-  numCells = np.array(qIn.shape)
-  # last entry is indexing nodes, get rid of it
-  numCells = numCells[:-1]
-  numDims = int(len(numCells))
+def _loadInterpFactors(dim, poly_order, basis_type, interp, read):
+  # Returns the 1D factors of the modal interpolation matrix when the
+  # sum factorization pays off; it saves a lot of operations in high
+  # dimensions but, unlike the single matrix product, passes over the
+  # data once per direction, so it is used only when the saving is
+  # large (e.g. p=2 in 4D and above)
+  if dim < 3 or read is not None:
+    return None
+  #end
+  if interp is None:
+    interp = poly_order+1
+  #end
+  exps, ops = modal_basis.interp_factors(dim, poly_order, basis_type, interp)
+  dense, factored = modal_basis.factored_cost(exps, ops)
+  if dense < SUM_FACTORIZATION_GAIN*factored:
+    return None
+  #end
+  return exps, ops
+#end
+
+def _getNumInterp(numDims, nInterpIn, basis_type):
+  # Number of the refined cells per DG cell in each direction
   numInterp = np.array([max(nInterpIn, 2)]*numDims)
   if basis_type == "gkhybrid":
     # 1x1v, 1x2v, 2x2v, 3x2v cases, with p=2 in the first velocity dim.
@@ -181,30 +223,116 @@ def _interpOnMesh(cMat, qIn, nInterpIn, basis_type, c2p=False):
   if basis_type == "hybrid":
     numInterp[-1] = nInterpIn+1
   #end
-  if c2p:
-    qOut = np.zeros(numCells*(numInterp-1)+1, np.float64)
+  return numInterp
+#end
+
+def _interpOnMesh(cMat, qIn, nInterpIn, basis_type, c2p=False, comps=False,
+                  factors=None):
+  # Evaluates the expansion in all the cells on the refined mesh. With
+  # 'comps', qIn has the shape (cells..., components, basis) and the
+  # result (refined cells..., components); otherwise, the component
+  # axis is omitted in both. With 'factors' (see _loadInterpFactors),
+  # the sum factorization is used instead of 'cMat'.
+  dtype = real_type(qIn)
+  cMat = np.asarray(cMat, dtype=dtype)
+  qIn = np.asarray(qIn, dtype=dtype)
+  if not comps:
+    qIn = qIn[..., np.newaxis, :]
+  #end
+  numCells = np.array(qIn.shape[:-2])
+  numDims = int(len(numCells))
+  numComps = qIn.shape[-2]
+  numInterp = _getNumInterp(numDims, nInterpIn, basis_type)
+
+  # A single contraction for all the cells, components, and nodes;
+  # the nodes are ordered with the first direction running the fastest
+  if factors is None:
+    temp = np.matmul(qIn, cMat.T)
   else:
-    qOut = np.zeros(numCells*numInterp, np.float64)
-  #end
-  # move the node index from last to the first
-  qIn = np.moveaxis(qIn, -1, 0)
-  # Main loop
-  for n in range(np.prod(numInterp)):
-    # https://docs.scipy.org/doc/numpy/reference/generated/numpy.tensordot.html
-    temp = np.tensordot(cMat[n, :], qIn, axes=1)
-    # decompose n to i,j,k,... indices based on the number of dimensions
-    startIdx = np.unravel_index(n, numInterp, order='F')
-    # define multi-D qOut slices
-    if c2p:
-      idxs = [slice(int(startIdx[i]), int(numCells[i]*(numInterp[i]-1)+startIdx[i]), numInterp[i]-1)
-              for i in range(numDims)]
-    else:
-      idxs = [slice(int(startIdx[i]), int(numCells[i]*numInterp[i]), numInterp[i])
-              for i in range(numDims)]
+    temp = modal_basis.apply_factors(qIn, *factors)
+  #end
+  temp = temp.reshape(tuple(numCells) + (numComps,) + tuple(numInterp[::-1]))
+  # The preallocated output is viewed as (c0, n0, c1, n1, ..., comps)
+  # so the nodes are scattered into the refined mesh by one transposed
+  # copy
+  qOut = np.empty(tuple(numCells*numInterp) + (numComps,), dtype)
+  shape = [s for c, n in zip(numCells, numInterp) for s in (int(c), int(n))]
+  perm = list(range(0, 2*numDims, 2)) + [2*numDims] + list(range(2*numDims-1, 0, -2))
+  qOut.reshape(shape + [numComps]).transpose(perm)[...] = temp
+  if c2p:
+    # The neighboring cells share the edge nodes; the values from the
+    # left cells are kept
+    idxs = [np.append(0, (np.arange(c)[:, np.newaxis]*n + np.arange(1, n)).ravel())
+            for c, n in zip(numCells, numInterp)]
+    qOut = qOut[np.ix_(*idxs) + (slice(None),)]
+  #end
+  if not comps:
+    return qOut[..., 0]
+  #end
+  return qOut
+#end
+
+def _chunkSteps(numCells, axes, cellBytes, chunkMem):
+  # Number of cells per tile along each direction so the tiles need at
+  # most about 'chunkMem' bytes; only the 'axes' are split, starting
+  # with the last one so the tiles are contiguous in the output
+  steps = [int(c) for c in numCells]
+  if chunkMem is None:
+    return steps
+  #end
+  slab = cellBytes * int(np.prod([c for d, c in enumerate(steps) if d not in axes]))
+  budget = chunkMem // max(slab, 1)
+  for d in sorted(axes, reverse=True):
+    steps[d] = int(min(numCells[d], max(budget, 1)))
+    budget = budget // numCells[d] if steps[d] == numCells[d] else 0
+  #end
+  return steps
+#end
+
+def _interpChunked(cMat, qIn, nInterpIn, basis_type, factors, axes,
+                   chunkMem, outFile):
+  # Out-of-core version of _interpOnMesh with 'comps': the cells are
+  # interpolated in tiles along 'axes' and written into a memory-mapped
+  # output, either the .npy file 'outFile' or an anonymous temporary
+  # file (in TMPDIR), so only a tile of the refined values is in memory
+  # at a time
+  dtype = np.dtype(real_type(qIn))
+  numCells = np.array(qIn.shape[:-2])
+  numComps, numBasis = qIn.shape[-2:]
+  numInterp = _getNumInterp(len(numCells), nInterpIn, basis_type)
+  shape = tuple(int(s) for s in numCells*numInterp) + (numComps,)
+  if outFile is None:
+    with tempfile.TemporaryFile() as fh:
+      qOut = np.memmap(fh, dtype=dtype, mode='w+', shape=shape)
     #end
-    qOut[tuple(idxs)] = temp
+  else:
+    qOut = np.lib.format.open_memmap(outFile, mode='w+', dtype=dtype,
+                                     shape=shape)
+  #end
+
+  # The nodal values are computed and then scattered into a tile of
+  # the refined mesh, so each cell needs about twice its refined size
+  # in addition to the coefficients
+  cellBytes = numComps*(2*int(np.prod(numInterp)) + numBasis)*dtype.itemsize
+  steps = _chunkSteps(numCells, axes, cellBytes, chunkMem)
+  for lo in itertools.product(*[range(0, c, s) for c, s in zip(numCells, steps)]):
+    src = tuple(slice(l, min(l+s, c)) for l, s, c in zip(lo, steps, numCells))
+    dst = tuple(slice(sl.start*n, sl.stop*n) for sl, n in zip(src, numInterp))
+    qOut[dst] = _interpOnMesh(cMat, qIn[src], nInterpIn, basis_type,
+                              comps=True, factors=factors)
+  #end
+  qOut.flush()
+  return qOut
+#end
+
+def _compList(comp):
+  # Converts the 'comp' argument of the interpolate methods to a list
+  if isinstance(comp, (int, np.integer)):
+    return [int(comp)]
+  elif isinstance(comp, slice):
+    return list(range(comp.start, comp.stop))
   #end
-  return np.array(qOut)
+  return list(comp)
 #end
 
 
@@ -231,28 +359,46 @@ class GInterp(object):
     self.gridType = data.get_gridType()
   #end
 
+  # The _getRaw methods return the expansion coefficients with the
+  # shape (cells..., basis) for an integer 'component' and (cells...,
+  # components, basis) for a list of components; no copies are made
+  # for a single component or a contiguous range.
   def _getRawNodal(self, component):
     q = self.data.get_values()
-    numEqns = self.numEqns
+    numEqns = int(self.numEqns)
     shp = [q.shape[i] for i in range(self.numDims)]
-    shp.append(self.numNodes)
-    rawData = np.zeros(shp, np.float64)
-    for n in range(self.numNodes):
-      rawData[..., n] = q[..., int(component+n*numEqns)]
+    # The nodal values of the components are interleaved
+    rawData = q.reshape(shp + [self.numNodes, numEqns])
+    if isinstance(component, (int, np.integer)):
+      return rawData[..., int(component)]
     #end
-    return rawData
+    return np.swapaxes(rawData[..., self._compIndex(component)], -1, -2)
   #end
 
   def _getRawModal(self, component):
     q = self.data.get_values()
-    numEqns = self.numEqns
-    shp = [q.shape[i] for i in range(self.numDims)]
-    shp.append(self.numNodes)
-    rawData = np.zeros(shp, np.float64)
-    lo = int(component*self.numNodes)
-    up = int(lo+self.numNodes)
-    rawData = q[..., lo:up]
-    return rawData
+    numNodes = self.numNodes
+    if isinstance(component, (int, np.integer)):
+      lo = int(component*numNodes)
+      return q[..., lo:lo+numNodes]
+    #end
+    idx = self._compIndex(component)
+    if isinstance(idx, slice):
+      shp = [q.shape[i] for i in range(self.numDims)]
+      rawData = q[..., idx.start*numNodes:idx.stop*numNodes]
+      return rawData.reshape(shp + [idx.stop-idx.start, numNodes])
+    #end
+    return np.stack([q[..., c*numNodes:(c+1)*numNodes] for c in idx], axis=-2)
+  #end
+
+  def _compIndex(self, components):
+    # Contiguous ranges are sliced to get views
+    components = [int(c) for c in components]
+    lo = components[0]
+    if components == list(range(lo, lo+len(components))):
+      return slice(lo, lo+len(components))
+    #end
+    return components
   #end
 #end
 
@@ -304,28 +450,9 @@ class GInterpNodal(GInterp):
     #end
     cMat = _loadInterpMatrix(self.numDims, self.poly_order,
                              self.basis_type, self.numInterp, self.read, False)
-    if isinstance(comp, int):
-      q = self._getRawNodal(comp)
-      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis]
-    elif isinstance(comp, tuple):
-      q = self._getRawNodal(comp[0])
-      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis]
-      for c in comp[1:]:
-        q = self._getRawNodal(c)
-        values = np.append(values,
-                           _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis],
-                           axis=-1)
-      #end
-    elif isinstance(comp, slice):
-      q = self._getRawNodal(comp.start)
-      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis]
-      for c in range(comp.start+1, comp.stop):
-        q = self._getRawNodal(c)
-        values = np.append(values,
-                           _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis],
-                           axis=-1)
-      #end
-    #end
+    # All the components are interpolated at once
+    q = self._getRawNodal(_compList(comp))
+    values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type, comps=True)
 
     nInterp = [int(round(cMat.shape[0] ** (1.0/self.numDims)))]*self.numDims
     grid = _make1Dgrids(nInterp, self.Xc, self.numDims)
@@ -440,45 +567,53 @@ class GInterpModal(GInterp):
     GInterp.__init__(self, data, numNodes)
   #end
 
-  def interpolate(self, comp=0, overwrite=False, stack=False):
+  def interpolate(self, comp=0, overwrite=False, stack=False,
+                  chunk_mem=None, chunk_axes=None, out_file=None):
+    """Interpolates the expansion onto the refined uniform mesh.
+
+    With 'chunk_mem' (bytes) or 'out_file', the values are computed in
+    tiles and written into a memory-mapped array, so frames larger
+    than the memory can be interpolated. The tiles are split along
+    'chunk_axes', by default the configuration space directions, and
+    need at most about 'chunk_mem' bytes unless a single slice along
+    these axes is larger. The values are stored in the .npy file
+    'out_file', or in an anonymous temporary file in TMPDIR.
+    """
     if stack:
       overwrite = stack
       print("Deprecation warning: The 'stack' parameter is going to be replaced with 'overwrite'")
     #end
     cMat = _loadInterpMatrix(self.numDims, self.poly_order,
                              self.basis_type, self.numInterp, self.read, True)
-    if isinstance(comp, int):
-      q = self._getRawModal(comp)
-      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis]
-    elif isinstance(comp, tuple):
-      q = self._getRawModal(comp[0])
-      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis]
-      for c in comp[1:]:
-        q = self._getRawModal(c)
-        values = np.append(values,
-                           _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis],
-                           axis=-1)
-      #end
-    elif isinstance(comp, slice):
-      q = self._getRawModal(comp.start)
-      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis]
-      for c in range(comp.start+1, comp.stop):
-        q = self._getRawModal(c)
-        values = np.append(values,
-                           _interpOnMesh(cMat, q, self.numInterp, self.basis_type)[..., np.newaxis],
-                           axis=-1)
+    factors = _loadInterpFactors(self.numDims, self.poly_order,
+                                 self.basis_type, self.numInterp, self.read)
+    # All the components are interpolated at once
+    q = self._getRawModal(_compList(comp))
+    if chunk_mem is None and out_file is None:
+      values = _interpOnMesh(cMat, q, self.numInterp, self.basis_type,
+                             comps=True, factors=factors)
+    else:
+      if chunk_axes is None:
+        num_cdim = self.data.ctx['num_cdim']
+        chunk_axes = range(num_cdim if num_cdim else self.numDims)
       #end
+      values = _interpChunked(cMat, q, self.numInterp, self.basis_type,
+                              factors, [a % self.numDims for a in chunk_axes],
+                              chunk_mem, out_file)
     #end
     if self.data.ctx['grid_type'] == 'c2p':
       q = self.data.get_grid()
-      num_comp = q[0].shape[-1]
-      basis, poly_order = _get_basis_p(self.numDims, num_comp)
-      cMat = _loadInterpMatrix(self.numDims, poly_order,
-                               basis, self.numInterp, self.read, True, True)
-      grid = []
-      for d in range(self.numDims):
-        grid.append(_interpOnMesh(cMat, q[d], self.numInterp+1, basis, True))
+      def interp_grid():
+        num_comp = q[0].shape[-1]
+        basis, poly_order = _get_basis_p(self.numDims, num_comp)
+        cMat = _loadInterpMatrix(self.numDims, poly_order,
+                                 basis, self.numInterp, self.read, True, True)
+        return [_interpOnMesh(cMat, q[d], self.numInterp+1, basis, True)
+                for d in range(self.numDims)]
       #end
+      # Frames sharing a cached mapping share the interpolated grid too
+      grid = list(derived_geometry(q, ('interpolate', self.numInterp),
+                                   interp_grid))
     else:
       if self.basis_type == "gkhybrid":
         # 1x1v, 1x2v, 2x2v, 3x2v cases, with p=2 in the first velocity dim.
@@ -499,9 +634,15 @@ class GInterpModal(GInterp):
         num_comp = q[-1].shape[-1]
         basis, poly_order = _get_basis_p(1, num_comp)
         for d in range(num_vdim):
-          cMat = _loadInterpMatrix(1, poly_order,
-                                   basis, nInterp[num_cdim+d], self.read, True, True)
-          grid[num_cdim+d] = _interpOnMesh(cMat, q[num_cdim+d], nInterp[num_cdim+d]+1, basis, True)
+          n = nInterp[num_cdim+d]
+          qd = q[num_cdim+d]
+          def interp_grid():
+            cMat = _loadInterpMatrix(1, poly_order,
+                                     basis, n, self.read, True, True)
+            return _interpOnMesh(cMat, qd, n+1, basis, True)
+          #end
+          grid[num_cdim+d] = derived_geometry([qd], ('interpolate', n),
+                                              interp_grid)
         #end
       #end
     #end
@@ -516,14 +657,16 @@ class GInterpModal(GInterp):
   def interpolateGrid(self, overwrite=False):
     if self.data.ctx['grid_type'] == 'c2p':
       q = self.data.get_grid()
-      num_comp = q[0].shape[-1]
-      basis, poly_order = _get_basis_p(self.numDims, num_comp)
-      cMat = _loadInterpMatrix(self.numDims, poly_order,
-                               basis, self.numInterp, self.read, True, True)
-      grid = []
-      for d in range(self.numDims):
-        grid.append(_interpOnMesh(cMat, q[d], self.numInterp, self.basis_type, True))
+      def interp_grid():
+        num_comp = q[0].shape[-1]
+        basis, poly_order = _get_basis_p(self.numDims, num_comp)
+        cMat = _loadInterpMatrix(self.numDims, poly_order,
+                                 basis, self.numInterp, self.read, True, True)
+        return [_interpOnMesh(cMat, q[d], self.numInterp, self.basis_type, True)
+                for d in range(self.numDims)]
       #end
+      grid = list(derived_geometry(
+        q, ('interpolateGrid', self.numInterp, self.basis_type), interp_grid))
     elif self.data.ctx['grid_type'] == 'c2p_vel':
       q = self.data.get_grid()
     else:
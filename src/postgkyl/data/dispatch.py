@@ -0,0 +1,108 @@
+import os.path
+
+# Selection of the reader based on the first bytes of a file instead of
+# trying to open it with each of the readers.
+
+_GKYL_MAGIC = b'gkyl0'
+_HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+# ADIOS1/BP3 files end with a mini footer with the offsets of the three
+# indices followed by 4 bytes ending with the format version
+_BP_FOOTER_SIZE = 28
+
+# Reader names which worked for the previous files with the same
+# directory and extension
+_reader_cache = {}
+
+def _cache_key(file_name: str) -> tuple:
+  return (os.path.dirname(os.path.abspath(file_name)),
+          os.path.splitext(file_name)[1])
+#end
+
+def _is_bp(fh, size: int) -> bool:
+  if size < _BP_FOOTER_SIZE:
+    return False
+  #end
+  fh.seek(size - _BP_FOOTER_SIZE)
+  footer = fh.read(_BP_FOOTER_SIZE)
+  offsets = [int.from_bytes(footer[i:i+8], 'little') for i in (0, 8, 16)]
+  version = footer[-1] & 0x7f
+  return (version in (1, 2, 3) and
+          offsets[0] <= offsets[1] <= offsets[2] < size - _BP_FOOTER_SIZE)
+#end
+
+def _is_hdf5(fh, size: int) -> bool:
+  # The signature is either at the beginning or after a user block of
+  # 512, 1024, 2048, ... bytes
+  pos = 0
+  while pos + len(_HDF5_SIGNATURE) <= size:
+    fh.seek(pos)
+    if fh.read(len(_HDF5_SIGNATURE)) == _HDF5_SIGNATURE:
+      return True
+    #end
+    pos = 512 if pos == 0 else 2*pos
+  #end
+  return False
+#end
+
+def _sniff_hdf5(file_name: str) -> str:
+  # Gkeyll and FLASH both use HDF5; they differ in the layout
+  import tables
+  try:
+    with tables.open_file(file_name, 'r') as fh:
+      if 'coordinates' in fh.root:
+        return 'flash'
+      #end
+      if 'pgkyl_frame_cube' in fh.root._v_attrs:
+        return 'cube'
+      #end
+    #end
+  except Exception:
+    return None
+  #end
+  return 'h5'
+#end
+
+def sniff_reader(file_name: str) -> str:
+  """Identifies the reader for a file from its magic bytes.
+
+  Returns:
+    One of 'gkyl', 'adios', 'h5', 'flash', 'cube', or None when the format
+    was not recognized.
+  """
+  if os.path.isdir(file_name):
+    return 'adios' # BP4 and BP5 outputs are directories
+  #end
+  try:
+    with open(file_name, 'rb') as fh:
+      size = os.fstat(fh.fileno()).st_size
+      head = fh.read(len(_HDF5_SIGNATURE))
+      if head.startswith(_GKYL_MAGIC):
+        return 'gkyl'
+      #end
+      if _is_hdf5(fh, size):
+        return _sniff_hdf5(file_name)
+      #end
+      if _is_bp(fh, size):
+        return 'adios'
+      #end
+    #end
+  except OSError:
+    return None
+  #end
+  return None
+#end
+
+def guess_reader(file_name: str) -> str:
+  """Returns the reader which worked for the previous files with the
+  same directory and extension, or sniffs the file.
+  """
+  key = _cache_key(file_name)
+  if key in _reader_cache:
+    return _reader_cache[key]
+  #end
+  return sniff_reader(file_name)
+#end
+
+def remember_reader(file_name: str, reader_name: str) -> None:
+  _reader_cache[_cache_key(file_name)] = reader_name
+#end
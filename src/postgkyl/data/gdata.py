@@ -3,9 +3,14 @@ import shutil
 from typing import Union
 
 from postgkyl.data.read_gkyl import Read_gkyl
-from postgkyl.data.read_gkyl_adios import Read_gkyl_adios
+from postgkyl.data.read_gkyl_adios import Read_gkyl_adios, adios_file, adios_pool
 from postgkyl.data.read_gkyl_h5 import Read_gkyl_h5
 from postgkyl.data.read_flash_h5 import Read_flash_h5
+from postgkyl.data.read_frame_cube import Read_frame_cube
+from postgkyl.data.dispatch import guess_reader, remember_reader
+from postgkyl.data.write_frame_cube import write_frame_cube
+from postgkyl.data.write_gkyl import write_gkyl
+from postgkyl.data.write_txt import write_txt
 
 class GData(object):
   """Provides interface to Gkeyll output data.
@@ -43,6 +48,15 @@ class GData(object):
                mapc2p_vel_name: str = '',
                reader_name: str = '',
                load: bool = True,
+               lazy: bool = True,
+               mmap: bool = False,
+               num_threads: int = 1,
+               record: dict = None,
+               tmin: float = None,
+               tmax: float = None,
+               chunk_cache_size: int = None,
+               frame_index: int = None,
+               dtype: str = None,
                click_mode: bool = False) -> None:
     """Initializes the Data class with a Gkeyll output file.
 
@@ -53,10 +67,12 @@ class GData(object):
         class.
       comp: int or 'int:int'
         Load only the specified component index or a slice of
-        idices. Supported only for the ADIOS 'bp' files.
+        idices. Supported for the ADIOS 'bp', 'h5', and the 'gkyl'
+        files.
       z0 - z5: int or 'int:int'
         Load only the specified  index or a slice of
-        idices in a direction. Supported only for the ADIOS 'bp' files.
+        idices in a direction. Supported for the ADIOS 'bp', 'h5', and
+        the 'gkyl' files.
       var_name: str
         Specify custom ADIOS variable name (default is 'CartGridField').
       tag: str
@@ -69,9 +85,45 @@ class GData(object):
         A flag to ignore grid mapping.
       mapc2p_name: str
         The name of the file containg the c2p mapping information.
+      load: bool
+        Read the values immediately. Otherwise, the values are read
+        on the first call of get_values() or get_grid().
+      lazy: bool
+        Read the values on demand when they are not loaded yet, and
+        allow them to be unloaded (see unload). With neither 'load'
+        nor 'lazy', only the header is read and the values stay None.
+      mmap: bool
+        Back the values with a read-only memory map of the file
+        instead of reading the whole payload into memory. Supported
+        only for the 'gkyl' files.
+      num_threads: int
+        Number of threads used to read the individual ranges of
+        multi-range 'gkyl' files.
+      record: dict
+        Catalog record of the file (see postgkyl.data.Catalog); the
+        header is taken from the record instead of the file.
+      tmin, tmax: float
+        Load only the part of a time series (diagnostic) within the
+        time window. Supported for the ADIOS 'bp', 'h5', and the
+        'gkyl' files.
+      chunk_cache_size: int
+        Size of the HDF5 chunk cache in bytes used for the 'h5'
+        files.
+      frame_index: int
+        Load only this frame of a frame cube; by default, all the
+        frames are collected into one dataset.
+      dtype: str
+        Real type of the values, e.g., 'float32'. By default, the
+        type stored in the file is kept.
     """
     self._grid = None
     self._values = None # (N+1)D narray of values
+    self._reader = None
+    self._preloaded = False
+    self._dirty = False # values were modified and cannot be reread
+    self._lazy = lazy # values can be read on demand
+    self._on_access = None # memory use tracking (see DataSpace)
+    self._dtype = np.dtype(dtype) if dtype else None
 
 
     self.ctx = {}
@@ -117,7 +169,8 @@ class GData(object):
       'gkyl' : Read_gkyl,
       'adios' : Read_gkyl_adios,
       'h5' : Read_gkyl_h5,
-      'flash' : Read_flash_h5
+      'flash' : Read_flash_h5,
+      'cube' : Read_frame_cube
       }
     if self._file_name != '':
       reader_set = False
@@ -126,29 +179,50 @@ class GData(object):
         reader = _readers[reader_name]
         _readers.clear()
         _readers[reader_name] = reader
-      #end
-      for key in _readers:
-        self._reader = _readers[key](
-          file_name = self._file_name,
-          ctx = self.ctx,
-          var_name = var_name,
-          c2p = mapc2p_name,
-          c2p_vel = mapc2p_vel_name,
-          axes = zs,
-          comp = comp,
-          click_mode = click_mode)
-        if self._reader._is_compatible():
-          reader_set = True
-          break
+      else:
+        # Try the likely reader first to avoid opening the file with
+        # each of the backends; the others remain as a fallback
+        guess = guess_reader(self._file_name)
+        if guess in _readers:
+          _readers = {guess : _readers[guess],
+                      **{k : v for k, v in _readers.items() if k != guess}}
         #end
       #end
-      if not reader_set:
-        raise NameError('"file_name" was specified ({:s}) but cannot be read with {}'.format(self._file_name, list(_readers)))
-      #end
+      # ADIOS files are opened only once for the detection, preload,
+      # and load
+      with adios_pool():
+        for key in _readers:
+          self._reader = _readers[key](
+            file_name = self._file_name,
+            ctx = self.ctx,
+            var_name = var_name,
+            c2p = mapc2p_name,
+            c2p_vel = mapc2p_vel_name,
+            axes = zs,
+            comp = comp,
+            mmap = mmap,
+            num_threads = num_threads,
+            record = record,
+            tmin = tmin,
+            tmax = tmax,
+            chunk_cache_size = chunk_cache_size,
+            frame_index = frame_index,
+            click_mode = click_mode)
+          if self._reader._is_compatible():
+            reader_set = True
+            remember_reader(self._file_name, key)
+            break
+          #end
+        #end
+        if not reader_set:
+          raise NameError('"file_name" was specified ({:s}) but cannot be read with {}'.format(self._file_name, list(_readers)))
+        #end
 
-      self._reader.preload()
-      if load:
-        self._grid, self._values = self._reader.load()
+        self._reader.preload()
+        self._preloaded = True
+        if load:
+          self._materialize()
+        #end
       #end
     #end
   #end
@@ -189,14 +263,99 @@ class GData(object):
   #end
 
   def get_input_file(self):
-    import adios2
-    fh = adios2.open(self._file_name, 'rra')
-    inputFile = fh.read_attribute_string('inputfile')[0]
-    fh.close()
+    with adios_file(self._file_name) as fh:
+      inputFile = fh.read_attribute_string('inputfile')[0]
+    #end
     return inputFile
   #end
 
 
+  def follow(self) -> bool:
+    """Reads data appended to the file since it was loaded.
+
+    Currently supported only for the 'gkyl' dynvector files, which
+    are appended to during a simulation.
+
+    Returns:
+      True when new data were found
+    """
+    if not hasattr(self._reader, 'follow'):
+      raise TypeError('Following is not supported for {:s}'.format(self._file_name))
+    #end
+    self._materialize() # the reader follows from the loaded data
+    grid, values = self._reader.follow()
+    if values is None:
+      return False
+    #end
+    self.push(grid, values)
+    return True
+  #end
+
+  #---- Lazy loading ---------------------------------------------------
+  def _materialize(self) -> None:
+    # Reads the values from the file unless they are already in memory
+    if self._values is None and self._reader is not None and self._lazy:
+      if not self._preloaded:
+        # The readers adjust their state during the load (e.g. cuts);
+        # the header needs to be read again before rereading
+        self._reader.preload()
+      #end
+      self._grid, self._values = self._reader.load()
+      self._preloaded = False
+      if self._dtype is not None and self._values.dtype != self._dtype:
+        self._values = self._values.astype(self._dtype)
+      #end
+    #end
+    if self._on_access is not None:
+      # Under a memory budget, the values read from the file can be
+      # unloaded and read again at any time, so in-place edits would
+      # be silently lost; the modified values need to be passed to
+      # set_values instead
+      if not self._dirty and self._values is not None:
+        self._values.setflags(write=False)
+      #end
+      self._on_access(self)
+    #end
+  #end
+
+  def is_loaded(self) -> bool:
+    return self._values is not None
+  #end
+
+  def is_dirty(self) -> bool:
+    return self._dirty
+  #end
+
+  def get_nbytes(self) -> int:
+    nbytes = 0
+    if self._values is not None:
+      nbytes += self._values.nbytes
+    #end
+    if self._grid is not None:
+      for g in self._grid:
+        nbytes += np.asarray(g).nbytes
+      #end
+    #end
+    return nbytes
+  #end
+
+  def unload(self) -> int:
+    """Frees the values and grid of a dataset which was not modified
+    since it was read (see set_values); they are read again on the
+    next access.
+
+    Returns:
+      The number of freed bytes
+    """
+    if (self._dirty or not self._lazy or self._reader is None
+        or self._values is None):
+      return 0
+    #end
+    nbytes = self.get_nbytes()
+    self._grid, self._values = None, None
+    return nbytes
+  #end
+
   def get_num_cells(self) -> np.ndarray:
     if self.ctx['cells'] is not None:
       return self.ctx['cells']
@@ -258,6 +417,7 @@ class GData(object):
   #end
 
   def get_grid(self) -> list:
+    self._materialize()
     return self._grid
   #end
 
@@ -266,12 +426,14 @@ class GData(object):
   #end
 
   def get_values(self) -> np.ndarray:
+    self._materialize()
     return self._values
   #end
 
 
   def set_grid(self, grid) -> None:
     self._grid = grid
+    self._dirty = True
     num_dims = self.get_num_dims()
     lo, up = np.zeros(num_dims), np.zeros(num_dims)
     for d in range(num_dims):
@@ -284,6 +446,7 @@ class GData(object):
 
   def set_values(self, values) -> None:
     self._values = values
+    self._dirty = True
     if not np.array_equal(values.shape[:-1], self.ctx['cells']):
       self.ctx['cells'] = values.shape[:-1]
     #end
@@ -400,8 +563,15 @@ class GData(object):
             var_name: str = None,
             bufferSize: int = 1000,
             append = False,
-            cleaning = True):
-    """Writes data in ADIOS .bp file, ASCII .txt file, or NumPy .npy file
+            cleaning = True,
+            num_ranges: int = 1):
+    """Writes data in ADIOS .bp file, ASCII .txt file, NumPy .npy
+    file, or compressed HDF5 frame cube (.cube)
+
+    The 'gkyl' files are streamed without copying the values; with
+    'num_ranges' larger than 1, they are written in the multi-range
+    layout split along the first dimension. Single precision values
+    are written in single precision.
     """
     # Create output file name
     if out_name is None:
@@ -433,9 +603,6 @@ class GData(object):
       var_name = self._var_name
     #end
 
-    values = np.empty_like(self.get_values())
-    values[...] = self.get_values()
-
     if mode == 'bp':
       import adios2
       if not append:
@@ -450,7 +617,8 @@ class GData(object):
       else:
         fh = adios2.open(out_name, "a", engine_type="BP3")
       #end
-      fh.write(var_name, values, full_shape, offset, full_shape)
+      fh.write(var_name, np.ascontiguousarray(values),
+               full_shape, offset, full_shape)
       fh.close()
 
       # Cleaning
@@ -464,71 +632,15 @@ class GData(object):
         shutil.rmtree(out_name + '.dir')
       #end
     elif mode == 'gkyl':
-      dti = np.dtype('i8')
-      dtf = np.dtype('f8')
-
-      fh = open(out_name, 'w')
-
-      # sep='' results in a binary file
-      np.array([103, 107, 121, 108, 48],
-               dtype=np.dtype('b')).tofile(fh, sep='')
-      # version 1
-      np.array([1], dtype=dti).tofile(fh, sep='')
-      # type 1
-      np.array([1], dtype=dti).tofile(fh, sep='')
-      # meta size
-      np.array([0], dtype=dti).tofile(fh, sep='')
-      # real type (double)
-      np.array([2], dtype=dti).tofile(fh, sep='')
-      # num dims
-      np.array([num_dims], dtype=dti).tofile(fh, sep='')
-      # num cells
-      np.array(num_cells, dtype=dti).tofile(fh, sep='')
-      # lower
-      np.array(lo, dtype=dtf).tofile(fh, sep='')
-      # upper
-      np.array(up, dtype=dtf).tofile(fh, sep='')
-      # elem_sz
-      np.array([num_comps*8], dtype=dti).tofile(fh, sep='')
-      # asize
-      np.array([len(values)], dtype=dti).tofile(fh, sep='')
-      # data
-      np.array(values, dtype=dtf).tofile(fh, sep='')
-
-      fh.close()
+      # Single precision data are written as such
+      dtype = 'f4' if values.dtype == np.float32 else 'f8'
+      write_gkyl(out_name, values, lo, up, dtype=dtype, num_ranges=num_ranges)
     elif mode == 'txt':
-      numRows = int(num_cells.prod())
-      grid = self.get_grid()
-      for d in range(num_dims):
-        grid[d] = 0.5*(grid[d][1:]+grid[d][:-1])
-      #end
-
-      basis = np.full(num_dims, 1.0)
-      for d in range(num_dims-1):
-        basis[d] = num_cells[(d+1):].prod()
-      #end
-
-      fh = open(out_name, 'w')
-      for i in range(numRows):
-        idx = i
-        idxs = np.zeros(num_dims, np.int32)
-        for d in range(num_dims):
-          idxs[d] = int(idx // basis[d])
-          idx = idx % basis[d]
-        #end
-        line = ''
-        for d in range(num_dims):
-          line += '{:.15e}, '.format(grid[d][idxs[d]])
-        #end
-        for c in range(num_comps-1):
-          line += '{:.15e}, '.format(values[tuple(idxs)][c])
-        #end
-        line += '{:.15e}\n'.format(values[tuple(idxs)][num_comps-1])
-        fh.write(line)
-      #end
-      fh.close()
+      write_txt(out_name, self.get_grid(), values)
     elif mode == 'npy':
       np.save(out_name, values.squeeze())
+    elif mode == 'cube':
+      write_frame_cube(out_name, self, append=append)
     #end
   #end
 #end
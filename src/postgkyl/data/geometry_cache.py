@@ -0,0 +1,75 @@
+import numpy as np
+import os.path
+
+# Process-wide cache of the coordinate mappings (c2p and c2p_vel
+# files). All the frames using the same mapping share the same
+# read-only grid arrays instead of reading and storing their own
+# copies.
+
+_geometry = {} # (path, mtime, size, params) -> value
+_owner = {} # id of a cached array -> key of the geometry it belongs to
+_derived = {} # (geometry key, params) -> value computed from geometry
+
+def _arrays(value) -> list:
+  if isinstance(value, np.ndarray):
+    return [value]
+  elif isinstance(value, (list, tuple)):
+    return [a for v in value for a in _arrays(v)]
+  #end
+  return []
+#end
+
+def _freeze(value, key) -> None:
+  for arr in _arrays(value):
+    arr.flags.writeable = False
+    _owner[id(arr)] = key
+  #end
+#end
+
+def load_geometry(file_name: str, params: tuple, loader):
+  """Returns the mapping stored in 'file_name', calling 'loader' only
+  when it is not cached yet.
+
+  Args:
+    file_name: str
+      The mapping file; its modification time is part of the key so
+      rewritten files are read again.
+    params: tuple
+      Everything else the result depends on (e.g. the partial load
+      cuts).
+    loader: callable
+      Reads the mapping; the arrays in the result are made read-only.
+  """
+  stat = os.stat(file_name)
+  key = (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size, params)
+  if key not in _geometry:
+    value = loader()
+    _freeze(value, key)
+    _geometry[key] = value
+  #end
+  return _geometry[key]
+#end
+
+def derived_geometry(arrays: list, params: tuple, compute):
+  """Memoizes a quantity computed from cached mapping arrays (e.g. the
+  interpolated nodal grid). When 'arrays' do not come from the cache,
+  'compute' is simply called.
+  """
+  keys = set(_owner.get(id(a)) for a in arrays)
+  if len(keys) != 1 or None in keys:
+    return compute()
+  #end
+  key = (keys.pop(), params)
+  if key not in _derived:
+    value = compute()
+    _freeze(value, key)
+    _derived[key] = value
+  #end
+  return _derived[key]
+#end
+
+def clear_geometry_cache() -> None:
+  _geometry.clear()
+  _owner.clear()
+  _derived.clear()
+#end
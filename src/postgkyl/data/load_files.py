@@ -0,0 +1,101 @@
+import tables
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+from postgkyl.data.gdata import GData
+from postgkyl.data.read_gkyl_adios import adios_pool
+
+def _load_file(file_name: str, record: dict, var_names: list,
+               kwargs: dict) -> list:
+  if var_names is None:
+    return [GData(file_name=file_name, record=record, **kwargs)]
+  #end
+  # All the variables are read from a single open ADIOS file
+  with adios_pool():
+    return [GData(file_name=file_name, record=record, var_name=var,
+                  **kwargs)
+            for var in var_names]
+  #end
+#end
+
+def _flatten(per_file: list) -> list:
+  # Variable-major order, i.e., all the files for the first variable
+  # followed by all the files for the second one, etc.
+  num_vars = len(per_file[0]) if per_file else 0
+  return [datasets[v] for v in range(num_vars) for datasets in per_file]
+#end
+
+def load_files(files: list,
+               jobs: int = 1,
+               use_processes: bool = False,
+               records: dict = None,
+               var_names: list = None,
+               **kwargs) -> list:
+  """Loads multiple files concurrently.
+
+  Args:
+    files: list of str
+      The names of the files to load.
+    jobs: int
+      Number of files loaded at the same time.
+    use_processes: bool
+      Use a process pool instead of a thread pool. Threads are
+      sufficient when the load is dominated by the I/O; processes help
+      with the CPU-heavy readers.
+    records: dict
+      Catalog records (see postgkyl.data.Catalog) keyed by the file
+      names.
+    var_names: list of str
+      Load each of the variables from each file; the result is
+      ordered by the variables first.
+    **kwargs:
+      Passed to each GData (e.g. 'comp', 'z0', 'var_name').
+
+  Returns:
+    List of GData in the order of 'files'
+
+  Examples:
+    import postgkyl
+    data = postgkyl.data.load_files(files, jobs=8, comp=0)
+  """
+  if records is None:
+    records = {}
+  #end
+  if jobs <= 1 or len(files) <= 1:
+    per_file = [_load_file(fn, records.get(fn), var_names, kwargs)
+                for fn in files]
+    return _flatten(per_file)
+  #end
+  if use_processes:
+    # Prompting is not possible from the worker processes
+    kwargs['click_mode'] = False
+    executor = ProcessPoolExecutor(max_workers=jobs)
+  else:
+    executor = ThreadPoolExecutor(max_workers=jobs)
+  #end
+  with executor:
+    futures = [executor.submit(_load_file, fn, records.get(fn),
+                               var_names, kwargs)
+               for fn in files]
+    # The results are collected in the submission order so they do
+    # not depend on which file happened to finish first
+    return _flatten([f.result() for f in futures])
+  #end
+#end
+
+def load_frame_cube(file_name: str, **kwargs) -> list:
+  """Loads a frame cube (see write_frame_cube) as a sequence of frames.
+
+  The frames are not read until their values are accessed; use
+  GData(file_name) to load all the frames as one collected dataset.
+
+  Returns:
+    List of GData, one for each frame
+  """
+  with tables.open_file(file_name, 'r') as fh:
+    num_frames = fh.root.values.shape[0]
+  #end
+  kwargs.setdefault('load', False)
+  return [GData(file_name=file_name, frame_index=i, **kwargs)
+          for i in range(num_frames)]
+#end
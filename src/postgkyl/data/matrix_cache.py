@@ -0,0 +1,124 @@
+import numpy as np
+import os
+import os.path
+import tempfile
+
+# Cache of the DG interpolation and derivative matrices. Building the
+# matrices symbolically takes from seconds to minutes in high
+# dimensions, so they are computed only once: they are kept in memory
+# for the lifetime of the process and stored on disk for the next
+# runs. The on-disk cache lives in '~/.cache/postgkyl' (or
+# '$XDG_CACHE_HOME/postgkyl'); the location can be changed with the
+# PGKYL_CACHE_DIR environment variable and an empty value disables it.
+
+# Bump when the matrix construction changes so the stale matrices are
+# not reused
+CACHE_VERSION = 2
+
+_memo = {} # (kind, params) -> read-only matrix
+
+def get_cache_dir() -> str:
+  """Returns the directory of the on-disk matrix cache or None when
+  the cache is disabled.
+  """
+  if 'PGKYL_CACHE_DIR' in os.environ:
+    root = os.environ['PGKYL_CACHE_DIR']
+    if not root:
+      return None
+    #end
+  else:
+    root = os.environ.get('XDG_CACHE_HOME',
+                          os.path.join(os.path.expanduser('~'), '.cache'))
+    root = os.path.join(root, 'postgkyl')
+  #end
+  return os.path.join(root, 'matrices_v{:d}'.format(CACHE_VERSION))
+#end
+
+def _file_name(directory: str, kind: str, params: tuple) -> str:
+  return os.path.join(directory, '{:s}_{:s}.npy'.format(
+    kind, '_'.join(str(p) for p in params)))
+#end
+
+def _read(fn: str) -> np.ndarray:
+  try:
+    return np.load(fn, allow_pickle=False)
+  except (OSError, ValueError):
+    return None # missing or corrupted entry
+  #end
+#end
+
+def _write(fn: str, mat: np.ndarray) -> None:
+  # The matrix is written into a temporary file first so concurrent
+  # processes never see a partial entry; a read-only or full cache
+  # directory is not an error
+  try:
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(fn), suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as fh:
+        np.save(fh, mat, allow_pickle=False)
+      #end
+      os.replace(tmp, fn)
+    except OSError:
+      os.remove(tmp)
+    #end
+  except OSError:
+    pass
+  #end
+#end
+
+def cached_matrix(kind: str, params: tuple, compute,
+                  persistent: bool = True) -> np.ndarray:
+  """Returns the matrix identified by 'kind' and 'params', calling
+  'compute' only when it is neither in memory nor on disk.
+
+  Args:
+    kind: str
+      Type of the matrix, e.g., 'interp' or 'deriv'.
+    params: tuple
+      Everything the matrix depends on, e.g., (dim, poly_order,
+      basis_type, interp, modal, c2p).
+    compute: callable
+      Builds the matrix.
+    persistent: bool
+      Store the matrix in the on-disk cache; otherwise, it is kept
+      only in memory (e.g. for the matrices read from the shipped
+      files).
+
+  Returns:
+    Read-only matrix shared by all the callers
+  """
+  key = (kind, params)
+  if key in _memo:
+    return _memo[key]
+  #end
+  directory = get_cache_dir() if persistent else None
+  mat = None
+  if directory is not None:
+    fn = _file_name(directory, kind, params)
+    mat = _read(fn)
+  #end
+  if mat is None:
+    mat = np.asarray(compute(), dtype=np.float64)
+    if directory is not None:
+      _write(fn, mat)
+    #end
+  #end
+  mat.flags.writeable = False
+  _memo[key] = mat
+  return mat
+#end
+
+def clear_matrix_cache(disk: bool = False) -> None:
+  """Empties the in-memory cache and, with 'disk', the on-disk one.
+  """
+  _memo.clear()
+  directory = get_cache_dir()
+  if disk and directory is not None and os.path.isdir(directory):
+    for fn in os.listdir(directory):
+      if fn.endswith('.npy'):
+        os.remove(os.path.join(directory, fn))
+      #end
+    #end
+  #end
+#end
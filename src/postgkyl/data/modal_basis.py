@@ -0,0 +1,275 @@
+import itertools
+import numpy as np
+
+from postgkyl.utils import real_type
+
+# Numerical construction of the modal DG bases used by Gkeyll. All the
+# supported bases are products of the 1D orthonormal Legendre
+# polynomials on [-1, 1]; a basis is therefore fully described by the
+# exponents (polynomial orders) of its functions in each direction.
+# Evaluating the basis at a set of nodes is then a product of small
+# 1D tables instead of a symbolic substitution for each entry.
+
+def _vpar_dir(dim: int, basis_type: str) -> int:
+  # Direction with the second order polynomials in the hybrid bases
+  if basis_type == 'gkhybrid':
+    # 1x1v, 1x2v, 2x2v, 3x2v cases, with p=2 in the first velocity dim.
+    return {2 : 1, 3 : 1, 4 : 2, 5 : 3}.get(dim)
+  elif basis_type == 'hybrid':
+    return dim-1
+  #end
+  return None
+#end
+
+def legendre(poly_order: int, x: np.ndarray, deriv: bool = False) -> np.ndarray:
+  """Evaluates the orthonormal Legendre polynomials.
+
+  Args:
+    poly_order: int
+      The highest polynomial order.
+    x: narray
+      Points in [-1, 1].
+    deriv: bool
+      Evaluate the first derivatives instead.
+
+  Returns:
+    Array with the shape (len(x), poly_order+1)
+  """
+  x = np.asarray(x, dtype=np.float64)
+  p = np.zeros((len(x), poly_order+1))
+  dp = np.zeros((len(x), poly_order+1))
+  p[:, 0] = 1.0
+  if poly_order > 0:
+    p[:, 1] = x
+    dp[:, 1] = 1.0
+  #end
+  # Bonnet's recursion and P'_{n+1} = P'_{n-1} + (2n+1) P_n
+  for n in range(1, poly_order):
+    p[:, n+1] = ((2*n+1)*x*p[:, n] - n*p[:, n-1]) / (n+1)
+    dp[:, n+1] = dp[:, n-1] + (2*n+1)*p[:, n]
+  #end
+  norm = np.sqrt((2*np.arange(poly_order+1)+1) / 2)
+  return (dp if deriv else p) * norm
+#end
+
+def basis_exponents(dim: int, poly_order: int, basis_type: str) -> np.ndarray:
+  """Returns the Legendre orders of the basis functions in the Gkeyll
+  ordering.
+
+  Args:
+    dim: int
+      Number of dimensions.
+    poly_order: int
+      Polynomial order of the basis.
+    basis_type: str
+      'serendipity', 'tensor', 'maximal-order', 'gkhybrid', or
+      'hybrid'.
+
+  Returns:
+    Integer array with the shape (num_basis, dim)
+  """
+  basis_type = basis_type.lower()
+  vpar = _vpar_dir(dim, basis_type) if dim > 1 else None
+  if basis_type in ('gkhybrid', 'hybrid') and dim > 1:
+    if vpar is None or poly_order != 1:
+      raise NameError("GInterp: Basis '{:s}' is supported only for p=1 and dimensions {}".format(basis_type, '2-5' if basis_type == 'gkhybrid' else '2+'))
+    #end
+    max_orders = [2 if d == vpar else 1 for d in range(dim)]
+  else:
+    max_orders = [poly_order]*dim
+  #end
+
+  exps = []
+  for e in itertools.product(*[range(m+1) for m in max_orders]):
+    if basis_type == 'serendipity' and dim > 1:
+      # The superlinear degree is bounded by the polynomial order
+      if sum(k for k in e if k > 1) > poly_order:
+        continue
+      #end
+    elif basis_type == 'maximal-order' and dim > 1:
+      if sum(e) > poly_order:
+        continue
+      #end
+    elif basis_type not in ('serendipity', 'maximal-order', 'tensor',
+                            'gkhybrid', 'hybrid'):
+      raise NameError("GInterp: Basis '{:s}' is not supported!".format(basis_type))
+    #end
+    exps.append(e)
+  #end
+
+  # The functions are ordered by the total degree, then by the sorted
+  # orders (e.g. x*y*z before x^2*y), and then colexicographically
+  # (x^2*y before x*y^2 before x^2*z); the hybrid bases start with
+  # the p=1 tensor basis followed by its products with the second
+  # order polynomial in the parallel velocity direction
+  def key(e):
+    hyb = e[vpar] > 1 if vpar is not None else False
+    return (hyb, sum(e), sorted(e, reverse=True), e[::-1])
+  #end
+  return np.array(sorted(exps, key=key), dtype=int).reshape(-1, dim)
+#end
+
+def basis_nodes(dim: int, basis_type: str, interp: int,
+                c2p: bool = False) -> list:
+  """Returns the nodes in each direction, in the order expected by
+  '_interpOnMesh'.
+
+  The nodes are the centers of 'interp' uniform subcells, or with
+  'c2p', the 'interp+1' subcell edges including the cell edges. The
+  parallel velocity direction of the hybrid bases has one more node.
+  """
+  vpar = _vpar_dir(dim, basis_type.lower())
+  nodes = []
+  for d in range(dim):
+    n = interp+1 if d == vpar else interp
+    if c2p:
+      nodes.append(np.linspace(-1.0, 1.0, n+1))
+    else:
+      nodes.append(-1.0*(n-1)/n + np.arange(n)*2.0/n)
+    #end
+  #end
+  return nodes
+#end
+
+def evaluate_basis(exps: np.ndarray, nodes: list,
+                   deriv: int = None) -> np.ndarray:
+  """Evaluates the basis functions on the tensor product of 1D nodes.
+
+  Args:
+    exps: narray
+      The Legendre orders of the basis functions (see
+      basis_exponents).
+    nodes: list of narrays
+      The nodes in each direction.
+    deriv: int
+      Evaluate the derivative with respect to this direction instead.
+
+  Returns:
+    Array with the shape (num_nodes, num_basis); the nodes are
+    ordered with the first direction running the fastest.
+  """
+  dim = len(nodes)
+  sizes = [len(n) for n in nodes]
+  # Node multi-indices; the first direction runs the fastest
+  idxs = np.indices(sizes).reshape(dim, -1, order='F')
+  mat = np.ones((idxs.shape[1], len(exps)))
+  for d in range(dim):
+    table = legendre(int(exps[:, d].max(initial=0)), nodes[d], deriv == d)
+    mat *= table[idxs[d][:, np.newaxis], exps[np.newaxis, :, d]]
+  #end
+  return mat
+#end
+
+def interp_matrix(dim: int, poly_order: int, basis_type: str, interp: int,
+                  c2p: bool = False) -> np.ndarray:
+  """Builds the matrix evaluating the modal expansion on the
+  interpolation nodes; the same as
+  computeInterpolationMatrices.createInterpMatrix with 'modal'.
+  """
+  exps = basis_exponents(dim, poly_order, basis_type)
+  return evaluate_basis(exps, basis_nodes(dim, basis_type, interp, c2p))
+#end
+
+def derivative_matrix(dim: int, poly_order: int, basis_type: str,
+                      interp: int) -> np.ndarray:
+  """Builds the matrix evaluating the derivatives of the modal
+  expansion on the interpolation nodes with the shape (num_nodes,
+  num_basis, dim); the same as
+  computeDerivativeMatrices.createDerivativeMatrix with 'modal'.
+  """
+  exps = basis_exponents(dim, poly_order, basis_type)
+  # The derivative matrices use the same number of nodes in all the
+  # directions
+  nodes = basis_nodes(dim, 'serendipity', interp)
+  return np.stack([evaluate_basis(exps, nodes, d) for d in range(dim)],
+                  axis=-1)
+#end
+
+def interp_factors(dim: int, poly_order: int, basis_type: str, interp: int,
+                   c2p: bool = False) -> tuple:
+  """Builds the 1D factors of the interpolation matrix for
+  apply_factors.
+
+  Returns:
+    The Legendre orders of the basis functions and the list of the 1D
+    evaluation matrices with the shapes (num_nodes, num_orders)
+  """
+  exps = basis_exponents(dim, poly_order, basis_type)
+  nodes = basis_nodes(dim, basis_type, interp, c2p)
+  ops = [legendre(int(exps[:, d].max(initial=0)), nodes[d])
+         for d in range(dim)]
+  return exps, ops
+#end
+
+def factored_cost(exps: np.ndarray, ops: list) -> tuple:
+  """Estimates the multiply-adds per cell of the full interpolation
+  matrix and of the sum factorization (see apply_factors).
+  """
+  orders = [op.shape[1] for op in ops]
+  nodes = [op.shape[0] for op in ops]
+  dense = int(np.prod(nodes)) * len(exps)
+  factored = 0
+  for d in reversed(range(len(ops))):
+    # Directions d+1, ... are already evaluated on the nodes
+    factored += (int(np.prod(orders[:d+1])) * int(np.prod(nodes[d+1:]))
+                 * nodes[d])
+  #end
+  return dense, factored
+#end
+
+def apply_factors(q: np.ndarray, exps: np.ndarray, ops: list,
+                  block_bytes: int = 2**18) -> np.ndarray:
+  """Evaluates modal expansions on the nodes with sum factorization.
+
+  The coefficients are embedded into the tensor product basis (the
+  functions missing in, e.g., the serendipity basis get zero
+  coefficients) and the 1D evaluation matrices are applied one
+  direction at a time. In D dimensions with n nodes and m orders per
+  direction, this costs about D*n*m^D operations per cell instead of
+  the n^D*num_basis of the full interpolation matrix.
+
+  Args:
+    q: narray
+      Expansion coefficients with the basis last.
+    exps, ops:
+      The factors from interp_factors.
+    block_bytes: int
+      The cells are processed in blocks with the intermediate arrays
+      of about this size so they stay in the cache.
+
+  Returns:
+    Array with the shape q.shape[:-1] + (n_{D-1}, ..., n_0), i.e.,
+    the nodes are ordered with the first direction running the
+    fastest like with the full matrix; the values are float32 for
+    float32 coefficients and float64 otherwise.
+  """
+  q = np.asarray(q, dtype=real_type(q))
+  dim = len(ops)
+  lead = q.shape[:-1]
+  num = int(np.prod(lead))
+  orders = [op.shape[1] for op in ops]
+  nodes = [op.shape[0] for op in ops]
+  opsT = [op.T.astype(q.dtype) for op in ops]
+  flat = np.ravel_multi_index(tuple(exps[:, ::-1].T), orders[::-1])
+  q = q.reshape(num, -1)
+  out = np.empty((num, int(np.prod(nodes))), q.dtype)
+
+  width = max(int(np.prod(orders)), int(np.prod(nodes)))
+  step = max(1, block_bytes // (q.dtype.itemsize*width))
+  coeffs = np.zeros((int(np.prod(orders)), min(step, num)), q.dtype)
+  for lo in range(0, num, step):
+    up = min(lo+step, num)
+    # Coefficients are stored as (m_{D-1}, ..., m_0, cells) so each
+    # step is a single matrix product of a transposed view: the
+    # leading direction is contracted and the nodes are appended as
+    # the last axis. After D steps the axes are (cells, n_{D-1}, ...,
+    # n_0).
+    temp = coeffs[:, :up-lo]
+    temp[flat, :] = q[lo:up].T
+    for d in reversed(range(dim)):
+      temp = temp.reshape(orders[d], -1).T @ opsT[d]
+    #end
+    out[lo:up] = temp.reshape(up-lo, -1)
+  #end
+  return out.reshape(lead + tuple(nodes[::-1]))
+#end
@@ -26,6 +26,9 @@ import tables
 
 class Read_flash_h5(object):
   """Provides a framework to read FLASH h5 output
+
+  Several variables can be read at once by passing a list of names
+  as 'var_name'; they are stored as the individual components.
   """
 
   def __init__(self, file_name : str,
@@ -33,7 +36,14 @@ class Read_flash_h5(object):
                ctx : dict = None,
                **kwargs) -> None:
     self._file_name = file_name
-    self.var_name = var_name
+    if isinstance(var_name, str):
+      var_name = [var_name]
+    #end
+    self.var_names = list(var_name)
+
+    self.cells = None
+    self.lower = None
+    self.upper = None
 
     self.ctx = ctx
   #end
@@ -52,47 +62,120 @@ class Read_flash_h5(object):
     return out
   #end
 
-  def _read_frame(self) -> tuple:
-    fh = tables.open_file(self._file_name, 'r')
-    coord = fh.root['coordinates'].read().transpose()
-    bsize = fh.root['block size'].read().transpose()
-    ntype = fh.root['node type'].read().transpose()
-    bdata = fh.root[self.var_name].read().transpose()
-
-    nxb, nyb, _, N = bdata.shape
-    res = bsize.min(axis=1)
-    lower = (coord-bsize/2).min(axis=1)
-    upper = (coord+bsize/2).max(axis=1)
-
-    nxax = math.floor((upper[0]-lower[0]) / (res[0]/nxb))
-    nyax = math.floor((upper[1]-lower[1]) / (res[1]/nyb))
-    data = np.zeros((nxax, nyax))
-    for b in range(N):
-      if ntype[b] == 1:
-        mult = np.ceil(bsize[:,b]/res)
-        idxx = math.floor((coord[0,b] - bsize[0,b]/2 - lower[0]) / res[0] * nxb)
-        idxy = math.floor((coord[1,b] - bsize[1,b]/2 - lower[1]) / res[1] * nyb)
-        for i in range(nxb):
-          for j in range(nyb):
-            data[idxx+i*int(mult[0]):idxx+(i+1)*int(mult[0])+1,
-                 idxy+j*int(mult[1]):idxy+(j+1)*int(mult[1])+1] = bdata[i,j,0,b]
-          #end
-        #end
-      #end
+  def _preload_frame(self, fh) -> None:
+    coord = fh.root['coordinates'].read()[:, :2]
+    bsize = fh.root['block size'].read()[:, :2]
+    ntype = fh.root['node type'].read()
+    nxb, nyb = fh.root[self.var_names[0]].shape[3:1:-1]
+
+    # Resolution of the finest blocks
+    res = bsize.min(axis=0)
+    self.lower = (coord-bsize/2).min(axis=0)
+    self.upper = (coord+bsize/2).max(axis=0)
+    self.cells = np.array([math.floor((self.upper[0]-self.lower[0]) / (res[0]/nxb)),
+                           math.floor((self.upper[1]-self.lower[1]) / (res[1]/nyb))])
+
+    # Index of the first finest cell and the refinement factor of
+    # each of the leaf blocks
+    self._leaf = np.nonzero(ntype == 1)[0]
+    corner = coord[self._leaf] - bsize[self._leaf]/2
+    self._start = np.rint((corner - self.lower) / res * (nxb, nyb)).astype(int)
+    self._mult = np.rint(bsize[self._leaf] / res).astype(int)
+    self._block = (nxb, nyb)
+  #end
+
+  def _scatter(self, bdata: np.ndarray, out: np.ndarray) -> None:
+    # 'bdata' are the leaf blocks of a variable with the FLASH layout
+    # (block, z, y, x); the blocks of the same refinement are upsampled
+    # and written at once
+    nxb, nyb = self._block
+    bdata = bdata[:, 0].transpose(0, 2, 1) # (block, x, y)
+    for mult in np.unique(self._mult, axis=0):
+      sel = np.nonzero((self._mult == mult).all(axis=1))[0]
+      up = bdata[sel].repeat(mult[0], axis=1).repeat(mult[1], axis=2)
+      ix = self._start[sel, 0, np.newaxis] + np.arange(nxb*mult[0])
+      iy = self._start[sel, 1, np.newaxis] + np.arange(nyb*mult[1])
+      out[ix[:, :, np.newaxis], iy[:, np.newaxis, :]] = up
     #end
-    fh.close()
-    return data.shape, lower[:2], upper[:2], data[..., np.newaxis]
+  #end
+
+  def _load_frame(self, fh) -> tuple:
+    data = np.zeros((*self.cells, len(self.var_names)))
+    for c, name in enumerate(self.var_names):
+      self._scatter(fh.root[name].read()[self._leaf], data[..., c])
+    #end
+    grid = [np.linspace(self.lower[d],
+                        self.upper[d],
+                        self.cells[d]+1)
+            for d in range(2)]
+    return grid, data
+  #end
+
+  def _read_blocks(self, fh) -> list:
+    bsize = fh.root['block size'].read()
+    coord = fh.root['coordinates'].read()
+    ntype = fh.root['node type'].read()
+    leaf = np.nonzero(ntype == 1)[0]
+    # FLASH layout of the variables is (block, z, y, x)
+    nzb, nyb, nxb = fh.root[self.var_names[0]].shape[1:]
+    num_dims = 3 if nzb > 1 else 2 if nyb > 1 else 1
+    block_cells = (nxb, nyb, nzb)[:num_dims]
+    if 'refine level' in fh.root:
+      levels = fh.root['refine level'].read()
+    else:
+      # Refinement levels from the block sizes (1 is the coarsest)
+      levels = np.rint(np.log2(bsize[:, 0].max() / bsize[:, 0])).astype(int) + 1
+    #end
+    lower = coord[:, :num_dims] - bsize[:, :num_dims]/2
+    upper = coord[:, :num_dims] + bsize[:, :num_dims]/2
+
+    # Only the leaf blocks are kept; the values of each block are a
+    # (x, y, z, comp) view of the stored array
+    bdata = np.stack([fh.root[name].read()[leaf] for name in self.var_names],
+                     axis=-1)
+    bdata = bdata.transpose(0, 3, 2, 1, 4)
+    blocks = []
+    for n, b in enumerate(leaf):
+      grid = [np.linspace(lower[b, d], upper[b, d], block_cells[d]+1)
+              for d in range(num_dims)]
+      values = bdata[n].reshape(*block_cells, len(self.var_names))
+      blocks.append((grid, values, int(levels[b])))
+    #end
+    return blocks
   #end
 
   # ---- Exposed function ----------------------------------------------
-  def get_data(self) -> tuple:
-    cells, lower, upper, data = self._read_frame()
-    num_dims = len(cells)
-    grid = [np.linspace(lower[d],
-                        upper[d],
-                        cells[d]+1)
-            for d in range(num_dims)]
+  def load_blocks(self) -> list:
+    """Reads the leaf blocks at their native resolution instead of
+    resampling them to the finest uniform grid.
+
+    Returns:
+      List of (grid, values, refinement level), one for each leaf block
+    """
+    with tables.open_file(self._file_name, 'r') as fh:
+      return self._read_blocks(fh)
+    #end
+  #end
 
+  def preload(self) -> None:
+    with tables.open_file(self._file_name, 'r') as fh:
+      self._preload_frame(fh)
+    #end
+    if self.ctx:
+      self.ctx['cells'] = self.cells
+      self.ctx['lower'] = self.lower
+      self.ctx['upper'] = self.upper
+    #end
+  #end
+
+  def load(self) -> tuple:
+    # All the variables are read from a single open file
+    with tables.open_file(self._file_name, 'r') as fh:
+      grid, data = self._load_frame(fh)
+    #end
+    if self.ctx:
+      self.ctx['num_comps'] = data.shape[-1]
+    #end
     return grid, data
   #end
-#end
\ No newline at end of file
+#end
@@ -0,0 +1,120 @@
+import numpy as np
+import tables
+
+from postgkyl.data.write_frame_cube import CUBE_MARK
+from postgkyl.utils import create_offset_count, time_window_mask
+
+class Read_frame_cube(object):
+  """Provides a framework to read frame cubes (see write_frame_cube)
+
+  A single frame is read when 'frame_index' is specified. Otherwise,
+  all the frames are collected into one dataset with the time as the
+  first dimension (the same layout as the 'collect' command). The
+  cuts apply to the cell dimensions; the frames are selected with
+  'tmin' and 'tmax'.
+  """
+
+  def __init__(self,
+               file_name: str,
+               ctx: dict = None,
+               axes: tuple = (None, None, None, None, None, None),
+               comp: int = None,
+               frame_index: int = None,
+               tmin: float = None,
+               tmax: float = None,
+               **kwargs) -> None:
+    self._file_name = file_name
+
+    self.axes = axes
+    self.comp = comp
+    self.frame_index = frame_index
+    self.tmin = tmin
+    self.tmax = tmax
+
+    self.ctx = ctx
+  #end
+
+  def _is_compatible(self) -> bool:
+    try:
+      with tables.open_file(self._file_name, 'r') as fh:
+        return CUBE_MARK in fh.root._v_attrs
+      #end
+    except:
+      return False
+    #end
+  #end
+
+  def _frames(self, fh) -> tuple:
+    # Returns the slice of the frames spanning the selection and the
+    # mask of the selected frames within it
+    if self.frame_index is not None:
+      idx = self.frame_index % fh.root.values.shape[0]
+      return slice(idx, idx+1), np.ones(1, dtype=bool)
+    #end
+    time = fh.root.time.read()
+    mask = time_window_mask(time, self.tmin, self.tmax)
+    if not mask.any():
+      raise ValueError('No frames in the time window')
+    #end
+    idx = np.nonzero(mask)[0]
+    lo, up = int(idx[0]), int(idx[-1])+1
+    return slice(lo, up), mask[lo:up]
+  #end
+
+  def _read(self, fh) -> tuple:
+    node = fh.root.values
+    num_dims = len(node.shape)-2
+    grid = [fh.root.grid._f_get_child('grid_{:d}'.format(d)).read()
+            for d in range(num_dims)]
+    frames, mask = self._frames(fh)
+    time = fh.root.time[frames][mask]
+
+    offset, count = create_offset_count(node.shape[1:], self.axes,
+                                        self.comp, grid)
+    if not offset:
+      offset, count = (0,)*(num_dims+1), node.shape[1:]
+    #end
+    # Only the chunks intersecting the hyperslab are read
+    values = node[(frames, *(slice(o, o+c) for o, c in zip(offset, count)))]
+    values = values[mask]
+    for d in range(num_dims):
+      nodal = len(grid[d]) == node.shape[d+1]+1
+      grid[d] = grid[d][offset[d]:offset[d]+count[d]+(1 if nodal else 0)]
+    #end
+
+    if self.frame_index is None:
+      return [time] + grid, values
+    #end
+    return grid, values[0]
+  #end
+
+  # ---- Exposed function ----------------------------------------------
+  def preload(self) -> None:
+    with tables.open_file(self._file_name, 'r') as fh:
+      if self.ctx is not None:
+        for key in fh.root._v_attrs._f_list('user'):
+          if key.startswith('ctx_'):
+            self.ctx[key[4:]] = fh.root._v_attrs[key]
+          #end
+        #end
+        if self.frame_index is not None:
+          frames, _ = self._frames(fh)
+          time = float(fh.root.time[frames][0])
+          frame = int(fh.root.frame[frames][0])
+          self.ctx['time'] = None if np.isnan(time) else time
+          self.ctx['frame'] = None if frame < 0 else frame
+        #end
+      #end
+    #end
+  #end
+
+  def load(self) -> tuple:
+    with tables.open_file(self._file_name, 'r') as fh:
+      grid, values = self._read(fh)
+    #end
+    if self.ctx is not None:
+      self.ctx['num_comps'] = values.shape[-1]
+    #end
+    return grid, values
+  #end
+#end
@@ -1,6 +1,10 @@
 import numpy as np
 import msgpack as mp
 import os.path
+from concurrent.futures import ThreadPoolExecutor
+
+from postgkyl.data.geometry_cache import load_geometry
+from postgkyl.utils import create_offset_count, time_window_mask
 
 # Format description for raw Gkeyll output file from
 # gkyl_array_rio_format_desc.h
@@ -73,6 +77,15 @@ import os.path
 # Note: the global range in Gkeyll, of which each range is a part,
 # is 1-indexed.
 
+_MAGIC = [103, 107, 121, 108, 48] # 'gkyl0'
+
+# Header information is read from the disk in blocks of this size; a
+# typical header, including the msgpack meta data, fits into one block
+_HEADER_BLOCK_SIZE = 4096
+
+# Partial loads read contiguous runs of at least this size; shorter
+# runs are extended over the neighboring data and cut in memory
+_MIN_RUN_SIZE = 16384
 
 class Read_gkyl(object):
   """Provides a framework to read gkylzero binary output
@@ -82,16 +95,35 @@ class Read_gkyl(object):
                ctx: dict = {},
                c2p: str = '',
                c2p_vel: str = '',
+               axes: tuple = (None, None, None, None, None, None),
+               comp: int = None,
+               mmap: bool = False,
+               num_threads: int = 1,
+               record: dict = None,
+               tmin: float = None,
+               tmax: float = None,
                **kwargs) -> None:
     self.file_name = file_name
+    self.record = record
+    self.tmin = tmin
+    self.tmax = tmax
     self.c2p = c2p
     self.c2p_vel = c2p_vel
+    self.mmap = mmap
+    self.num_threads = num_threads
+
+    self.axes = axes
+    self.comp = comp
+    self.cut_offset = ()
+    self.cut_count = ()
 
     self.dtf = np.dtype('f8')
     self.dti = np.dtype('i8')
 
     self.offset = 0
     self.doffset = 8
+    self._buffer = b''
+    self._buffer_offset = 0
 
     self.file_type = 1
     self.version = 0
@@ -100,17 +132,25 @@ class Read_gkyl(object):
     self.upper = None
     self.num_comps = None
     self.cells = None
+    self.num_dims = None
+
+    self._t2_end = None # end of the dynvector chunks read (see follow)
+    self.range_table = None
+    self.meta = {}
 
     self.ctx = ctx
   #end
 
   def _is_compatible(self) -> bool:
+    if self.record:
+      return self.record['file_type'] > 0
+    #end
     try:
-      magic = np.fromfile(self.file_name, dtype=np.dtype('b'),
-                          count=5, offset=0)
-      if np.array_equal(magic, [103, 107, 121, 108, 48]):
-        self.version = np.fromfile(self.file_name, dtype=self.dti,
-                                   count=1, offset=5)[0]
+      self._fill_buffer(0)
+      magic = np.frombuffer(self._buffer, dtype=np.dtype('b'), count=5)
+      if np.array_equal(magic, _MAGIC):
+        self.version = np.frombuffer(self._buffer, dtype=self.dti,
+                                     count=1, offset=5)[0]
         return True
       #end
     except:
@@ -119,192 +159,514 @@ class Read_gkyl(object):
     return False
   #end
 
-  # Starting with version 1, .gkyl files contatin a header; version 0
-  # files only include the real-type info
-  def _read_header(self) -> None:
-    #self.offset = 0
+  # ---- Buffered header access ----------------------------------------
+  # All the header fields are decoded from an in-memory copy of the
+  # beginning of the file; the file is (re)opened only when a field
+  # lies outside of the buffered block.
+  def _fill_buffer(self, offset: int, size: int = 0) -> None:
+    with open(self.file_name, 'rb') as fh:
+      fh.seek(offset)
+      self._buffer = fh.read(max(size, _HEADER_BLOCK_SIZE))
+    #end
+    self._buffer_offset = offset
+  #end
 
-    if self._is_compatible():
-      self.offset += 5 # Header contatins the gkyl magic sequence
+  def _read_bytes(self, size: int) -> bytes:
+    start = self.offset - self._buffer_offset
+    if start < 0 or start + size > len(self._buffer):
+      self._fill_buffer(self.offset, size)
+      start = 0
+    #end
+    if start + size > len(self._buffer):
+      raise EOFError('Unexpected end of the file {:s}'.format(self.file_name))
+    #end
+    self.offset += size
+    return self._buffer[start:start+size]
+  #end
 
-      self.version = np.fromfile(self.file_name, dtype=self.dti,
-                                 count=1, offset=self.offset)[0]
-      self.offset += 8
+  def _unpack(self, dtype: np.dtype, count: int = 1) -> np.ndarray:
+    count = int(count)
+    raw = self._read_bytes(count * dtype.itemsize)
+    return np.frombuffer(raw, dtype=dtype, count=count).copy()
+  #end
 
-      self.file_type = np.fromfile(self.file_name, dtype=self.dti,
-                                   count=1, offset=self.offset)[0]
-      self.offset += 8
+  def _set_meta(self, unp: dict) -> None:
+    self.meta.update(unp)
+    for key in unp:
+      if self.ctx:
+        if key == 'polyOrder':
+          self.ctx['poly_order'] = unp[key]
+        elif key == 'basisType':
+          self.ctx['basis_type'] = unp[key]
+          self.ctx['is_modal'] = True
+        else:
+          self.ctx[key] = unp[key]
+        #end
+      #end
+    #end
+  #end
 
-      meta_size = np.fromfile(self.file_name, dtype=self.dti,
-                              count=1, offset=self.offset)[0]
-      self.offset += 8
+  # Starting with version 1, .gkyl files contatin a header; version 0
+  # files only include the real-type info
+  def _read_header(self) -> None:
+    magic = self._unpack(np.dtype('b'), 5)
+    if np.array_equal(magic, _MAGIC):
+      version, self.file_type, meta_size = self._unpack(self.dti, 3)
+      self.version = version
 
       # read meta
       if meta_size > 0:
-        fh = open(self.file_name, 'rb')
-        fh.seek(self.offset)
-        unp = mp.unpackb(fh.read(meta_size))
-        for key in unp:
-          if self.ctx:
-            if key == 'polyOrder':
-              self.ctx['poly_order'] = unp[key]
-            elif key == 'basisType':
-              self.ctx['basis_type'] = unp[key]
-              self.ctx['is_modal'] = True
-            else:
-              self.ctx[key] = unp[key]
-            #end
-          #end
-        #end
-        self.offset += meta_size
-        fh.close()
+        self._set_meta(mp.unpackb(self._read_bytes(int(meta_size))))
       #end
+    else:
+      self.offset -= 5
     #end
 
     # read real-type
-    real_type = np.fromfile(self.file_name, dtype=self.dti, count=1,
-                            offset=self.offset)[0]
+    real_type = self._unpack(self.dti)[0]
     if real_type == 1:
       self.dtf = np.dtype('f4')
       self.doffset = 4
     #end
-    self.offset += 8
   #end
 
   # ---- Read field data (version 1) -----------------------------------
   def _read_domain_t1a3_v1(self) -> None:
     # read grid dimensions
-    self.num_dims = np.fromfile(self.file_name, dtype=self.dti,
-                                count=1, offset=self.offset)[0]
-    self.offset += 8
+    self.num_dims = self._unpack(self.dti)[0]
 
     # read grid shape
-    self.cells = np.fromfile(self.file_name, dtype=self.dti,
-                             count=self.num_dims, offset=self.offset)
-    self.offset += self.num_dims * 8
-
-    # read lower/upper
-    self.lower = np.fromfile(self.file_name, dtype=self.dtf,
-                             count=self.num_dims, offset=self.offset)
-    self.offset += self.num_dims * self.doffset
-    self.upper = np.fromfile(self.file_name, dtype=self.dtf,
-                        count=self.num_dims, offset=self.offset)
-    self.offset += self.num_dims * self.doffset
+    self.cells = self._unpack(self.dti, self.num_dims)
+
+    # read lower/upper; they are float64 regardless of the real type
+    self.lower = self._unpack(np.dtype('f8'), self.num_dims)
+    self.upper = self._unpack(np.dtype('f8'), self.num_dims)
 
     # read array elem_ez (the div by doffset is as elem_sz includes
-    # sizeof(real_type) = doffset)
-    elem_sz_raw = int(
-      np.fromfile(self.file_name, dtype=self.dti,
-                  count=1, offset=self.offset)[0])
-    elem_sz = elem_sz_raw / self.doffset
-    self.num_comps = int(elem_sz)
-    self.offset += 8
-
-    # read array size
-    self.asize = np.fromfile(self.file_name, dtype=self.dti,
-                             count=1, offset=self.offset)[0]
-    self.offset += 8
+    # sizeof(real_type) = doffset) and array size
+    elem_sz_raw, self.asize = self._unpack(self.dti, 2)
+    self.num_comps = int(elem_sz_raw / self.doffset)
+  #end
 
-  def _read_data_t1_v1(self) -> np.ndarray:
-    data_raw = np.fromfile(self.file_name, dtype=self.dtf,
-                           offset=self.offset)
+  def _get_gshape(self) -> np.ndarray:
     gshape = np.ones(self.num_dims+1, dtype=self.dti)
     for d in range(self.num_dims):
       gshape[d] = self.cells[d]
     #end
     gshape[-1] = self.num_comps
+    return gshape
+  #end
+
+  def _read_hyperslab(self, fh, base: int, shape: tuple,
+                      offset: tuple, count: tuple) -> np.ndarray:
+    """Reads a hyperslab of a row-major array stored in 'fh' starting
+    at the byte offset 'base'. Only the contiguous runs covering the
+    hyperslab are read; each run spans the last partially selected
+    dimension and all the following ones.
+    """
+    num_dims = len(shape)
+    strides = np.ones(num_dims, dtype=self.dti)
+    for d in range(num_dims-2, -1, -1):
+      strides[d] = strides[d+1]*shape[d+1]
+    #end
+    k = num_dims-1
+    while k > 0 and offset[k] == 0 and count[k] == shape[k]:
+      k -= 1
+    #end
+    while k > 0 and count[k]*strides[k]*self.doffset < _MIN_RUN_SIZE:
+      k -= 1
+    #end
+    # Dimensions after 'k' might still need to be cut in memory
+    cut = tuple(slice(offset[d], offset[d]+count[d])
+                for d in range(k+1, num_dims))
+    is_cut = any(count[d] != shape[d] for d in range(k+1, num_dims))
+
+    data = np.empty(count, dtype=self.dtf)
+    run = np.empty((count[k],) + tuple(shape[k+1:]), dtype=self.dtf)
+    for idx in np.ndindex(*count[:k]):
+      pos = offset[k]*strides[k]
+      for d in range(k):
+        pos += (offset[d] + idx[d])*strides[d]
+      #end
+      fh.seek(base + int(pos)*self.doffset)
+      buf = run if is_cut else data[idx]
+      if fh.readinto(buf) != buf.nbytes:
+        raise EOFError('Unexpected end of the file {:s}'.format(self.file_name))
+      #end
+      if is_cut:
+        data[idx] = run[(slice(None),) + cut]
+      #end
+    #end
+    return data
+  #end
+
+  def _read_data_t1_v1(self) -> np.ndarray:
+    gshape = self._get_gshape()
+    if self.mmap:
+      # Read-only view of the payload; pages are only read from the
+      # disk once they are actually accessed
+      data = np.memmap(self.file_name, dtype=self.dtf, mode='r',
+                       offset=self.offset, shape=tuple(gshape))
+      if self.cut_offset:
+        data = data[tuple(slice(o, o+c) for o, c
+                          in zip(self.cut_offset, self.cut_count))]
+      #end
+      return data
+    #end
+    if self.cut_offset:
+      with open(self.file_name, 'rb') as fh:
+        return self._read_hyperslab(fh, self.offset, tuple(gshape),
+                                    self.cut_offset, self.cut_count)
+      #end
+    #end
+    data_raw = np.fromfile(self.file_name, dtype=self.dtf,
+                           offset=self.offset)
     return data_raw.reshape(gshape)
   #end
 
-  def _read_data_t3_v1(self) -> np.ndarray:
-    # get the number of stored ranges
-    num_range = np.fromfile(self.file_name, dtype=self.dti,
-                            count=1, offset=self.offset)[0]
-    self.offset += 8
+  def _read_range_table(self) -> np.ndarray:
+    # First pass over a multi-range file; only the range headers are
+    # read and the data are skipped
+    with open(self.file_name, 'rb') as fh:
+      fh.seek(self.offset)
+      num_range = int(np.fromfile(fh, dtype=self.dti, count=1)[0])
+      pos = self.offset + 8
+      table = np.zeros(num_range, dtype=[
+        ('loidx', self.dti, (self.num_dims,)),
+        ('upidx', self.dti, (self.num_dims,)),
+        ('size', self.dti),
+        ('offset', self.dti)])
+      header_size = (2*self.num_dims + 1) * 8
+      for i in range(num_range):
+        fh.seek(pos)
+        header = np.fromfile(fh, dtype=self.dti, count=2*self.num_dims+1)
+        table['loidx'][i] = header[:self.num_dims]
+        table['upidx'][i] = header[self.num_dims:-1]
+        table['size'][i] = header[-1]
+        table['offset'][i] = pos + header_size
+        pos += header_size + header[-1]*self.num_comps*self.doffset
+      #end
+    #end
+    return table
+  #end
 
-    gshape = np.ones(self.num_dims+1, dtype=self.dti)
-    for d in range(self.num_dims):
-      gshape[d] = self.cells[d]
+  def _read_range(self, rng, data: np.ndarray,
+                  lo: np.ndarray, up: np.ndarray) -> None:
+    # Reads the part of a single range which intersects the requested
+    # hyperslab [lo, up) and scatters it into 'data'
+    rlo = rng['loidx'] - 1 # Gkeyll ranges are 1-indexed
+    rup = rng['upidx']
+    ilo = np.maximum(rlo, lo[:-1])
+    iup = np.minimum(rup, up[:-1])
+    shape = tuple(rup - rlo) + (self.num_comps,)
+    offset = tuple(ilo - rlo) + (lo[-1],)
+    count = tuple(iup - ilo) + (up[-1] - lo[-1],)
+    with open(self.file_name, 'rb') as fh:
+      data_raw = self._read_hyperslab(fh, int(rng['offset']), shape,
+                                      offset, count)
     #end
-    gshape[-1] = self.num_comps
+    slices = tuple(slice(ilo[d]-lo[d], iup[d]-lo[d])
+                   for d in range(self.num_dims))
+    data[slices] = data_raw
+  #end
 
-    data = np.zeros(gshape, dtype=self.dtf)
-    for i in range(num_range):
-      loidx = np.fromfile(self.file_name, dtype=self.dti,
-                          count=self.num_dims, offset=self.offset)
-      self.offset += self.num_dims * 8
-      upidx = np.fromfile(self.file_name, dtype=self.dti,
-                          count=self.num_dims, offset=self.offset)
-      self.offset += self.num_dims * 8
-      for d in range(self.num_dims):
-        gshape[d] = upidx[d] - loidx[d] + 1
-      #end
-      slices = [slice(loidx[d]-1,upidx[d]) for d in range(self.num_dims)]
-
-      asize = np.fromfile(self.file_name, dtype=self.dti,
-                          count=1, offset=self.offset)[0]
-      self.offset += 8
-      data_raw = np.fromfile(self.file_name, dtype=self.dtf,
-                             count=asize*self.num_comps,
-                             offset=self.offset)
-      self.offset += asize * self.num_comps * self.doffset
-      data[tuple(slices)] = data_raw.reshape(gshape)
+  def _read_data_t3_v1(self) -> np.ndarray:
+    gshape = self._get_gshape()
+    lo = np.zeros(self.num_dims+1, dtype=self.dti)
+    up = np.array(gshape)
+    if self.cut_offset:
+      lo = np.array(self.cut_offset, dtype=self.dti)
+      up = lo + np.array(self.cut_count, dtype=self.dti)
+    #end
+
+    table = self.get_range_table()
+    # Read only the ranges intersecting the requested hyperslab
+    mask = np.all((table['loidx']-1 < up[:-1]) & (table['upidx'] > lo[:-1]),
+                  axis=1)
+    data = np.zeros(up - lo, dtype=self.dtf)
+    if self.num_threads > 1:
+      with ThreadPoolExecutor(max_workers=self.num_threads) as pool:
+        futures = [pool.submit(self._read_range, rng, data, lo, up)
+                   for rng in table[mask]]
+        for f in futures:
+          f.result()
+        #end
+      #end
+    else:
+      for rng in table[mask]:
+        self._read_range(rng, data, lo, up)
+      #end
     #end
     return data
   #end
 
   # ---- Read dynvector data (version 1) -------------------------------
-  def _read_t2_v1(self) -> tuple:
-    cells = 0
-    time = np.array([])
-    data = np.array([[]])
-    while True: # Python does not have DO .. WHILE loop
-      elem_sz_raw = int(
-        np.fromfile(self.file_name, dtype=self.dti,
-                    count=1, offset=self.offset)[0])
-      num_comps = int(elem_sz_raw / self.doffset)
-      self.offset += 8
-
-      loop_cells = int(np.fromfile(self.file_name, dtype=self.dti,
-                                   count=1, offset=self.offset)[0])
-      self.offset += 8
-
-      loop_time = np.fromfile(self.file_name, dtype=self.dtf,
-                              count=loop_cells, offset=self.offset)
-      self.offset += loop_cells * 8
-
-      data_raw = np.fromfile(self.file_name, dtype=self.dtf,
-                             count=num_comps * loop_cells,
-                             offset=self.offset)
-      self.offset += loop_cells * elem_sz_raw
-      gshape = np.array((loop_cells, num_comps), dtype=self.dti)
-
-      time = np.append(time, loop_time)
-      if cells == 0:
-        data = data_raw.reshape(gshape)
-      else:
-        data = np.append(data, data_raw.reshape(gshape), axis=0)
+  # Dynvector files consist of chunks, each with its own full header,
+  # which are appended to the file during the simulation.
+  def _scan_t2_v1(self, fh, pos: int) -> tuple:
+    # First pass; collects the position and size of each complete
+    # chunk starting at 'pos' without reading the data
+    file_size = os.fstat(fh.fileno()).st_size
+    chunks = []
+    meta = None
+    while pos + 29 <= file_size:
+      fh.seek(pos)
+      raw = fh.read(29)
+      magic = np.frombuffer(raw, dtype=np.dtype('b'), count=5)
+      _, file_type, meta_size = np.frombuffer(raw, dtype=self.dti,
+                                              count=3, offset=5)
+      if not np.array_equal(magic, _MAGIC) or file_type != 2:
+        raise TypeError('Inconsitent data in g0 dynVector file.')
       #end
-      cells += loop_cells
-      if self.offset >= os.path.getsize(self.file_name):
+      meta_pos = pos + 29
+      fh.seek(meta_pos + meta_size)
+      raw = fh.read(24)
+      if len(raw) < 24:
         break
       #end
-      self._read_header()
-      if self.file_type != 2:
+      _, elem_sz, num_cells = [int(v) for v in np.frombuffer(
+        raw, dtype=self.dti, count=3)]
+      time_pos = meta_pos + meta_size + 24
+      end = time_pos + num_cells*(8 + elem_sz)
+      if end > file_size: # Chunk is still being written
+        break
+      #end
+      chunks.append((time_pos, num_cells, elem_sz // self.doffset))
+      if meta_size > 0:
+        meta = (meta_pos, meta_size)
+      #end
+      pos = end
+    #end
+    if meta is not None:
+      fh.seek(meta[0])
+      self._set_meta(mp.unpackb(fh.read(meta[1])))
+    #end
+    return chunks, pos
+  #end
+
+  def _fill_t2_v1(self, fh, chunks: list, time: np.ndarray,
+                  data: np.ndarray) -> None:
+    # Second pass; reads the chunks into preallocated arrays
+    cnt = 0
+    for time_pos, num_cells, num_comps in chunks:
+      if num_comps != data.shape[1]:
         raise TypeError('Inconsitent data in g0 dynVector file.')
       #end
+      fh.seek(time_pos)
+      fh.readinto(time[cnt:cnt+num_cells])
+      fh.readinto(data[cnt:cnt+num_cells])
+      cnt += num_cells
+    #end
+  #end
+
+  def _window_t2_v1(self, fh, chunks: list) -> tuple:
+    # Reads only the chunks (and the rows of them) within the time
+    # window; the time stamps of each chunk are read first
+    times, datas = [], []
+    for time_pos, num_cells, num_comps in chunks:
+      fh.seek(time_pos)
+      time = np.fromfile(fh, dtype=np.dtype('f8'), count=num_cells)
+      mask = time_window_mask(time, self.tmin, self.tmax)
+      if not mask.any():
+        continue
+      #end
+      idx = np.nonzero(mask)[0]
+      lo, up = int(idx[0]), int(idx[-1])+1
+      fh.seek(time_pos + num_cells*8 + lo*num_comps*self.doffset)
+      data = np.fromfile(fh, dtype=self.dtf, count=(up-lo)*num_comps)
+      times.append(time[mask])
+      datas.append(data.reshape(up-lo, num_comps)[mask[lo:up]])
     #end
-    self.cells = [cells]
+    if not times:
+      return np.empty(0), None
+    #end
+    return np.concatenate(times), np.concatenate(datas)
+  #end
+
+  def _read_t2_v1(self) -> tuple:
+    with open(self.file_name, 'rb') as fh:
+      chunks, self._t2_end = self._scan_t2_v1(fh, 0)
+      if not chunks:
+        raise TypeError('No complete data in g0 dynVector file.')
+      #end
+      if self.tmin is not None or self.tmax is not None:
+        time, data = self._window_t2_v1(fh, chunks)
+        if data is None:
+          raise ValueError('No data in the time window')
+        #end
+        num_cells = len(time)
+      else:
+        num_cells = sum(c[1] for c in chunks)
+        time = np.empty(num_cells, dtype=np.dtype('f8'))
+        data = np.empty((num_cells, chunks[0][2]), dtype=self.dtf)
+        self._fill_t2_v1(fh, chunks, time, data)
+      #end
+    #end
+    self._t2_time, self._t2_data = time, data
+    self._t2_cells = num_cells
+    self.cells = [num_cells]
     self.lower = np.atleast_1d(time.min())
     self.upper = np.atleast_1d(time.max())
     return time, data
   #end
 
+  def follow(self) -> tuple:
+    """Reads the chunks appended to a dynvector file since the last
+    load or follow call.
+
+    Returns:
+      grid, data: The whole time series or (None, None) when no new
+        complete chunks were found.
+    """
+    if self.file_type != 2:
+      raise TypeError('Following is supported only for the dynvector (type 2) files')
+    #end
+    if self._t2_end is None:
+      raise RuntimeError('The file needs to be loaded before following it')
+    #end
+    with open(self.file_name, 'rb') as fh:
+      chunks, end = self._scan_t2_v1(fh, self._t2_end)
+      window = self.tmin is not None or self.tmax is not None
+      if window and chunks:
+        new_time, new_data = self._window_t2_v1(fh, chunks)
+        if new_data is None:
+          chunks = [] # Nothing within the window
+        #end
+      #end
+      if not chunks:
+        self._t2_end = end
+        return None, None
+      #end
+      if window:
+        num_cells = self._t2_cells + len(new_time)
+      else:
+        num_cells = self._t2_cells + sum(c[1] for c in chunks)
+      #end
+      if num_cells > len(self._t2_time):
+        # Grow the buffers geometrically to keep the appends cheap
+        size = max(num_cells, 2*len(self._t2_time))
+        time = np.empty(size, dtype=self._t2_time.dtype)
+        data = np.empty((size, self._t2_data.shape[1]),
+                        dtype=self._t2_data.dtype)
+        time[:self._t2_cells] = self._t2_time[:self._t2_cells]
+        data[:self._t2_cells] = self._t2_data[:self._t2_cells]
+        self._t2_time, self._t2_data = time, data
+      #end
+      if window:
+        self._t2_time[self._t2_cells:num_cells] = new_time
+        self._t2_data[self._t2_cells:num_cells] = new_data
+      else:
+        self._fill_t2_v1(fh, chunks, self._t2_time[self._t2_cells:],
+                         self._t2_data[self._t2_cells:])
+      #end
+    #end
+    self._t2_end = end
+    self._t2_cells = num_cells
+    time = self._t2_time[:num_cells]
+    self.cells = [num_cells]
+    self.lower = np.atleast_1d(time.min())
+    self.upper = np.atleast_1d(time.max())
+    return [time], self._t2_data[:num_cells]
+  #end
+
+  # ---- Mapped grids ---------------------------------------------------
+  def _read_c2p(self, num_dims: int) -> list:
+    grid_reader = Read_gkyl(self.c2p, axes=self.axes)
+    grid_reader.preload()
+    _, tmp = grid_reader.load()
+    num_comps = tmp.shape[-1]
+    num_coeff = num_comps/num_dims
+    return [tmp[..., int(d*num_coeff):int((d+1)*num_coeff)]
+            for d in range(num_dims)]
+  #end
+
+  def _read_c2p_vel(self, num_dims: int) -> tuple:
+    grid_reader = Read_gkyl(self.c2p_vel)
+    grid_reader.preload()
+    num_vdim = int(grid_reader.num_dims)
+    num_cdim = num_dims - num_vdim
+    # Velocity mapping covers only the velocity dimensions
+    grid_reader.axes = tuple(self.axes[num_cdim:])
+    _, tmp = grid_reader.load()
+
+    num_comps = tmp.shape[-1]
+    num_coeff = num_comps/num_vdim
+    grid = []
+    for d in range(num_vdim):
+      idx = [0] * (num_vdim+1)
+      idx[d] = slice(None)
+      idx[-1] = slice(int(d*num_coeff), int((d+1)*num_coeff))
+      grid.append(tmp[tuple(idx)])
+    #end
+    return num_vdim, grid
+  #end
+
+  # ---- Partial load ---------------------------------------------------
+  def _set_cuts(self) -> None:
+    grid = [np.linspace(self.lower[d], self.upper[d], self.cells[d]+1)
+            for d in range(self.num_dims)]
+    dims = list(self.cells) + [self.num_comps]
+    self.cut_offset, self.cut_count = create_offset_count(
+      dims, self.axes, self.comp, grid)
+    for o, c, n in zip(self.cut_offset, self.cut_count, dims):
+      if o < 0 or c < 1 or o+c > n:
+        raise ValueError('The partial load is outside of the data range')
+      #end
+    #end
+  #end
+
+  def _apply_cuts(self) -> None:
+    # Adjust boundaries for 'offset' and 'count'
+    if self.cut_offset:
+      num_dims = len(self.cells)
+      offset = np.array(self.cut_offset[:num_dims])
+      count = np.array(self.cut_count[:num_dims], dtype=self.dti)
+      dz = (self.upper - self.lower) / self.cells
+      self.lower = self.lower + offset*dz
+      self.upper = self.lower + count*dz
+      self.cells = count
+      self.num_comps = int(self.cut_count[-1])
+      if self.ctx:
+        self.ctx['cells'] = self.cells
+        self.ctx['lower'] = self.lower
+        self.ctx['upper'] = self.upper
+        self.ctx['num_comps'] = self.num_comps
+      #end
+    #end
+  #end
+
+  def _preload_record(self) -> None:
+    # Header information from a catalog record (see catalog.py); the
+    # file itself is not touched
+    self.file_type = self.record['file_type']
+    self.version = self.record['version']
+    if self.record['real_type'] == 1:
+      self.dtf = np.dtype('f4')
+      self.doffset = 4
+    #end
+    self._set_meta(self.record['meta'])
+    if 'cells' in self.record:
+      self.cells = np.array(self.record['cells'], dtype=self.dti)
+      self.num_dims = len(self.cells)
+      self.lower = np.array(self.record['lower'], dtype=np.dtype('f8'))
+      self.upper = np.array(self.record['upper'], dtype=np.dtype('f8'))
+      self.num_comps = self.record['num_comps']
+      self.offset = self.record['offset']
+    #end
+  #end
+
   # ---- Exposed function ----------------------------------------------
   def preload(self) -> None:
-    self._read_header()
+    self.offset = 0
+    if self.record:
+      self._preload_record()
+    else:
+      self._read_header()
+    #end
     if self.file_type == 1 or self.file_type == 3 or self.version == 0:
-      self._read_domain_t1a3_v1()
+      if not self.record:
+        self._read_domain_t1a3_v1()
+      #end
       if self.ctx:
         self.ctx['cells'] = self.cells
         self.ctx['lower'] = self.lower
@@ -314,17 +676,40 @@ class Read_gkyl(object):
     #end
   #end
 
+  def get_range_table(self) -> np.ndarray:
+    """Returns the decomposition of a multi-range (type 3) file.
+
+    The table is a structured array with one row per stored range;
+    'loidx' and 'upidx' are the (1-indexed) corners of the range in
+    the global index space, 'size' is the number of cells, and
+    'offset' is the byte offset of the range data in the file.
+    """
+    if self.num_dims is None:
+      self.preload()
+    #end
+    if self.file_type != 3:
+      raise TypeError('Range table is available only for the multi-range (type 3) files')
+    #end
+    if self.range_table is None:
+      self.range_table = self._read_range_table()
+    #end
+    return self.range_table
+  #end
+
   def load(self) -> tuple:
     time = None
     if self.file_type == 1 or self.version == 0:
+      self._set_cuts()
       data = self._read_data_t1_v1()
     elif self.file_type == 2:
       time, data = self._read_t2_v1()
     elif self.file_type == 3:
+      self._set_cuts()
       data = self._read_data_t3_v1()
     else:
       raise TypeError('This g0 format is not presently supported')
     #end
+    self._apply_cuts()
 
     # Load or construct grid
     num_dims = len(self.cells)
@@ -334,43 +719,29 @@ class Read_gkyl(object):
         self.ctx['grid_type'] = 'nodal'
       #end
     elif self.c2p:
-      grid_reader = Read_gkyl(self.c2p)
-      grid_reader.preload()
-      _, tmp = grid_reader.load()
-      num_comps = tmp.shape[-1]
-      num_coeff = num_comps/num_dims
-      grid = [tmp[..., int(d*num_coeff):int((d+1)*num_coeff)]
-              for d in range(num_dims)]
+      # The mapping is shared by all the frames (see geometry_cache.py)
+      grid = list(load_geometry(self.c2p, (tuple(self.axes), num_dims),
+                                lambda: self._read_c2p(num_dims)))
       if self.ctx:
         self.ctx['grid_type'] = 'c2p'
       #end
     elif self.c2p_vel:
-      grid_reader = Read_gkyl(self.c2p_vel)
-      grid_reader.preload()
-      _, tmp = grid_reader.load()
-
-      num_vdim = len(tmp.shape)-1
+      num_vdim, vel_grid = load_geometry(
+        self.c2p_vel, (tuple(self.axes), num_dims),
+        lambda: self._read_c2p_vel(num_dims))
       num_cdim = num_dims - num_vdim
       if self.ctx:
         self.ctx['num_vdim'] = num_vdim
         self.ctx['num_cdim'] = num_cdim
       #end
 
-      # Create uniform configuration space grid
+      # Create uniform configuration space grid and append the
+      # non-uniform velocity grid
       grid = [np.linspace(self.lower[d],
                           self.upper[d],
                           self.cells[d]+1)
               for d in range(num_cdim)]
-
-      # Create non-uniform velocity grid
-      num_comps = tmp.shape[-1]
-      num_coeff = num_comps/num_vdim
-      for d in range(num_vdim):
-        idx = [0] * (num_vdim+1)
-        idx[d] = slice(None)
-        idx[-1] = slice(int(d*num_coeff), int((d+1)*num_coeff))
-        grid.append(tmp[tuple(idx)])
-      #end
+      grid.extend(vel_grid)
 
       if self.ctx:
         self.ctx['grid_type'] = 'c2p_vel'
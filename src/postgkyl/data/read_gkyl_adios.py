@@ -1,8 +1,85 @@
 import numpy as np
 import click
+import os.path
 import re
+import threading
+from contextlib import contextmanager
 
-from postgkyl.utils import idxParser
+from postgkyl.data.geometry_cache import load_geometry
+from postgkyl.utils import create_offset_count, time_window_mask
+
+# ---- File handle pool ------------------------------------------------
+# Opening the BP metadata is the dominant cost for small files. The
+# files opened within an 'adios_pool()' block stay open until the
+# (outermost) block of the thread ends. Meanwhile, they are shared by
+# the detection, preload, and load of all the readers, e.g., for
+# multiple variables of the same file.
+_pool = {} # file name -> [handle, number of users]
+_pool_lock = threading.Lock()
+_pool_local = threading.local()
+
+def _release(name: str) -> None:
+  with _pool_lock:
+    entry = _pool[name]
+    entry[1] -= 1
+    if entry[1] == 0:
+      _pool.pop(name)[0].close()
+    #end
+  #end
+#end
+
+@contextmanager
+def adios_pool():
+  if not hasattr(_pool_local, 'scopes'):
+    _pool_local.scopes = []
+  #end
+  _pool_local.scopes.append(set())
+  try:
+    yield
+  finally:
+    names = _pool_local.scopes.pop()
+    for name in names:
+      _release(name)
+    #end
+  #end
+#end
+
+@contextmanager
+def adios_file(file_name: str):
+  import adios2 # Adios has been a problematic dependency;
+    # therefore it is only imported when actially needed
+  name = os.path.abspath(file_name)
+  # The outermost block of the thread holds the file as well
+  scopes = getattr(_pool_local, 'scopes', None)
+  hold = 1 if scopes and name not in scopes[0] else 0
+  with _pool_lock:
+    entry = _pool.get(name)
+    if entry:
+      entry[1] += 1 + hold
+    #end
+  #end
+  if entry is None:
+    # Open outside of the lock so other files can be opened meanwhile
+    fh = adios2.open(file_name, 'rra')
+    with _pool_lock:
+      if name in _pool:
+        fh.close()
+      else:
+        _pool[name] = [fh, 0]
+      #end
+      entry = _pool[name]
+      entry[1] += 1 + hold
+    #end
+  #end
+  if hold:
+    scopes[0].add(name)
+  #end
+  try:
+    yield entry[0]
+  finally:
+    _release(name)
+  #end
+#end
 
 class Read_gkyl_adios(object):
   """Provides a framework to read gkyl Adios output
@@ -15,6 +92,8 @@ class Read_gkyl_adios(object):
                c2p: str = None,
                axes: tuple = (None, None, None, None, None, None),
                comp: int = None,
+               tmin: float = None,
+               tmax: float = None,
                click_mode: bool = False,
                **kwargs) -> None:
     self._file_name = file_name
@@ -23,6 +102,8 @@ class Read_gkyl_adios(object):
 
     self.axes = axes
     self.comp = comp
+    self.tmin = tmin
+    self.tmax = tmax
 
     self.lower = None
     self.upper = None
@@ -38,78 +119,34 @@ class Read_gkyl_adios(object):
 
   def _is_compatible(self) -> bool:
     try:
-      import adios2 # Adios has been a problematic dependency;
-        # therefore it is only imported when actially needed
-      fh = adios2.open(self._file_name, 'rra')
-      for vn in fh.available_variables():
-        if 'TimeMesh' in vn:
-          self.is_diagnostic = True
-          fh.close()
-          return True
+      with adios_file(self._file_name) as fh:
+        for vn in fh.available_variables():
+          if 'TimeMesh' in vn:
+            self.is_diagnostic = True
+            return True
+          #end
         #end
-      #end
 
-      available_var_names = ''
-      for vn in fh.available_variables():
-        available_var_names += '\'{:s}\', '.format(str(vn))
-      #end
-      if self.var_name not in fh.available_variables():
-        self.ctx['var_names'] = available_var_names[:-2]
+        available_var_names = ''
+        for vn in fh.available_variables():
+          available_var_names += '\'{:s}\', '.format(str(vn))
+        #end
+        if self.var_name not in fh.available_variables():
+          self.ctx['var_names'] = available_var_names[:-2]
+        #end
+        self.is_frame = True
+        return True
       #end
-      self.is_frame = True
-      fh.close()
-      return True
     except:
       return False
     #end
   #end
 
   def _create_offset_count(self, dims, zs, comp, grid=None) -> tuple:
-    num_dims = len(dims)
-    count = np.array(dims)
-    offset = np.zeros(num_dims, np.int32)
-    cnt = 0
-    for d, z in enumerate(zs):
-      if d < num_dims-1 and z is not None:  # Last dim stores comp
-        z = idxParser(z, grid[d])
-        if isinstance(z, int):
-          offset[d] = z
-          count[d] = 1
-        elif isinstance(z, slice):
-          offset[d] = z.start
-          count[d] = z.stop - z.start
-        else:
-          raise TypeError('\'z\' is neither number or slice')
-        #end
-        cnt = cnt + 1
-      #end
-    #end
-
-    if comp is not None:
-      comp = idxParser(comp)
-      if isinstance(comp, int):
-        offset[-1] = comp
-        count[-1] = 1
-      elif isinstance(comp, slice):
-        offset[-1] = comp.start
-        count[-1] = comp.stop - comp.start
-      else:
-        raise TypeError('\'comp\' is neither number or slice')
-      #end
-      cnt = cnt + 1
-    #end
-
-    if cnt > 0:
-      return tuple(offset), tuple(count)
-    else:
-      return (), ()
-    #end
+    return create_offset_count(dims, zs, comp, grid)
   #end
 
-  def _preload_frame(self) -> None:
-    import adios2
-    fh = adios2.open(self._file_name, 'rra')
-
+  def _preload_frame(self, fh) -> None:
     # Postgkyl conventions require the attributes to be
     # narrays even for 1D data
     self.lower = np.atleast_1d(fh.read_attribute('lowerBounds'))
@@ -141,14 +178,9 @@ class Read_gkyl_adios(object):
     if 'frame' in fh.available_variables():
       self.ctx['frame'] = fh.read('frame')
     #end
-
-    fh.close()
   #end
 
-  def _load_frame(self) -> tuple:
-    import adios2
-    fh = adios2.open(self._file_name, 'rra')
-
+  def _load_frame(self, fh) -> tuple:
     if self.var_name not in fh.available_variables():
       if self.click_mode:
         var_name = self.var_name
@@ -209,15 +241,9 @@ class Read_gkyl_adios(object):
     #  self.ctx['grid_type'] = adios.attr(fh, 'type').value.decode('UTF-8')
     #end
     if self.c2p:
-      grid_fh = adios2.open(self.c2p, 'rra')
-      grid_dims = grid_fh.available_variables()['CartGridField']['Shape']
-      grid_dims = [int(v) for v in grid_dims.split(',')]
-      offset, count = self._create_offset_count(grid_dims, self.axes, None)
-      tmp = grid_fh.read('CartGridField', start=offset, count=count)
-      num_comps = tmp.shape[-1]
-      num_coeff = num_comps/num_dims
-      grid = [tmp[..., int(d*num_coeff):int((d+1)*num_coeff)]
-              for d in range(num_dims)]
+      # The mapping is shared by all the frames (see geometry_cache.py)
+      grid = list(load_geometry(self.c2p, (tuple(self.axes), num_dims),
+                                lambda: self._read_c2p(num_dims)))
       if self.ctx:
         self.ctx['grid_type'] = 'c2p'
       #end
@@ -254,50 +280,97 @@ class Read_gkyl_adios(object):
       #end
     #end
 
-    fh.close()
     return grid, data
+  #end
 
-  def _load_diagnostic(self) -> tuple:
-    import adios2
-    fh = adios2.open(self._file_name, 'rra')
+  def _read_c2p(self, num_dims: int) -> list:
+    with adios_file(self.c2p) as grid_fh:
+      grid_dims = grid_fh.available_variables()['CartGridField']['Shape']
+      grid_dims = [int(v) for v in grid_dims.split(',')]
+      offset, count = self._create_offset_count(grid_dims, self.axes, None)
+      tmp = grid_fh.read('CartGridField', start=offset, count=count)
+    #end
+    num_comps = tmp.shape[-1]
+    num_coeff = num_comps/num_dims
+    return [tmp[..., int(d*num_coeff):int((d+1)*num_coeff)]
+            for d in range(num_dims)]
+  #end
 
+  def _load_diagnostic(self, fh) -> tuple:
     def natural_sort(l):
       convert = lambda text: int(text) if text.isdigit() else text.lower()
       alphanum_key = lambda key: [convert(c) for c in re.split('([0-9]+)', key)]
       return sorted(l, key=alphanum_key)
     #end
 
-    time_lst = [key for key in fh.available_variables() if 'TimeMesh' in key]
-    data_lst = [key for key in fh.available_variables() if 'Data' in key]
+    variables = fh.available_variables()
+    time_lst = [key for key in variables if 'TimeMesh' in key]
+    data_lst = [key for key in variables if 'Data' in key]
     time_lst = natural_sort(time_lst)
     data_lst = natural_sort(data_lst)
 
-    for i in range(len(data_lst)):
-      if i==0:
-        data = np.atleast_1d(fh.read(data_lst[i]))
-        grid = np.atleast_1d(fh.read(time_lst[i]))
-      else:
-        next_data = np.atleast_1d(fh.read(data_lst[i]))
-        next_grid = np.atleast_1d(fh.read(time_lst[i]))
-        # deal with weird behavior after restart where some data
-        # doesn't have second dimension
-        if len(next_data.shape) < 2:
-          next_data = np.expand_dims(next_data, axis=1)
-        #end
-        data = np.append(data, next_data, axis=0)
-        grid = np.append(grid, next_grid, axis=0)
+    # First pass; the time meshes are small and are used to skip the
+    # chunks outside of the time window and to size the output
+    chunks = []
+    num_cells, num_comps = 0, None
+    for time_nm, data_nm in zip(time_lst, data_lst):
+      # deal with weird behavior after restart where some data
+      # doesn't have second dimension; the number of components still
+      # needs to match
+      shape = [int(v) for v in variables[data_nm]['Shape'].split(',')
+               if v.strip()]
+      comps = shape[1] if len(shape) > 1 else 1
+      if num_comps is None:
+        num_comps = comps
+      elif comps != num_comps:
+        raise ValueError("'{:s}' has {:d} components but the previous diagnostics have {:d}".format(data_nm, comps, num_comps))
+      #end
+      time = np.atleast_1d(fh.read(time_nm))
+      mask = time_window_mask(time, self.tmin, self.tmax)
+      if not mask.any():
+        continue
       #end
+      idx = np.nonzero(mask)[0]
+      lo, up = int(idx[0]), int(idx[-1])+1
+      chunks.append((data_nm, shape, lo, up, time[lo:up], mask[lo:up]))
+      num_cells += int(mask.sum())
     #end
-    fh.close()
+    if num_cells == 0:
+      raise ValueError('No data in the time window')
+    #end
+
+    # Second pass; only the rows spanning the window are read. The
+    # output keeps the real type stored in the file
+    grid, data = None, None
+    cnt = 0
+    for data_nm, shape, lo, up, time, mask in chunks:
+      if shape:
+        start = [lo] + [0]*(len(shape)-1)
+        count = [up-lo] + shape[1:]
+        chunk = fh.read(data_nm, start=start, count=count)
+      else:
+        chunk = np.atleast_1d(fh.read(data_nm))
+      #end
+      chunk = chunk.reshape(up-lo, -1)[mask]
+      if data is None:
+        grid = np.empty(num_cells, dtype=time.dtype)
+        data = np.empty((num_cells, num_comps), dtype=chunk.dtype)
+      #end
+      num = chunk.shape[0]
+      grid[cnt:cnt+num] = time[mask]
+      data[cnt:cnt+num] = chunk
+      cnt += num
     #end
 
-    return [np.squeeze(grid)], data
+    return [grid], data
   #end
 
   # ---- Exposed function ----------------------------------------------
   def preload(self) -> None:
     if self.is_frame:
-      self._preload_frame()
+      with adios_file(self._file_name) as fh:
+        self._preload_frame(fh)
+      #end
       if self.ctx:
         self.ctx['cells'] = self.cells
         self.ctx['lower'] = self.lower
@@ -309,11 +382,13 @@ class Read_gkyl_adios(object):
   def load(self) -> tuple:
     grid, data = None, None
 
-    if self.is_frame:
-      grid, data = self._load_frame()
-    #end
-    if self.is_diagnostic:
-      grid, data = self._load_diagnostic()
+    with adios_file(self._file_name) as fh:
+      if self.is_frame:
+        grid, data = self._load_frame(fh)
+      #end
+      if self.is_diagnostic:
+        grid, data = self._load_diagnostic(fh)
+      #end
     #end
 
     self.ctx['num_comps'] = data.shape[-1]
@@ -1,22 +1,48 @@
 import numpy as np
 import tables
 
+from postgkyl.utils import create_offset_count, time_window_mask
+
 class Read_gkyl_h5(object):
-  """Provides a framework to read gkyl Adios output
+  """Provides a framework to read gkyl HDF5 output
   """
 
   def __init__(self,
                file_name : str,
                ctx : dict = None,
+               axes: tuple = (None, None, None, None, None, None),
+               comp: int = None,
+               tmin: float = None,
+               tmax: float = None,
+               chunk_cache_size: int = None,
                **kwargs) -> None:
     self._file_name = file_name
 
+    self.axes = axes
+    self.comp = comp
+    self.tmin = tmin
+    self.tmax = tmax
+    # Size of the HDF5 chunk cache in bytes (PyTables default when None)
+    self.chunk_cache_size = chunk_cache_size
+
+    self.lower = None
+    self.upper = None
+    self.cells = None
+
     self.is_frame = False
     self.is_diagnostic = False
 
     self.ctx = ctx
   #end
 
+  def _open(self):
+    if self.chunk_cache_size is not None:
+      return tables.open_file(self._file_name, 'r',
+                              chunk_cache_size=int(self.chunk_cache_size))
+    #end
+    return tables.open_file(self._file_name, 'r')
+  #end
+
   def _is_compatible(self) -> bool:
     try:
       fh = tables.open_file(self._file_name, 'r')
@@ -35,55 +61,105 @@ class Read_gkyl_h5(object):
     return self.is_frame or self.is_diagnostic
   #end
 
-  def _read_frame(self) -> tuple:
-    fh = tables.open_file(self._file_name, 'r')
-
+  def _preload_frame(self, fh) -> None:
     # Postgkyl conventions require the attributes to be
     # narrays even for 1D data
-    lower = np.atleast_1d(fh.root.StructGrid._v_attrs.vsLowerBounds)
-    upper = np.atleast_1d(fh.root.StructGrid._v_attrs.vsUpperBounds)
-    cells = np.atleast_1d(fh.root.StructGrid._v_attrs.vsNumCells)
-    if '/timeData' in fh:
+    self.lower = np.atleast_1d(fh.root.StructGrid._v_attrs.vsLowerBounds).astype(np.float64)
+    self.upper = np.atleast_1d(fh.root.StructGrid._v_attrs.vsUpperBounds).astype(np.float64)
+    self.cells = np.atleast_1d(fh.root.StructGrid._v_attrs.vsNumCells).astype(np.int32)
+    if '/timeData' in fh and self.ctx is not None:
       self.ctx['time'] = fh.root.timeData._v_attrs.vsTime
     #end
+  #end
 
-    data = fh.root.StructGridField.read()
-
-    fh.close()
-    return cells, lower, upper, data
-
-  def _read_diagnostic(self):
-    fh = tables.open_file(self._file_name, 'r')
-
-    grid = fh.root.DataStruct.timeMesh.read()
-    data = fh.root.DataStruct.data.read()
-
-    fh.close()
+  def _load_frame(self, fh) -> tuple:
+    num_dims = len(self.cells)
+    grid = [np.linspace(self.lower[d],
+                        self.upper[d],
+                        self.cells[d]+1)
+            for d in range(num_dims)]
+    node = fh.root.StructGridField
+    offset, count = create_offset_count(node.shape, self.axes,
+                                        self.comp, grid)
+    if offset:
+      # PyTables reads only the chunks intersecting the hyperslab
+      data = node[tuple(slice(o, o+c) for o, c in zip(offset, count))]
+
+      # Adjust boundaries for 'offset' and 'count'
+      dz = (self.upper - self.lower) / self.cells
+      offset = np.array(offset[:num_dims])
+      count = np.array(count[:num_dims])
+      self.lower = self.lower + offset*dz
+      self.upper = self.lower + count*dz
+      self.cells = count
+      grid = [np.linspace(self.lower[d],
+                          self.upper[d],
+                          self.cells[d]+1)
+              for d in range(num_dims)]
+    else:
+      data = node.read()
+    #end
+    if self.ctx:
+      self.ctx['grid_type'] = 'uniform'
     #end
+    return grid, data
+  #end
 
-    return [np.squeeze(grid)], [grid[0]], [grid[-1]], data
+  def _load_diagnostic(self, fh) -> tuple:
+    time = np.atleast_1d(np.squeeze(fh.root.DataStruct.timeMesh.read()))
+    node = fh.root.DataStruct.data
+    mask = time_window_mask(time, self.tmin, self.tmax)
+    if not mask.any():
+      raise ValueError('No data in the time window')
+    #end
+    idx = np.nonzero(mask)[0]
+    lo, up = int(idx[0]), int(idx[-1])+1
+    # Only the rows spanning the window are read
+    data = node[lo:up]
+    data = data.reshape(up-lo, -1)[mask[lo:up]]
+    if self.comp is not None:
+      offset, count = create_offset_count(data.shape, (), self.comp)
+      data = data[:, offset[-1]:offset[-1]+count[-1]]
+    #end
+    return [time[mask]], data
   #end
 
   # ---- Exposed function ----------------------------------------------
-  def get_data(self) -> tuple:
-    grid = None
-
+  def preload(self) -> None:
     if self.is_frame:
-      cells, lower, upper, data = self._read_frame()
+      with self._open() as fh:
+        self._preload_frame(fh)
+      #end
+      if self.ctx:
+        self.ctx['cells'] = self.cells
+        self.ctx['lower'] = self.lower
+        self.ctx['upper'] = self.upper
+      #end
     #end
-    if self.is_diagnostic:
-      grid, lower, upper, data = self._read_diagnostic()
-      cells = grid[0].shape
+  #end
+
+  def load(self) -> tuple:
+    grid, data = None, None
+
+    with self._open() as fh:
+      if self.is_frame:
+        grid, data = self._load_frame(fh)
+        # The bounds were adjusted for the cuts
+        if self.ctx:
+          self.ctx['cells'] = self.cells
+          self.ctx['lower'] = self.lower
+          self.ctx['upper'] = self.upper
+        #end
+      #end
+      if self.is_diagnostic:
+        grid, data = self._load_diagnostic(fh)
+      #end
     #end
 
-    num_dims = len(cells)
-    grid = [np.linspace(lower[d],
-                        upper[d],
-                        cells[d]+1)
-            for d in range(num_dims)]
-    if self.ctx:
-      self.ctx['grid_type'] = 'uniform'
+    if self.ctx is not None:
+      self.ctx['num_comps'] = data.shape[-1]
     #end
 
     return grid, data
-  #end
\ No newline at end of file
+  #end
+#end
@@ -33,7 +33,7 @@ def select(data, comp=None, overwrite=False,
   for d, z in enumerate(zs):
     if d < num_dims and z is not None:
       dat_range = bounds[1][d] - bounds[0][d]
-      if '.' in z:
+      if '.' in z and ':' not in z and ',' not in z:
         if bounds[1][d] + 0.25 * dat_range < float(z) or bounds[0][d]  - 0.25 * dat_range > float(z):
           raise TypeError('The coordinate select is outside of the data boundaries')
       if uniform_grid:
@@ -0,0 +1,117 @@
+import numpy as np
+import os.path
+import tables
+
+# Frame cube: many frames with the same grid stored in one compressed
+# HDF5 file. The values of all the frames form a single time-indexed
+# array (frame, cells..., components); the grid, time stamps, and the
+# context are stored only once.
+CUBE_MARK = 'pgkyl_frame_cube'
+# Context entries stored with the cube; the others (bounds, cells,
+# etc.) are given by the grid
+_CTX_KEYS = ('num_cdim', 'num_vdim', 'changeset', 'builddate',
+             'poly_order', 'basis_type', 'is_modal', 'grid_type',
+             'charge', 'mass')
+
+def _chunkshape(cells, num_comps: int, itemsize: int,
+                frames_per_chunk: int = 16,
+                chunk_bytes: int = 2**20) -> tuple:
+  # Chunks span several frames and a compact block of cells. A single
+  # frame then touches 1/frames_per_chunk of the data it decompresses
+  # while the time series of a point needs only 1/frames_per_chunk
+  # chunks per frame. The spatial block is halved along its longest
+  # side until the chunk fits the target size.
+  block = list(cells)
+  while (frames_per_chunk*int(np.prod(block))*num_comps*itemsize > chunk_bytes
+         and max(block) > 1):
+    d = int(np.argmax(block))
+    block[d] = (block[d]+1) // 2
+  #end
+  return (frames_per_chunk, *block, num_comps)
+#end
+
+def _filters(complevel: int, complib: str) -> tables.Filters:
+  if not tables.which_lib_version(complib.split(':')[0]):
+    complib = 'zlib' # always available
+  #end
+  return tables.Filters(complevel=complevel, complib=complib, shuffle=True)
+#end
+
+def _ctx_value(value):
+  if isinstance(value, np.generic):
+    value = value.item()
+  #end
+  if isinstance(value, (bool, int, float, str)):
+    return value
+  #end
+  return None
+#end
+
+def _create(fh, data, filters) -> None:
+  grid = data.get_grid()
+  values = data.get_values()
+  grp = fh.create_group('/', 'grid')
+  for d, g in enumerate(grid):
+    fh.create_array(grp, 'grid_{:d}'.format(d), np.asarray(g))
+  #end
+  atom = tables.Atom.from_dtype(values.dtype)
+  fh.create_earray('/', 'values', atom, (0, *values.shape),
+                   filters=filters,
+                   chunkshape=_chunkshape(values.shape[:-1], values.shape[-1],
+                                          values.dtype.itemsize))
+  fh.create_earray('/', 'time', tables.Float64Atom(), (0,))
+  fh.create_earray('/', 'frame', tables.Int64Atom(), (0,))
+  fh.root._v_attrs[CUBE_MARK] = 1
+  for key in _CTX_KEYS:
+    value = _ctx_value(data.ctx.get(key))
+    if value is not None:
+      fh.root._v_attrs['ctx_' + key] = value
+    #end
+  #end
+#end
+
+def write_frame_cube(out_name: str, data: list, append: bool = False,
+                     complevel: int = 5, complib: str = 'blosc:lz4') -> None:
+  """Writes datasets with the same grid as frames of a frame cube.
+
+  Args:
+    out_name: str
+      The output file name.
+    data: GData or list of GData
+      The frames to write; the grid is taken from the first one.
+    append: bool
+      Append the frames to an existing cube.
+    complevel: int
+      Compression level (0-9).
+    complib: str
+      Compression library; falls back to 'zlib' when the library is
+      not available.
+  """
+  if not isinstance(data, (list, tuple)):
+    data = [data]
+  #end
+  if append and os.path.isfile(out_name):
+    fh = tables.open_file(out_name, 'a')
+    if CUBE_MARK not in fh.root._v_attrs:
+      fh.close()
+      raise ValueError('\'{:s}\' is not a frame cube'.format(out_name))
+    #end
+  else:
+    fh = tables.open_file(out_name, 'w')
+    _create(fh, data[0], _filters(complevel, complib))
+  #end
+  with fh:
+    shape = fh.root.values.shape[1:]
+    for dat in data:
+      values = dat.get_values()
+      if values.shape != shape:
+        raise ValueError('All the frames of a cube must have the same shape; expected {} but got {}'.format(shape, values.shape))
+      #end
+      fh.root.values.append(values[np.newaxis, ...])
+      time = dat.ctx['time']
+      frame = dat.ctx['frame']
+      fh.root.time.append([np.nan if time is None else float(time)])
+      fh.root.frame.append([-1 if frame is None else int(frame)])
+    #end
+  #end
+#end
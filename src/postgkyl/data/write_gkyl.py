@@ -0,0 +1,92 @@
+import numpy as np
+
+# Writer of the gkyl binary files; see read_gkyl.py for the format
+# description. The payload is streamed to the file in contiguous
+# chunks of bounded size so the values are never copied as a whole,
+# e.g., when writing a memory-mapped or non-contiguous array.
+
+_MAGIC = [103, 107, 121, 108, 48] # 'gkyl0'
+_REAL_TYPES = {np.dtype('f4') : 1, np.dtype('f8') : 2}
+
+def _write_payload(fh, values: np.ndarray, dtype: np.dtype,
+                   chunk_size: int) -> None:
+  # Writes 'values' in the row-major order; only blocks of at most
+  # about 'chunk_size' bytes are converted to contiguous arrays
+  row_bytes = values[0].size * dtype.itemsize if len(values) else 0
+  if row_bytes > chunk_size and values.ndim > 1:
+    for row in values:
+      _write_payload(fh, row, dtype, chunk_size)
+    #end
+    return
+  #end
+  step = max(1, chunk_size // max(row_bytes, 1))
+  for i in range(0, len(values), step):
+    # No copy for the contiguous blocks already in the right type
+    np.ascontiguousarray(values[i:i+step], dtype=dtype).tofile(fh)
+  #end
+#end
+
+def write_gkyl(out_name: str,
+               values: np.ndarray,
+               lower: np.ndarray,
+               upper: np.ndarray,
+               dtype: str = 'f8',
+               num_ranges: int = 1,
+               chunk_size: int = 2**26) -> None:
+  """Writes a field into a gkyl file.
+
+  Args:
+    out_name: str
+      The output file name.
+    values: narray
+      (N+1)D array of values with the components last; it can be
+      memory-mapped or non-contiguous.
+    lower, upper: narray
+      The domain bounds.
+    dtype: str
+      Real type of the stored data, 'f8' or 'f4'.
+    num_ranges: int
+      When larger than 1, the multi-range layout (file type 3) is
+      used and the array is split into this many ranges along the
+      first dimension; each range is written separately.
+    chunk_size: int
+      Maximum size in bytes of the blocks written at once.
+  """
+  dti = np.dtype('i8')
+  dtf = np.dtype(dtype)
+  if dtf not in _REAL_TYPES:
+    raise TypeError('The gkyl files support only \'f4\' and \'f8\' data')
+  #end
+  cells = values.shape[:-1]
+  num_dims = len(cells)
+  num_comps = values.shape[-1]
+  file_type = 3 if num_ranges > 1 else 1
+
+  with open(out_name, 'wb') as fh:
+    np.array(_MAGIC, dtype=np.dtype('b')).tofile(fh)
+    # version, file type, meta size
+    np.array([1, file_type, 0], dtype=dti).tofile(fh)
+    np.array([_REAL_TYPES[dtf], num_dims], dtype=dti).tofile(fh)
+    np.array(cells, dtype=dti).tofile(fh)
+    # The bounds are always stored in double precision
+    np.array(lower, dtype=np.dtype('f8')).tofile(fh)
+    np.array(upper, dtype=np.dtype('f8')).tofile(fh)
+    # element size and number of cells
+    np.array([num_comps*dtf.itemsize, np.prod(cells)], dtype=dti).tofile(fh)
+
+    if file_type == 1:
+      _write_payload(fh, values, dtf, chunk_size)
+    else:
+      bounds = np.linspace(0, cells[0], min(num_ranges, cells[0])+1).astype(int)
+      np.array([len(bounds)-1], dtype=dti).tofile(fh)
+      for lo, up in zip(bounds[:-1], bounds[1:]):
+        # Gkeyll ranges are 1-indexed and inclusive
+        loidx = [lo+1] + [1]*(num_dims-1)
+        upidx = [up] + list(cells[1:])
+        size = (up-lo) * int(np.prod(cells[1:]))
+        np.array(loidx + upidx + [size], dtype=dti).tofile(fh)
+        _write_payload(fh, values[lo:up], dtf, chunk_size)
+      #end
+    #end
+  #end
+#end
@@ -0,0 +1,58 @@
+import numpy as np
+
+def _cell_centers(grid: list, num_cells) -> list:
+  centers = []
+  for d, g in enumerate(grid):
+    g = np.asarray(g)
+    if g.ndim > 1:
+      raise ValueError('The txt output supports only rectilinear grids')
+    #end
+    if len(g) == num_cells[d]+1:
+      g = 0.5*(g[1:]+g[:-1]) # nodal grid
+    #end
+    centers.append(g)
+  #end
+  return centers
+#end
+
+def write_txt(out_name: str, grid: list, values: np.ndarray,
+              chunk_rows: int = 65536) -> None:
+  """Writes values into an ASCII file with one cell per row.
+
+  Each row contains the cell center coordinates followed by the
+  components, all separated by commas. The rows are formatted in
+  chunks so the memory stays bounded for large datasets.
+
+  Args:
+    out_name: str
+      The output file name.
+    grid: list of narrays
+      Nodal or cell center grid in each direction; it is not modified.
+    values: narray
+      (N+1)D array of values with the components last; it is not
+      copied.
+    chunk_rows: int
+      Number of rows formatted at once.
+  """
+  num_cells = values.shape[:-1]
+  num_dims = len(num_cells)
+  num_comps = values.shape[-1]
+  num_rows = int(np.prod(num_cells))
+  centers = _cell_centers(grid, num_cells)
+
+  row_fmt = ', '.join(['%.15e']*(num_dims+num_comps)) + '\n'
+  block = np.empty((min(chunk_rows, num_rows), num_dims+num_comps))
+  with open(out_name, 'w', buffering=2**20) as fh:
+    for start in range(0, num_rows, chunk_rows):
+      stop = min(start+chunk_rows, num_rows)
+      num = stop-start
+      # Row-major (C) order of the cells
+      idxs = np.unravel_index(np.arange(start, stop), num_cells)
+      for d in range(num_dims):
+        block[:num, d] = centers[d][idxs[d]]
+      #end
+      block[:num, num_dims:] = values[idxs]
+      fh.write((row_fmt*num) % tuple(block[:num].ravel()))
+    #end
+  #end
+#end
@@ -239,7 +239,7 @@ def plot(data, args=(),
     #end
   else:
     if squeeze:  # Plotting into 1 panel
-      plt.subplots(1, 1, num=fig.number)
+      fig.subplots(1, 1)
       ax = fig.axes
       ax[0].set_xlabel(xlabel)
       ax[0].set_ylabel(ylabel)
@@ -268,13 +268,9 @@ def plot(data, args=(),
       #end
 
       if num_dims == 1 or lineouts is not None:
-        plt.subplots(num_rows, num_cols,
-                     sharex=True,
-                     num=fig.number)
+        fig.subplots(num_rows, num_cols, sharex=True)
       else: # In 2D, share y-axis as well
-        plt.subplots(num_rows, num_cols,
-                     sharex=True, sharey=True,
-                     num=fig.number)
+        fig.subplots(num_rows, num_cols, sharex=True, sharey=True)
       #end
       ax = fig.axes
       # Removing extra axes
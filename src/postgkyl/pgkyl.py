@@ -9,9 +9,10 @@ import os.path
 import click
 
 from postgkyl.commands import DataSpace
-from postgkyl.commands.util import load_style, verb_print
+from postgkyl.commands.util import load_style, parse_memory, verb_print
 import postgkyl.commands as cmd
 from postgkyl import __version__
+from postgkyl.utils import FileWatcher
 
 # Version print helper
 def _printVersion(ctx, param, value):
@@ -31,6 +32,7 @@ def _printVersion(ctx, param, value):
 # Custom click class that allows to
 #   a) use shortened versions of command names
 #   b) use a file name as a command
+#   c) rerun the command chain on new files in the follow mode
 class PgkylCommandGroup(click.Group):
   def get_command(self, ctx, cmd_name):
     # cmd_name is a full name of a pgkyl command
@@ -56,6 +58,66 @@ class PgkylCommandGroup(click.Group):
 
     ctx.fail("'{:s}' does not match either command name nor a data file".format(cmd_name))
   #end
+
+  def resolve_command(self, ctx, args):
+    # The first call gets the whole command chain; it is kept for
+    # rerunning the chain in the follow mode
+    ctx.meta.setdefault('pgkyl.chain', list(args))
+    return click.Group.resolve_command(self, ctx, args)
+  #end
+
+  def _rerun_chain(self, ctx):
+    # Only the subcommands are rerun on the same DataSpace. The results
+    # of the previous pass are replaced by the new frames so the memory
+    # does not grow over a long session; the frame offsets keep the
+    # '--saveframes' numbering going.
+    data = ctx.obj['data']
+    for dat in list(data.iterator(only_active=False)):
+      tag = dat.get_tag()
+      ctx.obj['frame_offset'][tag] = ctx.obj['frame_offset'].get(tag, 0) + 1
+      data.remove(dat)
+    #end
+    ctx.obj['inDataStrings'] = []
+    ctx.obj['inDataStringsLoaded'] = 0
+    args = list(ctx.meta['pgkyl.chain'])
+    contexts = []
+    while args:
+      cmd_name, cmd, args = self.resolve_command(ctx, args)
+      sub_ctx = cmd.make_context(cmd_name, args, parent=ctx,
+                                 allow_extra_args=True,
+                                 allow_interspersed_args=False)
+      contexts.append(sub_ctx)
+      args, sub_ctx.args = sub_ctx.args, []
+    #end
+    for sub_ctx in contexts:
+      with sub_ctx:
+        sub_ctx.command.invoke(sub_ctx)
+      #end
+    #end
+  #end
+
+  def invoke(self, ctx):
+    if not ctx.params.get('follow'):
+      return click.Group.invoke(self, ctx)
+    #end
+    # The 'load' command takes only the new complete files from the
+    # watcher; the chain is then rerun whenever new files appear
+    watcher = FileWatcher()
+    ctx.meta['pgkyl.watcher'] = watcher
+    try:
+      click.Group.invoke(self, ctx)
+      while True:
+        while not watcher.has_new():
+          time.sleep(ctx.params['poll'])
+        #end
+        with ctx:
+          self._rerun_chain(ctx)
+        #end
+      #end
+    except KeyboardInterrupt:
+      pass
+    #end
+  #end
 #end
 
 # The command line mode entry command
@@ -82,8 +144,18 @@ class PgkylCommandGroup(click.Group):
               help="Specify the file name containing c2p mapped coordinates")
 @click.option('--c2p-vel', 'c2p_vel',
               help="Specify the file name containing c2p mapped velocity coordinates")
+@click.option('--mmap', is_flag=True,
+              help="Memory-map 'gkyl' files instead of reading them into memory.")
+@click.option('--max-memory', 'max_memory',
+              help="Memory budget for the loaded data, e.g., '8G'; the values are read from the files on the first access instead of at load time, and the least recently used datasets are unloaded and reread when needed, so these values are read-only.")
+@click.option('--dtype', type=click.Choice(['float32', 'float64']),
+              help="Real type of the loaded data; 'float32' halves the memory and bandwidth. By default, the type stored in the files is kept.")
 @click.option('--style',
               help="Sets Maplotlib rcParams style file.")
+@click.option('--follow', is_flag=True,
+              help="Keep watching the loaded files and rerun the command chain on the new frames once they are completely written; the results of the previous run are replaced (stop with Ctrl-C).")
+@click.option('--poll', type=click.FLOAT, default=5.0, show_default=True,
+              help="Polling interval in seconds for '--follow'.")
 @click.pass_context
 def cli(ctx, **kwargs):
   """Postprocessing and plotting tool for Gkeyll
@@ -107,12 +179,22 @@ def cli(ctx, **kwargs):
   ctx.obj['inDataStrings'] = []
   ctx.obj['inDataStringsLoaded'] = 0
 
-  ctx.obj['data'] = DataSpace()
+  try:
+    max_memory = parse_memory(kwargs['max_memory'])
+  except ValueError:
+    ctx.fail("Invalid value for '--max-memory': {:s}".format(kwargs['max_memory']))
+  #end
+  ctx.obj['max_memory'] = max_memory
+  ctx.obj['data'] = DataSpace(max_memory)
 
   ctx.obj['fig'] = ''
   ctx.obj['ax'] = ''
 
+  ctx.obj['follow'] = kwargs['follow']
+  ctx.obj['frame_offset'] = {} # tag -> frames of the previous follow passes
   ctx.obj['compgrid'] = kwargs['compgrid']
+  ctx.obj['mmap'] = kwargs['mmap']
+  ctx.obj['dtype'] = kwargs['dtype']
   ctx.obj['globalVarNames'] = kwargs['varname']
   ctx.obj['globalCuts'] = (kwargs['z0'], kwargs['z1'],
                            kwargs['z2'], kwargs['z3'],
@@ -142,6 +224,7 @@ cli.add_command(cmd.ev)
 cli.add_command(cmd.extractinput)
 cli.add_command(cmd.fft)
 cli.add_command(cmd.growth)
+cli.add_command(cmd.index)
 cli.add_command(cmd.info)
 cli.add_command(cmd.integrate)
 cli.add_command(cmd.interpolate)
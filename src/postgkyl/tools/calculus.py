@@ -1,5 +1,19 @@
 import numpy as np
 
+def weighted_sum(values, weights):
+    """Sums 'values' along the last axis with 'weights'
+
+    Single precision values are accumulated in double precision to
+    limit the round-off of long sums; the result is cast back so the
+    precision of the data is kept.
+    """
+    if values.dtype == np.float32:
+        out = np.einsum('...i,i->...', values, weights, dtype=np.float64)
+        return out.astype(np.float32)
+    #end
+    return np.dot(values, weights)
+#end
+
 def integrate(data, axis, overwrite=False, stack=False):
     if stack:
         overwrite = stack
@@ -48,7 +62,7 @@ def integrate(data, axis, overwrite=False, stack=False):
     for ax in sorted(axis, reverse=True):
         if len(grid[ax]) > 1:
             values = np.moveaxis(values, ax, -1)
-            values = np.dot(values, dz[ax])
+            values = weighted_sum(values, dz[ax])
         else:
             values = values.mean(axis=ax)
         #end
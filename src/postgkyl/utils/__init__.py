@@ -1 +1,5 @@
 from .idx_parser import idxParser
+from .hyperslab import create_offset_count
+from .time_window import time_window_mask
+from .file_watcher import FileWatcher
+from .real_type import real_type
@@ -0,0 +1,52 @@
+import os
+import time
+from glob import glob
+
+class FileWatcher(object):
+  """Stat-based scanner of the files matching glob patterns.
+
+  A file is considered complete once its size and modification time
+  did not change between two checks or when it was not modified for
+  'settle' seconds. Each complete file is handed out only once.
+  """
+
+  def __init__(self, settle: float = 2.0) -> None:
+    self.settle = settle
+    self._processed = {} # pattern -> set of handed out files
+    self._seen = {} # file -> (size, mtime) at the last check
+  #end
+
+  def _is_stable(self, file_name: str) -> bool:
+    try:
+      stat = os.stat(file_name)
+    except OSError:
+      return False
+    #end
+    key = (stat.st_size, stat.st_mtime_ns)
+    previous = self._seen.get(file_name)
+    self._seen[file_name] = key
+    return previous == key or time.time() - stat.st_mtime > self.settle
+  #end
+
+  def take(self, pattern: str, files: list) -> list:
+    """Returns the complete files which were not handed out before for
+    the pattern."""
+    done = self._processed.setdefault(pattern, set())
+    new = [fn for fn in files
+           if fn not in done and self._is_stable(fn)]
+    done.update(new)
+    return new
+  #end
+
+  def has_new(self) -> bool:
+    """Checks if any of the watched patterns has new complete files."""
+    for pattern, done in self._processed.items():
+      for fn in glob(pattern):
+        if fn not in done and 'restart' not in fn and self._is_stable(fn):
+          return True
+        #end
+      #end
+    #end
+    return False
+  #end
+#end
@@ -0,0 +1,61 @@
+import numpy as np
+
+from postgkyl.utils.idx_parser import idxParser
+
+def create_offset_count(dims, zs, comp, grid=None) -> tuple:
+  """Converts partial load cuts to the offset and count of a hyperslab.
+
+  Args:
+    dims: Shape of the stored array; the last dimension stores the
+      components.
+    zs: Cuts in the individual directions (index, value, or slice).
+    comp: Cut of the components (index or slice).
+    grid: Nodal grid used to convert values to indices.
+
+  Returns:
+    offset, count: Tuples with the start and the length of the
+      hyperslab in each dimension or two empty tuples when no cut
+      was requested.
+  """
+  num_dims = len(dims)
+  count = np.array(dims)
+  offset = np.zeros(num_dims, np.int32)
+  cnt = 0
+  for d, z in enumerate(zs):
+    if d < num_dims-1 and z is not None:  # Last dim stores comp
+      z = idxParser(z, grid[d] if grid is not None else None)
+      if isinstance(z, int):
+        offset[d] = z
+        count[d] = 1
+      elif isinstance(z, slice):
+        stop = min(z.stop, dims[d]) if z.stop is not None else dims[d]
+        offset[d] = z.start
+        count[d] = stop - z.start
+      else:
+        raise TypeError('\'z\' is neither number or slice')
+      #end
+      cnt = cnt + 1
+    #end
+  #end
+
+  if comp is not None:
+    comp = idxParser(comp)
+    if isinstance(comp, int):
+      offset[-1] = comp
+      count[-1] = 1
+    elif isinstance(comp, slice):
+      stop = min(comp.stop, dims[-1]) if comp.stop is not None else dims[-1]
+      offset[-1] = comp.start
+      count[-1] = stop - comp.start
+    else:
+      raise TypeError('\'comp\' is neither number or slice')
+    #end
+    cnt = cnt + 1
+  #end
+
+  if cnt > 0:
+    return tuple(offset), tuple(count)
+  else:
+    return (), ()
+  #end
+#end
@@ -0,0 +1,12 @@
+import numpy as np
+
+def real_type(values) -> type:
+  """Returns the real type in which results computed from 'values' are
+  stored: single precision data are kept in single precision and
+  everything else (including integers) is promoted to double.
+  """
+  if np.asarray(values).dtype == np.float32:
+    return np.float32
+  #end
+  return np.float64
+#end
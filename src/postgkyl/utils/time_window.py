@@ -0,0 +1,16 @@
+import numpy as np
+
+def time_window_mask(time: np.ndarray, tmin: float = None,
+                     tmax: float = None) -> np.ndarray:
+  """Returns a mask of the time stamps in the closed window
+  [tmin, tmax]; unspecified bounds are not limiting.
+  """
+  mask = np.ones(time.shape, dtype=bool)
+  if tmin is not None:
+    mask &= time >= tmin
+  #end
+  if tmax is not None:
+    mask &= time <= tmax
+  #end
+  return mask
+#end
@@ -0,0 +1,12 @@
+import pytest
+
+import postgkyl as pg
+
+
+@pytest.fixture(autouse=True)
+def matrix_cache_dir(tmp_path, monkeypatch):
+  # Keep the on-disk DG matrix cache out of the user's home directory
+  monkeypatch.setenv('PGKYL_CACHE_DIR', str(tmp_path / 'matrix_cache'))
+  yield
+  pg.data.matrix_cache.clear_matrix_cache()
+#end
@@ -29,6 +29,19 @@ class TestGkylInterpolate:
     assert np.array_equal(values.shape, (16, 16, 1))
   #end
 
+  def test_ser_p2_comps(self):  # All the components in one pass
+    data = pg.GData('{:s}/test_data/twostream-f-p2.gkyl'.format(self.dir_path))
+    values = np.tile(data.get_values(), 3) * np.repeat([1.0, -2.0, 0.5], 8)
+    data.push(data.get_grid(), values)
+    dg = pg.GInterpModal(data, poly_order=2, basis_type='ms')
+    _, ref = dg.interpolate(0)
+    for comp in [(0, 1, 2), (2, 0), slice(1, 3)]:
+      _, values = dg.interpolate(comp)
+      scale = np.array([1.0, -2.0, 0.5])[pg.data.dg._compList(comp)]
+      assert np.allclose(values, ref*scale)
+    #end
+  #end
+
   def test_ser_p1_c2p(self):
     data = pg.GData(
       '{:s}/test_data/shock-f-ser-p1.gkyl'.format(self.dir_path),
@@ -46,4 +59,83 @@ class TestGkylInterpolate:
     grid, values = dg.interpolate()
     assert np.array_equal(values.shape, (16, 16, 1))
   #end
+
+  def test_matrix_cache(self, tmp_path, monkeypatch):
+    monkeypatch.setenv('PGKYL_CACHE_DIR', str(tmp_path))
+    pg.data.matrix_cache.clear_matrix_cache()
+    data = pg.GData('{:s}/test_data/shock-f-ten-p1.gkyl'.format(self.dir_path))
+    _, ref = pg.GInterpModal(data, poly_order=1, basis_type='mt').interpolate()
+    cache_dir = pg.data.matrix_cache.get_cache_dir()
+    assert len(os.listdir(cache_dir)) == 1
+    # The matrix is read back from the disk after the memo is cleared
+    pg.data.matrix_cache.clear_matrix_cache()
+    _, values = pg.GInterpModal(data, poly_order=1, basis_type='mt').interpolate()
+    assert np.array_equal(values, ref)
+    pg.data.matrix_cache.clear_matrix_cache(disk=True)
+    assert len(os.listdir(cache_dir)) == 0
+  #end
+
+  def test_modal_basis(self):  # Numerical bases match the symbolic ones
+    from postgkyl.data.computeInterpolationMatrices import createInterpMatrix
+    from postgkyl.data.computeDerivativeMatrices import createDerivativeMatrix
+    for dim, p, basis, c2p in [(1, 3, 'serendipity', True),
+                               (2, 3, 'maximal-order', False),
+                               (3, 2, 'serendipity', False),
+                               (2, 2, 'tensor', True),
+                               (3, 1, 'gkhybrid', True),
+                               (2, 1, 'hybrid', False)]:
+      ref = createInterpMatrix(dim, p, basis, p+1, True, c2p)
+      mat = pg.data.modal_basis.interp_matrix(dim, p, basis, p+1, c2p)
+      assert np.allclose(mat, ref, rtol=1e-12, atol=1e-12)
+    #end
+    ref = createDerivativeMatrix(2, 2, 'serendipity', 3, True)
+    mat = pg.data.modal_basis.derivative_matrix(2, 2, 'serendipity', 3)
+    assert np.allclose(mat, ref, rtol=1e-12, atol=1e-12)
+  #end
+
+  def test_sum_factorization(self):  # Matches the full matrix
+    mb = pg.data.modal_basis
+    rng = np.random.default_rng(0)
+    for dim, p, basis, c2p in [(3, 2, 'serendipity', False),
+                               (4, 2, 'tensor', True),
+                               (5, 1, 'gkhybrid', False)]:
+      exps, ops = mb.interp_factors(dim, p, basis, p+1, c2p)
+      mat = mb.interp_matrix(dim, p, basis, p+1, c2p)
+      q = rng.standard_normal((7, 5, len(exps)))
+      values = mb.apply_factors(q, exps, ops, block_bytes=2**10)
+      ref = (q @ mat.T).reshape(values.shape)
+      assert np.allclose(values, ref, rtol=1e-12, atol=1e-12)
+    #end
+    # Integer coefficients are promoted to double like with the matrix
+    exps, ops = mb.interp_factors(4, 2, 'serendipity', 3)
+    mat = mb.interp_matrix(4, 2, 'serendipity', 3)
+    q = rng.integers(-9, 10, (6, len(exps)))
+    values = mb.apply_factors(q, exps, ops)
+    assert values.dtype == np.float64
+    assert np.allclose(values.reshape(6, -1), q.astype(float) @ mat.T,
+                       rtol=1e-12, atol=1e-12)
+    values = pg.data.dg._interpOnMesh(None, q.reshape(2, 3, 1, 1, -1), 3,
+                                      'serendipity', factors=(exps, ops))
+    assert values.dtype == np.float64
+  #end
+
+  def test_chunked(self, tmp_path):  # Out-of-core interpolation
+    data = pg.GData('{:s}/test_data/twostream-f-p2.gkyl'.format(self.dir_path))
+    dg = pg.GInterpModal(data, poly_order=2, basis_type='ms')
+    grid, ref = dg.interpolate()
+    # Tiles of a few cells along both directions
+    _, values = dg.interpolate(chunk_mem=2**12, chunk_axes=(0, 1))
+    assert isinstance(values, np.memmap)
+    assert np.array_equal(values, ref)
+    out_file = str(tmp_path / 'f.npy')
+    dg.interpolate(chunk_mem=2**16, out_file=out_file, overwrite=True)
+    assert np.array_equal(np.load(out_file), ref)
+    assert np.array_equal(data.get_grid()[1], grid[1])
+  #end
+
+  def test_tensor_num_nodes(self):  # 5D p2 tensor basis has 3^5 nodes
+    assert pg.data.dg._getNumNodes(5, 2, 'tensor') == 243
+    basis, poly_order = pg.data.dg._get_basis_p(5, 243)
+    assert basis == 'tensor' and poly_order == 2
+  #end
 #end
@@ -1,5 +1,7 @@
-#import pytest
+import pytest
 import os
+import shutil
+import warnings
 import numpy as np
 
 import postgkyl as pg
@@ -22,18 +24,420 @@ class TestGkyl:
     assert np.array_equal(num_cells, (8, 8))
   #end
 
+  def test_gkyl_type1_c2p_shared(self):  # Mapping shared by the frames
+    data = [pg.GData('{:s}shock-f-ser-p1.gkyl'.format(self.dir_path),
+                     mapc2p_name='{:s}shock-rtheta-ser.gkyl'.format(self.dir_path))
+            for _ in range(2)]
+    assert data[0].get_grid()[0] is data[1].get_grid()[0]
+    assert not data[0].get_grid()[0].flags.writeable
+    grids = [pg.GInterpModal(dat, 1, 'ms').interpolate()[0] for dat in data]
+    assert grids[0][1] is grids[1][1]
+    pg.data.geometry_cache.clear_geometry_cache()
+    ref = pg.GData('{:s}shock-f-ser-p1.gkyl'.format(self.dir_path),
+                   mapc2p_name='{:s}shock-rtheta-ser.gkyl'.format(self.dir_path))
+    ref_grid, _ = pg.GInterpModal(ref, 1, 'ms').interpolate()
+    assert ref_grid[1] is not grids[0][1]
+    assert np.array_equal(ref_grid[1], grids[0][1])
+  #end
+
   def test_gkyl_type2(self):  # Dynvector
     data = pg.GData('{:s}twostream-field-energy.gkyl'.format(self.dir_path))
     num_cells = data.get_num_cells()
     assert np.array_equal(num_cells, (6113,))
   #end
 
+  def test_gkyl_type2_follow(self, tmp_path):  # Dynvector being appended
+    with open('{:s}twostream-field-energy.gkyl'.format(self.dir_path), 'rb') as fh:
+      raw = fh.read()
+    #end
+    file_name = str(tmp_path / 'field-energy.gkyl')
+    with open(file_name, 'wb') as fh:
+      fh.write(raw[:1000]) # first chunk and a part of the second one
+    #end
+    data = pg.GData(file_name)
+    assert np.array_equal(data.get_num_cells(), (1,))
+    assert not data.follow()
+    with open(file_name, 'ab') as fh:
+      fh.write(raw[1000:])
+    #end
+    assert data.follow()
+    ref = pg.GData('{:s}twostream-field-energy.gkyl'.format(self.dir_path))
+    assert np.array_equal(data.get_num_cells(), (6113,))
+    assert np.array_equal(data.get_values(), ref.get_values())
+
+    # The reader can follow only what it has loaded; GData loads first
+    from postgkyl.data.read_gkyl import Read_gkyl
+    reader = Read_gkyl(file_name)
+    reader.preload()
+    with pytest.raises(RuntimeError):
+      reader.follow()
+    #end
+    lazy = pg.GData(file_name, load=False)
+    assert not lazy.follow()
+    assert np.array_equal(lazy.get_values(), ref.get_values())
+    assert np.array_equal(data.get_grid()[0], ref.get_grid()[0])
+  #end
+
+  def test_gkyl_type2_window(self):  # Dynvector within a time window
+    ref = pg.GData('{:s}twostream-field-energy.gkyl'.format(self.dir_path))
+    data = pg.GData('{:s}twostream-field-energy.gkyl'.format(self.dir_path),
+                    tmin=10.0, tmax=20.0)
+    time = ref.get_grid()[0]
+    mask = (time >= 10.0) & (time <= 20.0)
+    assert np.array_equal(data.get_grid()[0], time[mask])
+    assert np.array_equal(data.get_values(), ref.get_values()[mask])
+  #end
+
   def test_gkyl_type3(self):  # Frame with distributed memory
     data = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path))
     num_cells = data.get_num_cells()
     assert np.array_equal(num_cells, (50, 50))
   #end
 
+  def test_gkyl_mmap(self):  # Frame backed by a memory map
+    data = pg.GData('{:s}shock-f-ser-p1.gkyl'.format(self.dir_path), mmap=True)
+    ref = pg.GData('{:s}shock-f-ser-p1.gkyl'.format(self.dir_path))
+    assert isinstance(data.get_values(), np.memmap)
+    assert not data.get_values().flags.writeable
+    assert np.array_equal(data.get_values(), ref.get_values())
+  #end
+
+  def test_gkyl_partial(self):  # Hyperslab load of a frame
+    full = pg.GData('{:s}bimaxwellian-elc.gkyl'.format(self.dir_path))
+    data = pg.GData('{:s}bimaxwellian-elc.gkyl'.format(self.dir_path),
+                    z1='3:9', z2='2', comp='4:7')
+    grid, values = pg.data.select(full, z1='3:9', z2='2', comp='4:7')
+    assert np.array_equal(data.get_values(), values)
+    assert np.array_equal(data.get_num_cells(), (2, 6, 1))
+    assert np.allclose(data.get_grid()[1], grid[1])
+  #end
+
+  def test_gkyl_type3_partial(self):  # Hyperslab load of a multi-range frame
+    full = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path))
+    data = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path),
+                    z0='0.5', comp='0')
+    _, values = pg.data.select(full, z0='0.5', comp='0')
+    assert np.array_equal(data.get_values(), values)
+  #end
+
+  def test_gkyl_type3_ranges(self):  # Decomposition of a multi-range frame
+    reader = pg.data.Read_gkyl('{:s}hll-euler.gkyl'.format(self.dir_path))
+    table = reader.get_range_table()
+    assert len(table) == 4
+    assert np.sum(table['size']) == 50*50
+    data = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path), num_threads=4)
+    ref = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path))
+    assert np.array_equal(data.get_values(), ref.get_values())
+  #end
+
+  def test_gkyl_catalog(self, tmp_path):  # Headers from the sidecar index
+    for fn in ['hll-euler.gkyl', 'twostream-f-p2.gkyl']:
+      shutil.copy('{:s}{:s}'.format(self.dir_path, fn), tmp_path)
+    #end
+    catalog = pg.data.build_catalog(str(tmp_path))
+    assert len(catalog.records) == 2
+    catalog = pg.data.Catalog(str(tmp_path))
+    for fn in ['hll-euler.gkyl', 'twostream-f-p2.gkyl']:
+      record = catalog.get('{:s}/{:s}'.format(str(tmp_path), fn))
+      data = pg.GData('{:s}/{:s}'.format(str(tmp_path), fn), record=record)
+      ref = pg.GData('{:s}{:s}'.format(self.dir_path, fn))
+      assert np.array_equal(data.get_values(), ref.get_values())
+      assert data.ctx['frame'] == ref.ctx['frame']
+      assert data.ctx['poly_order'] == ref.ctx['poly_order']
+    #end
+    # Modified files are rescanned
+    fn = '{:s}/hll-euler.gkyl'.format(str(tmp_path))
+    with open(fn, 'ab') as fh:
+      fh.write(b'\0')
+    #end
+    assert catalog.get(fn) is None
+    assert catalog.update([fn])[fn]['size'] == os.path.getsize(fn)
+  #end
+
+  def test_gkyl_load_files(self):  # Concurrent load of multiple files
+    files = ['{:s}{:s}'.format(self.dir_path, fn) for fn in
+             ['shock-f-ser-p1.gkyl', 'hll-euler.gkyl', 'twostream-f-p2.gkyl']]
+    data = pg.data.load_files(files, jobs=3)
+    for dat, fn in zip(data, files):
+      ref = pg.GData(fn)
+      assert np.array_equal(dat.get_values(), ref.get_values())
+    #end
+  #end
+
+  def test_gkyl_lazy(self):  # Lazy load and the memory budget
+    files = ['{:s}{:s}'.format(self.dir_path, fn) for fn in
+             ['bimaxwellian-elc.gkyl', 'twostream-f-p2.gkyl']]
+    space = pg.commands.DataSpace(max_memory=14000)
+    data = [pg.GData(fn, load=False, z0='1') for fn in files]
+    for dat in data:
+      space.add(dat)
+      assert not dat.is_loaded()
+    #end
+    for _ in range(2):
+      for dat, fn in zip(data, files):
+        ref = pg.GData(fn, z0='1')
+        assert np.array_equal(dat.get_values(), ref.get_values())
+        assert np.array_equal(dat.get_num_cells(), ref.get_num_cells())
+      #end
+      # The first dataset was unloaded to keep the budget
+      assert not data[0].is_loaded()
+      assert space.getUsedMemory() <= 14000
+    #end
+    # In-place edits would be lost on unloading; the values are
+    # read-only and the modified ones have to be set explicitly
+    values = data[0].get_values()
+    with pytest.raises(ValueError):
+      values[...] *= 2
+    #end
+    data[0].set_values(values*2)
+    data[1].get_values()
+    assert data[0].is_loaded() and data[0].is_dirty()
+    ref = pg.GData(files[0], z0='1')
+    assert np.array_equal(data[0].get_values(), 2*ref.get_values())
+    # The removed datasets stop counting against the budget
+    used = space.getUsedMemory()
+    space.remove(data[0])
+    assert space.getUsedMemory() == used - data[0].get_nbytes()
+    assert list(space.iterator()) == [data[1]]
+    # and so do the datasets dropped by the caller
+    used = space.getUsedMemory()
+    extra = pg.GData(files[1], z0='1')
+    extra._on_access = space._touch
+    extra.get_values()
+    assert space.getUsedMemory() > used
+    del extra
+    assert space.getUsedMemory() == used
+  #end
+
+  def test_reader_dispatch(self, tmp_path):  # Format from the magic bytes
+    from postgkyl.data.dispatch import sniff_reader
+    assert sniff_reader('{:s}hll-euler.gkyl'.format(self.dir_path)) == 'gkyl'
+    assert sniff_reader('{:s}twostream-f-p2.bp'.format(self.dir_path)) == 'adios'
+    fn = str(tmp_path / 'out.txt')
+    with open(fn, 'w') as fh:
+      fh.write('spam')
+    #end
+    assert sniff_reader(fn) is None
+  #end
+
+  def test_h5_partial(self, tmp_path):  # Hyperslab load of an HDF5 frame
+    import tables
+    values = np.arange(8*6*3, dtype=np.float64).reshape(8, 6, 3)
+    fn = str(tmp_path / 'frame.h5')
+    with tables.open_file(fn, 'w') as fh:
+      grid = fh.create_group('/', 'StructGrid')
+      grid._v_attrs.vsLowerBounds = np.array([0.0, -1.0])
+      grid._v_attrs.vsUpperBounds = np.array([1.0, 2.0])
+      grid._v_attrs.vsNumCells = np.array([8, 6])
+      fh.create_carray('/', 'StructGridField', obj=values, chunkshape=(2, 6, 3))
+    #end
+    data = pg.GData(fn, z0='2:5', z1='1', comp='2', reader_name='h5',
+                    chunk_cache_size=2**20)
+    assert np.array_equal(data.get_values(), values[2:5, 1:2, 2:3])
+    assert np.array_equal(data.get_num_cells(), (3, 1))
+    assert np.allclose(data.get_grid()[0], [0.25, 0.375, 0.5, 0.625])
+    assert np.allclose(data.get_grid()[1], [-0.5, 0.0])
+    # Time series within a time window
+    time = np.linspace(0.0, 1.0, 11)
+    fn = str(tmp_path / 'diag.h5')
+    with tables.open_file(fn, 'w') as fh:
+      fh.create_group('/', 'DataStruct')
+      fh.create_array('/DataStruct', 'timeMesh', time.reshape(-1, 1))
+      fh.create_array('/DataStruct', 'data', np.stack([time, 2*time], axis=1))
+    #end
+    data = pg.GData(fn, comp='1', tmin=0.25, tmax=0.55)
+    assert np.allclose(data.get_grid()[0], [0.3, 0.4, 0.5])
+    assert np.allclose(data.get_values(), [[0.6], [0.8], [1.0]])
+  #end
+
+  def test_flash(self, tmp_path):  # FLASH blocks scattered to a uniform grid
+    import tables
+    # A coarse leaf block on [0, 1]x[0, 1] and a refined parent block on
+    # [1, 2]x[0, 1] with four leaf children; 2x2 cells per block
+    coord = np.array([[0.5, 0.5], [1.5, 0.5], [1.25, 0.25], [1.75, 0.25],
+                      [1.25, 0.75], [1.75, 0.75]])
+    bsize = np.array([[1.0, 1.0], [1.0, 1.0]] + [[0.5, 0.5]]*4)
+    ntype = np.array([1, 2, 1, 1, 1, 1], dtype=np.int32)
+    dens = np.arange(6*2*2, dtype=np.float64).reshape(6, 1, 2, 2) # (b, z, y, x)
+    fn = str(tmp_path / 'flash_hdf5_chk_0000')
+    with tables.open_file(fn, 'w') as fh, warnings.catch_warnings():
+      warnings.simplefilter('ignore', tables.NaturalNameWarning)
+      fh.create_array('/', 'coordinates', np.hstack([coord, np.zeros((6, 1))]))
+      fh.create_array('/', 'block size', np.hstack([bsize, np.zeros((6, 1))]))
+      fh.create_array('/', 'node type', ntype)
+      fh.create_array('/', 'dens', dens)
+      fh.create_array('/', 'tele', 2*dens)
+    #end
+    ref = np.zeros((8, 4))
+    ref[:4, :] = np.kron(dens[0, 0].T, np.ones((2, 2)))
+    for b, (i, j) in zip(range(2, 6), [(4, 0), (6, 0), (4, 2), (6, 2)]):
+      ref[i:i+2, j:j+2] = dens[b, 0].T
+    #end
+    data = pg.GData(fn, var_name=['dens', 'tele'])
+    assert np.array_equal(data.get_num_cells(), (8, 4))
+    assert np.array_equal(data.get_values()[..., 0], ref)
+    assert np.array_equal(data.get_values()[..., 1], 2*ref)
+    assert np.allclose(data.get_grid()[0], np.linspace(0, 2, 9))
+  #end
+
+  def test_flash_boundary(self, tmp_path):  # FLASH blocks do not overlap
+    import tables
+    # The coarse leaf block on [1, 2]x[0, 1] is stored before the refined
+    # blocks on its left, which are stored from the top; each block has to
+    # fill only its own cells (the former scatter loop also overwrote the
+    # first row and column past each cell)
+    coord = np.array([[1.5, 0.5], [0.5, 0.5], [0.25, 0.75], [0.75, 0.75],
+                      [0.25, 0.25], [0.75, 0.25]])
+    bsize = np.array([[1.0, 1.0], [1.0, 1.0]] + [[0.5, 0.5]]*4)
+    ntype = np.array([1, 2, 1, 1, 1, 1], dtype=np.int32)
+    dens = np.repeat(np.arange(6.0), 4).reshape(6, 1, 2, 2) # (b, z, y, x)
+    fn = str(tmp_path / 'flash_hdf5_chk_0000')
+    with tables.open_file(fn, 'w') as fh, warnings.catch_warnings():
+      warnings.simplefilter('ignore', tables.NaturalNameWarning)
+      fh.create_array('/', 'coordinates', np.hstack([coord, np.zeros((6, 1))]))
+      fh.create_array('/', 'block size', np.hstack([bsize, np.zeros((6, 1))]))
+      fh.create_array('/', 'node type', ntype)
+      fh.create_array('/', 'dens', dens)
+    #end
+    ref = np.array([[4, 4, 2, 2],
+                    [4, 4, 2, 2],
+                    [5, 5, 3, 3],
+                    [5, 5, 3, 3]] + [[0, 0, 0, 0]]*4, dtype=np.float64)
+    data = pg.GData(fn, var_name='dens')
+    assert np.array_equal(data.get_values()[..., 0], ref)
+  #end
+
+  def test_flash_amr(self, tmp_path):  # FLASH blocks at the native resolution
+    import tables
+    # A coarse leaf block on [0, 1]^3 and a refined parent block on
+    # [1, 2]x[0, 1]^2 with eight leaf children; 2x2x2 cells per block
+    corners = [(1.0 + 0.5*i, 0.5*j, 0.5*k)
+               for k in range(2) for j in range(2) for i in range(2)]
+    coord = np.array([[0.5, 0.5, 0.5], [1.5, 0.5, 0.5]] +
+                     [[x+0.25, y+0.25, z+0.25] for x, y, z in corners])
+    bsize = np.array([[1.0]*3]*2 + [[0.5]*3]*8)
+    ntype = np.array([1, 2] + [1]*8, dtype=np.int32)
+    dens = np.random.rand(10, 2, 2, 2) # (b, z, y, x)
+    fn = str(tmp_path / 'flash_hdf5_chk_0000')
+    with tables.open_file(fn, 'w') as fh, warnings.catch_warnings():
+      warnings.simplefilter('ignore', tables.NaturalNameWarning)
+      fh.create_array('/', 'coordinates', coord)
+      fh.create_array('/', 'block size', bsize)
+      fh.create_array('/', 'node type', ntype)
+      fh.create_array('/', 'dens', dens)
+    #end
+    blocks = pg.data.load_amr_blocks(fn, 'dens')
+    assert len(blocks) == 9
+    assert [b.ctx['amr_level'] for b in blocks] == [1] + [2]*8
+    assert np.array_equal(blocks[0].get_values()[..., 0], dens[0].transpose(2, 1, 0))
+    assert np.allclose(blocks[1].get_bounds()[0], corners[0])
+    # Only the blocks intersecting the plane are selected
+    selected = [pg.data.select_amr_block(b, z2='0.3') for b in blocks]
+    assert sum(values is not None for _, values in selected) == 5
+    assert np.array_equal(selected[0][1][..., 0, 0], dens[0, 0].T)
+    grid, values = pg.data.select_amr_block(blocks[0], z0='0.6:1.5')
+    assert np.array_equal(values[..., 0], dens[0, :, :, 1:].transpose(2, 1, 0))
+  #end
+
+  def test_write_txt(self, tmp_path):  # Chunked ASCII output
+    data = pg.GData('{:s}bimaxwellian-elc.gkyl'.format(self.dir_path))
+    grid = [g.copy() for g in data.get_grid()]
+    fn = str(tmp_path / 'out.txt')
+    pg.data.write_txt.write_txt(fn, data.get_grid(), data.get_values(),
+                                chunk_rows=7)
+    for d in range(3):
+      assert np.array_equal(data.get_grid()[d], grid[d]) # not modified
+    #end
+    out = np.loadtxt(fn, delimiter=',')
+    centers = [0.5*(g[1:]+g[:-1]) for g in grid]
+    mesh = np.meshgrid(*centers, indexing='ij')
+    assert out.shape[0] == np.prod(data.get_num_cells())
+    for d in range(3):
+      assert np.allclose(out[:, d], mesh[d].ravel())
+    #end
+    assert np.allclose(out[:, 3:], data.get_values().reshape(out.shape[0], -1))
+  #end
+
+  def test_frame_cube(self, tmp_path):  # Compressed container of frames
+    ref = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path))
+    frames = []
+    for i in range(3):
+      dat = pg.GData(ctx={'time' : 0.5*i, 'frame' : i})
+      dat.push(ref.get_grid(), ref.get_values()*(i+1))
+      frames.append(dat)
+    #end
+    fn = str(tmp_path / 'frames.cube')
+    pg.data.write_frame_cube(fn, frames[:2])
+    pg.data.write_frame_cube(fn, frames[2:], append=True)
+    # Collected dataset with the time as the first dimension
+    data = pg.GData(fn)
+    assert np.array_equal(data.get_grid()[0], [0.0, 0.5, 1.0])
+    assert np.array_equal(data.get_values()[2], 3*ref.get_values())
+    data = pg.GData(fn, z0='3:7', comp='1', tmin=0.25)
+    assert np.array_equal(data.get_values(),
+                          [(i+1)*ref.get_values()[3:7, :, 1:2] for i in (1, 2)])
+    assert np.array_equal(data.get_grid()[1], ref.get_grid()[0][3:8])
+    # Sequence of frames
+    data = pg.data.load_frame_cube(fn)
+    assert [dat.ctx['frame'] for dat in data] == [0, 1, 2]
+    assert np.array_equal(data[1].get_values(), 2*ref.get_values())
+  #end
+
+  def test_write_gkyl(self, tmp_path):  # Streamed gkyl output
+    ref = pg.GData('{:s}bimaxwellian-elc.gkyl'.format(self.dir_path))
+    lo, up = ref.get_bounds()
+    values = np.asfortranarray(ref.get_values()) # non-contiguous rows
+    for num_ranges in (1, 3):
+      fn = str(tmp_path / 'out_{:d}.gkyl'.format(num_ranges))
+      pg.data.write_gkyl.write_gkyl(fn, values, lo, up,
+                                    num_ranges=num_ranges, chunk_size=100)
+      data = pg.GData(fn)
+      assert data._reader.file_type == (1 if num_ranges == 1 else 3)
+      assert np.array_equal(data.get_values(), ref.get_values())
+      assert np.allclose(data.get_bounds()[1], up)
+    #end
+  #end
+
+  def test_float32(self, tmp_path):  # Single precision kept end-to-end
+    ref = pg.GData('{:s}shock-f-ser-p1.gkyl'.format(self.dir_path))
+    data = pg.GData('{:s}shock-f-ser-p1.gkyl'.format(self.dir_path),
+                    dtype='float32')
+    assert data.get_values().dtype == np.float32
+    pg.GInterpModal(ref, 1, 'ms').interpolate(overwrite=True)
+    pg.GInterpModal(data, 1, 'ms').interpolate(overwrite=True)
+    assert data.get_values().dtype == np.float32
+    assert np.allclose(data.get_values(), ref.get_values(),
+                       rtol=1e-5, atol=1e-6)
+
+    grid, values = pg.tools.integrate(data, None)
+    _, ref_values = pg.tools.integrate(ref, None)
+    assert values.dtype == np.float32
+    assert np.allclose(values, ref_values, rtol=1e-5)
+
+    fn = str(tmp_path / 'out.gkyl')
+    data.write(fn)
+    out = pg.GData(fn)
+    assert out._reader.dtf == np.float32
+    assert np.array_equal(out.get_values(), data.get_values())
+    assert np.array_equal(out.get_bounds()[0], data.get_bounds()[0])
+
+    # The bounds are float64 whatever the real type of the data
+    cells = data.get_num_cells()
+    lower, upper = data.get_bounds()
+    header = b''.join([bytes([103, 107, 121, 108, 48]),
+                       np.array([1, 1, 0, 1, len(cells)], dtype='i8').tobytes(),
+                       np.array(cells, dtype='i8').tobytes(),
+                       np.array(lower, dtype='f8').tobytes(),
+                       np.array(upper, dtype='f8').tobytes(),
+                       np.array([4*data.get_num_comps(), np.prod(cells)],
+                                dtype='i8').tobytes()])
+    with open(fn, 'rb') as fh:
+      raw = fh.read()
+    #end
+    assert raw[:len(header)] == header
+    assert len(raw) == len(header) + data.get_values().nbytes
+  #end
+
   def test_gkyl_meta(self):  # Frame with msgpack meta data included
     data = pg.GData('{:s}hll-euler.gkyl'.format(self.dir_path))
     assert data.ctx['frame'] == 1
@@ -46,6 +450,92 @@ class TestGkyl:
     dg.interpolate(overwrite=True)
     assert data.get_bounds()[0][1] < -1.06e+07 and data.get_bounds()[0][1] > -1.07e+07 and data.get_bounds()[1][2] > 1.2e-16 and data.get_bounds()[1][2] < 1.3e-16
   #end
+
+  def test_no_load_cli(self, monkeypatch):  # '--no-load' and '--max-memory'
+    from click.testing import CliRunner
+    from postgkyl import pgkyl
+    spaces = []
+    base = pgkyl.DataSpace
+    class DataSpace(base):
+      def __init__(self, *args):
+        base.__init__(self, *args)
+        spaces.append(self)
+      #end
+    #end
+    monkeypatch.setattr(pgkyl, 'DataSpace', DataSpace)
+    fn = '{:s}hll-euler.gkyl'.format(self.dir_path)
+    ref = pg.GData(fn)
+
+    # Only the headers are read and the values are never loaded
+    result = CliRunner().invoke(pgkyl.cli, ['--max-memory', '1M', fn,
+                                            '--no-load'])
+    assert result.exit_code == 0, result.output
+    dat = list(spaces[-1].iterator())[0]
+    assert np.array_equal(dat.get_num_cells(), ref.get_num_cells())
+    assert dat.get_values() is None
+    # With a budget, the values are read on the first access
+    result = CliRunner().invoke(pgkyl.cli, ['--max-memory', '1M', fn])
+    assert result.exit_code == 0, result.output
+    dat = list(spaces[-1].iterator())[0]
+    assert not dat.is_loaded()
+    assert np.array_equal(dat.get_values(), ref.get_values())
+  #end
+
+  def test_follow(self, tmp_path, monkeypatch):  # Only the new frames rerun
+    import matplotlib
+    matplotlib.use('Agg')
+    import importlib
+    from click.testing import CliRunner
+    from postgkyl import pgkyl
+    # The module is shadowed by the command of the same name
+    load_cmd = importlib.import_module('postgkyl.commands.load')
+
+    src = '{:s}hll-euler.gkyl'.format(self.dir_path)
+    shutil.copy(src, str(tmp_path / 'f_0.gkyl'))
+    old = os.path.getmtime(src) - 10.0
+    os.utime(str(tmp_path / 'f_0.gkyl'), (old, old))
+
+    loaded = []
+    def load_files(files, **kwargs):
+      loaded.append([os.path.basename(fn) for fn in files])
+      return orig_load_files(files, **kwargs)
+    #end
+    orig_load_files = load_cmd.load_files
+    monkeypatch.setattr(load_cmd, 'load_files', load_files)
+    # The first poll writes the second frame, the next one lets the
+    # watcher see it is complete, and then the loop is stopped
+    polls = []
+    def sleep(seconds):
+      polls.append(seconds)
+      if len(polls) == 1:
+        shutil.copy(src, str(tmp_path / 'f_1.gkyl'))
+      elif len(polls) > 2:
+        raise KeyboardInterrupt
+      #end
+    #end
+    monkeypatch.setattr(pgkyl.time, 'sleep', sleep)
+    spaces = []
+    base = pgkyl.DataSpace
+    class DataSpace(base):
+      def __init__(self, *args):
+        base.__init__(self, *args)
+        spaces.append(self)
+      #end
+    #end
+    monkeypatch.setattr(pgkyl, 'DataSpace', DataSpace)
+
+    result = CliRunner().invoke(pgkyl.cli, [
+      '--follow', '--poll', '0', str(tmp_path / 'f_*.gkyl'),
+      'plot', '--saveframes', str(tmp_path / 'img')])
+    assert result.exit_code == 0, result.output
+    assert loaded == [['f_0.gkyl'], ['f_1.gkyl']]
+    # One DataSpace in which the new frame replaced the previous one
+    assert len(spaces) == 1
+    assert [os.path.basename(dat._file_name)
+            for dat in spaces[0].iterator(only_active=False)] == ['f_1.gkyl']
+    assert os.path.exists(str(tmp_path / 'img_0.png'))
+    assert os.path.exists(str(tmp_path / 'img_1.png'))
+  #end
 #end
 
 